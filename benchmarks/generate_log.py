@@ -0,0 +1,122 @@
+"""Writes a synthetic randomizer log, for benchmarking on logs of any size.
+
+Usage: python -m benchmarks.generate_log <output path> [--zx] [pokemon] [moves] [locations] [seed]
+
+e.g. python -m benchmarks.generate_log big_zx.log --zx 1200 700 900 3
+"""
+import random
+import sys
+
+TYPES = ["BUG", "DARK", "DRAGON", "ELECTRIC", "FIGHTING", "FIRE", "FLYING", "GHOST", "GRASS", "GROUND", "ICE",
+         "NORMAL", "POISON", "PSYCHIC", "ROCK", "STEEL", "WATER"]
+CLASSIFICATIONS = ["Grass/Cave", "Surfing", "Old Rod", "Good Rod", "Super Rod", "Rock Smash", "Headbutt"]
+ITEMS = ["Leftovers", "Oran Berry", "King's Rock", "Everstone"]
+ABILITIES = ["Levitate", "Overgrow", "Blaze", "Torrent", "Intimidate", "Static"]
+
+def generateLog(path, zx=False, num_pokemon=500, num_moves=400, num_locations=120, seed=1):
+    rng = random.Random(seed)
+    pkmn_names = [f"Pkmn{i}" for i in range(1, num_pokemon + 1)]
+    # Some real logs have double-encoded UTF-8 names (see external.parsers.repairMojibake)
+    pkmn_names[0] = "Nidoranâ™€"
+    pkmn_names[1] = "FlabÃ©bÃ©"
+    move_names = [f"Move {i}" for i in range(1, num_moves + 1)]
+    lines = [f"Randomizer Version: {'4.6.0' if zx else '1.10.3'}", "Random Seed: 12345", "Settings String: abc", ""]
+
+    lines.append("--Pokemon Base Stats & Types--")
+    if zx:
+        lines.append("NUM|NAME|TYPE|HP|ATK|DEF|SATK|SDEF|SPD|ABILITY1|ABILITY2|ABILITY3|ITEM")
+    else:
+        lines.append("NUM|NAME|TYPE|HP|ATK|DEF|SPE|SATK|SDEF|ABILITY1|ABILITY2|ITEM")
+    for num, pkmn_name in enumerate(pkmn_names, 1):
+        types = rng.sample(TYPES, rng.choice([1, 2]))
+        stats = [str(rng.randint(5, 255)) for _ in range(6)]
+        abilities = rng.sample(ABILITIES, 3 if zx else 2)
+        if rng.random() < .3:
+            abilities[-1] = "-"
+        items = ""
+        if rng.random() < .4:
+            items = ", ".join(f"{item} ({rng.choice(['50%', '5%', '100%'])})" for item in rng.sample(ITEMS, rng.randint(1, 2)))
+        lines.append("|".join([f"{num:3d}", f"{pkmn_name:12s}", "/".join(types), *stats, *abilities, items]))
+    lines.append("")
+
+    lines.append("--Pokemon Movesets--")
+    for num, pkmn_name in enumerate(pkmn_names, 1):
+        moveset = [(level, rng.choice(move_names)) for level in sorted(rng.sample(range(1, 70), rng.randint(4, 12)))]
+        if zx:
+            lines.append(f"{num:03d} {pkmn_name} -> {pkmn_name}")
+            for stat in ["HP", "ATK", "DEF", "SPA", "SPD", "SPE"]:
+                lines.append(f"{stat:5s}{rng.randint(5, 255)}")
+            lines.extend(f"Level {level:2d}: {move_name}" for level, move_name in moveset)
+            lines.append("")
+        else:
+            lines.append(f"{num:03d} {pkmn_name}: " + ", ".join(f"{move_name} at level {level}" for level, move_name in moveset))
+    lines.append("")
+
+    lines.append("--Move Data--")
+    lines.append("NUM|NAME|TYPE|POWER|ACC.|PP|CATEGORY")
+    for num, move_name in enumerate(move_names, 1):
+        lines.append(f"{num:3d}|{move_name:15s}|{rng.choice(TYPES)}|{rng.choice([0, 40, 60, 80, 100, 120])}|{rng.choice([70, 85, 100])}"
+                     f"|{rng.choice([5, 10, 15, 20, 35])}|{rng.choice(['PHYSICAL', 'SPECIAL', 'STATUS'])}")
+    lines.append("")
+
+    lines.append("--TM Moves--")
+    lines.extend(f"TM{i:02d} {move_names[i % num_moves]}" for i in range(1, 93))
+    lines.extend(f"HM{i:02d} {move_names[(i + 100) % num_moves]}" for i in range(1, 9))
+    lines.append("")
+    lines.append("--TM Compatibility--")
+    for num, pkmn_name in enumerate(pkmn_names, 1):
+        cells = [(f"TM{i:02d}" if rng.random() < .3 else "    ") for i in range(1, 93)] + [(f"HM{i:02d}" if rng.random() < .2 else "    ") for i in range(1, 9)]
+        lines.append(f"{num:3d} {pkmn_name:12s}|" + "|".join(cells))
+    lines.append("")
+
+    lines.append("--Wild Pokemon--")
+    set_num = 1
+    for location in range(num_locations):
+        for classification in rng.sample(CLASSIFICATIONS, rng.randint(1, 3)):
+            encounters = []
+            for _ in range(rng.randint(2, 8)):
+                min_level = rng.randint(2, 60)
+                if rng.random() < .5:
+                    encounters.append(f"{rng.choice(pkmn_names)} Lvs {min_level}-{min_level + rng.randint(1, 5)}")
+                else:
+                    encounters.append(f"{rng.choice(pkmn_names)} Lv{min_level}")
+            rate = rng.choice([10, 25])
+            if zx:
+                lines.append(f"Set #{set_num} - Route {location} {classification} (rate={rate})")
+                lines.extend(f"{encounter}  HP 40 ATK 40 DEF 40 SPATK 40 SPDEF 40 SPEED 40" for encounter in encounters)
+                lines.append("")
+            else:
+                lines.append(f"Set #{set_num} - Route {location} {classification} (rate={rate}) - " + ", ".join(encounters))
+            set_num += 1
+    lines.append("")
+
+    lines.append("--Trainers Pokemon--")
+    for num in range(1, 200):
+        team = ", ".join(f"{rng.choice(pkmn_names)} Lv{rng.randint(2, 70)}" for _ in range(rng.randint(1, 6)))
+        lines.append(f"#{num} (Youngster{num} => Youngster{num}) - {team}")
+    lines.append("")
+
+    lines.append("--Static Pokemon--")
+    for _ in range(20):
+        lines.append(f"{rng.choice(['Sudowoodo', 'Lugia', 'HoOh', 'Snorlax'])} => {rng.choice(pkmn_names[2:])}")
+    lines.append("")
+    lines.append("------------------------------------------------------------------")
+    lines.append("Randomization of Pokemon HeartGold (U) completed.")
+    lines.append("Time elapsed: 1234ms")
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+def main(args):
+    args = list(args)
+    zx = "--zx" in args
+    if zx:
+        args.remove("--zx")
+    if not args:
+        print(__doc__)
+        return 1
+    generateLog(args[0], zx, *(int(arg) for arg in args[1:5]))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,49 @@
+"""Reports the memory retained per ingested pokemon.
+
+Usage: python -m benchmarks.model_memory <path to randomizer log>
+"""
+import gc
+import pathlib
+import sys
+import tracemalloc
+
+from src import database, parsers
+
+def ingestModels(ingester : parsers.RandomizerLogParser) -> database.Database:
+    db = database.Database()
+    db.setRandomizerVersion(ingester.extractRandomizerVersion())
+    db.setPokemonVersion(ingester.extractPokemonVersion())
+    db.addPokemon(list(ingester.extractPokemon(db.zxRandomizer()).values()))
+    try:
+        db.addMoves(list(ingester.extractMoves().values()))
+    except parsers.RegexNotFoundError:
+        pass
+    if db.zxRandomizer():
+        db.addMovesets(ingester.extractMovesetsZX())
+        db.addLocations(ingester.extractLocationsZX(db.version))
+    else:
+        db.addMovesets(ingester.extractMovesets())
+        db.addLocations(ingester.extractLocations())
+    db.addWildOccurrencesToPokemon()
+    return db
+
+def main(log_path):
+    # Load the file up front so the raw lines aren't counted against the models
+    ingester = parsers.RandomizerLogParser(pathlib.Path(log_path))
+
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    db = ingestModels(ingester)
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    retained -= baseline
+    num_pokemon = len(db.pokemon)
+    print(f"Ingested {num_pokemon} pokemon, {len(db.moves)} moves, {len(db.locations)} locations")
+    print(f"Retained: {retained:,} bytes ({retained // max(num_pokemon, 1):,} bytes per pokemon)")
+    print(f"Peak:     {peak - baseline:,} bytes")
+
+if __name__ == "__main__":
+    main(sys.argv[1])
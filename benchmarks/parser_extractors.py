@@ -0,0 +1,45 @@
+"""Times each RandomizerLogParser extractor on a log file.
+
+Usage: python -m benchmarks.parser_extractors <path to randomizer log> [repeats]
+"""
+import contextlib
+import io
+import pathlib
+import sys
+import timeit
+
+from src import parsers
+
+def extractors(ingester : parsers.RandomizerLogParser, zx, version):
+    if zx:
+        return {
+            "extractPokemon": lambda: ingester.extractPokemon(zx),
+            "extractMoves": ingester.extractMoves,
+            "extractMovesetsZX": ingester.extractMovesetsZX,
+            "extractLocationsZX": lambda: ingester.extractLocationsZX(version),
+            "extractStaticOccurrencesZX": lambda: ingester.extractStaticOccurrencesZX(version),
+        }
+    return {
+        "extractPokemon": lambda: ingester.extractPokemon(zx),
+        "extractMoves": ingester.extractMoves,
+        "extractMovesets": ingester.extractMovesets,
+        "extractLocations": ingester.extractLocations,
+        "extractStaticOccurrences": ingester.extractStaticOccurrences,
+    }
+
+def main(log_path, repeats=5):
+    ingester = parsers.RandomizerLogParser(pathlib.Path(log_path))
+    zx = int(ingester.extractRandomizerVersion()[0]) >= 4
+    version = ingester.extractPokemonVersion()
+
+    total = 0.0
+    for name, fn in extractors(ingester, zx, version).items():
+        # Some extractors print per line; keep that out of the timings
+        with contextlib.redirect_stdout(io.StringIO()):
+            best = min(timeit.repeat(fn, number=1, repeat=repeats))
+        total += best
+        print(f"{name:<28} {best*1000:9.2f} ms")
+    print(f"{'total':<28} {total*1000:9.2f} ms")
+
+if __name__ == "__main__":
+    main(sys.argv[1], *(int(x) for x in sys.argv[2:3]))
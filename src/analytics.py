@@ -0,0 +1,210 @@
+import json
+import pathlib
+import sys
+from   typing import Iterable, List, Mapping
+
+import numpy
+
+from src import database, pokemon, types
+
+####################################################
+class SeedAggregator:
+    """Folds any number of seeds into fixed-size accumulators (stat and BST
+    histograms, type counts, encounter-type counts), so memory stays constant
+    however many seeds go through it.
+
+    Stats are bounded ints (0-255), so a full histogram per stat is both
+    fixed-size and exact; quantiles come straight from its cumulative counts
+    instead of from an approximate sketch.
+    """
+    TYPES = types.all_types_with_unknown
+    CLASSIFICATIONS = [*pokemon.Sublocation.classifications(), pokemon.StaticSublocation.classification, "Other"]
+    MAX_STAT = pokemon.Stats.Attribute.ATTR_MAX
+    MAX_BST = MAX_STAT * len(pokemon.Stats.ALL_ATTR_NAMES)
+    # Encounters at or below this level count as "early" (starter area) encounters
+    EARLY_MAX_LEVEL = 10
+
+    def __init__(self):
+        self.seed_count = 0
+        self.pokemon_count = 0
+        # stat index -> value -> count
+        self.stat_histograms = numpy.zeros((len(pokemon.Stats.ALL_ATTR_NAMES), self.MAX_STAT + 1), dtype=numpy.int64)
+        self.bst_histogram = numpy.zeros(self.MAX_BST + 1, dtype=numpy.int64)
+        # Dual types count once for each type
+        self.type_counts = numpy.zeros(len(self.TYPES), dtype=numpy.int64)
+        # classification -> type -> number of encounters
+        self.encounter_type_counts = numpy.zeros((len(self.CLASSIFICATIONS), len(self.TYPES)), dtype=numpy.int64)
+        # type -> number of seeds with at least one early encounter of that type
+        self.early_type_seed_counts = numpy.zeros(len(self.TYPES), dtype=numpy.int64)
+
+    ####################################################
+    ## Sources
+    ####################################################
+    def addDatabase(self, db : database.Database):
+        encounters = db.encounters
+        known = encounters.pkmn_ids >= 0
+        classification_index = numpy.array([self._classificationIndex(encounters.classifications.name(i)) for i in range(len(encounters.classifications))] or [0], dtype=numpy.intp)
+        self._fold(numpy.array([self._typeIndex(p.type.primary) for p in db.pokemon_by_id], dtype=numpy.intp),
+                   numpy.array([self._typeIndex(p.type.secondary) for p in db.pokemon_by_id], dtype=numpy.intp),
+                   numpy.array([p.stats.values for p in db.pokemon_by_id], dtype=numpy.int64).reshape(-1, len(pokemon.Stats.ALL_ATTR_NAMES)),
+                   encounters.pkmn_ids[known],
+                   classification_index[encounters.classification_ids[known]],
+                   encounters.min_levels[known])
+
+    def addLog(self, path : pathlib.Path):
+        """Ingests a log, folds it in and lets the database go."""
+        from src import ingest
+        self.addDatabase(ingest.LogIngester(path, lazy=False).ingest())
+
+    def addStoredSeed(self, seed_store, log_hash):
+        """Folds in a seed from a store.SeedStore, without re-parsing its log."""
+        seed_id = seed_store.seedId(log_hash)
+        pokemon_rows = seed_store.query("""SELECT p.primary_type, p.secondary_type, s.hp, s.attack, s.defence, s.special_attack, s.special_defence, s.speed
+                                           FROM pokemon p JOIN stats s ON s.seed_id = p.seed_id AND s.pkmn_id = p.id
+                                           WHERE p.seed_id = ? ORDER BY p.id""", (seed_id,))
+        encounter_rows = seed_store.query("SELECT pkmn_id, classification, min_level FROM encounters WHERE seed_id = ?", (seed_id,))
+        self._fold(numpy.array([self._typeIndex(row[0]) for row in pokemon_rows], dtype=numpy.intp),
+                   numpy.array([self._typeIndex(row[1]) for row in pokemon_rows], dtype=numpy.intp),
+                   numpy.array([row[2:] for row in pokemon_rows], dtype=numpy.int64).reshape(-1, len(pokemon.Stats.ALL_ATTR_NAMES)),
+                   numpy.array([row[0] for row in encounter_rows], dtype=numpy.intp),
+                   numpy.array([self._classificationIndex(row[1]) for row in encounter_rows], dtype=numpy.intp),
+                   numpy.array([-1 if row[2] is None else row[2] for row in encounter_rows], dtype=numpy.int64))
+
+    def _typeIndex(self, type_str):
+        if type_str is None:
+            return -1
+        return self.TYPES.index(type_str) if type_str in self.TYPES else self.TYPES.index("UNKNOWN")
+
+    def _classificationIndex(self, classification):
+        return self.CLASSIFICATIONS.index(classification) if classification in self.CLASSIFICATIONS else len(self.CLASSIFICATIONS) - 1
+
+    def _fold(self, primary_types, secondary_types, stats, encounter_pkmn_ids, encounter_classifications, encounter_min_levels):
+        """Everything is per-seed arrays here: one row per pokemon / per encounter."""
+        self.seed_count += 1
+        self.pokemon_count += len(primary_types)
+
+        for stat_index in range(stats.shape[1]):
+            self.stat_histograms[stat_index] += numpy.bincount(stats[:, stat_index], minlength=self.MAX_STAT + 1)
+        self.bst_histogram += numpy.bincount(stats.sum(axis=1), minlength=self.MAX_BST + 1)
+        self.type_counts += numpy.bincount(primary_types, minlength=len(self.TYPES))
+        self.type_counts += numpy.bincount(secondary_types[secondary_types >= 0], minlength=len(self.TYPES))
+
+        early_types = numpy.zeros(len(self.TYPES), dtype=bool)
+        for pkmn_types in (primary_types, secondary_types):
+            encounter_types = pkmn_types[encounter_pkmn_ids]
+            typed = encounter_types >= 0
+            numpy.add.at(self.encounter_type_counts, (encounter_classifications[typed], encounter_types[typed]), 1)
+            early_types[encounter_types[typed & (encounter_min_levels >= 0) & (encounter_min_levels <= self.EARLY_MAX_LEVEL)]] = True
+        self.early_type_seed_counts += early_types
+
+    ####################################################
+    ## Results
+    ####################################################
+    @staticmethod
+    def _histogramQuantile(histogram, q):
+        cumulative = numpy.cumsum(histogram)
+        if cumulative[-1] == 0:
+            return None
+        return int(numpy.searchsorted(cumulative, q * cumulative[-1], side="left"))
+
+    def statQuantile(self, attr_name, q) -> int:
+        """Exact q-quantile (0..1) of a stat over every pokemon in every seed."""
+        return self._histogramQuantile(self.stat_histograms[pokemon.Stats.ALL_ATTR_NAMES.index(attr_name)], q)
+
+    def bstQuantile(self, q) -> int:
+        return self._histogramQuantile(self.bst_histogram, q)
+
+    def statMean(self, attr_name) -> float:
+        histogram = self.stat_histograms[pokemon.Stats.ALL_ATTR_NAMES.index(attr_name)]
+        return float(numpy.dot(histogram, numpy.arange(len(histogram))) / max(histogram.sum(), 1))
+
+    def earlyTypeChance(self, type_str) -> float:
+        """Fraction of seeds with at least one early encounter of the given type."""
+        return float(self.early_type_seed_counts[self.TYPES.index(type_str)] / max(self.seed_count, 1))
+
+    def toDict(self) -> Mapping:
+        return {
+            "seed_count": self.seed_count,
+            "pokemon_count": self.pokemon_count,
+            "stats": {attr_name: {"mean": self.statMean(attr_name),
+                                  "quartiles": [self.statQuantile(attr_name, q) for q in (0.25, 0.5, 0.75)],
+                                  "histogram": self.stat_histograms[i].tolist()}
+                      for i, attr_name in enumerate(pokemon.Stats.ALL_ATTR_NAMES)},
+            "bst": {"quartiles": [self.bstQuantile(q) for q in (0.25, 0.5, 0.75)], "histogram": self.bst_histogram.tolist()},
+            "types": dict(zip(self.TYPES, self.type_counts.tolist())),
+            "encounter_types": {classification: dict(zip(self.TYPES, counts.tolist()))
+                                for classification, counts in zip(self.CLASSIFICATIONS, self.encounter_type_counts) if counts.any()},
+            "early_type_chance": {type_str: self.earlyTypeChance(type_str) for type_str in self.TYPES},
+        }
+
+    def exportJson(self, path : pathlib.Path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.toDict(), f, indent=2)
+
+    def summaryLines(self) -> List[str]:
+        lines = [f"{self.seed_count} seeds, {self.pokemon_count} pokemon"]
+        for attr_name in pokemon.Stats.ALL_ATTR_NAMES:
+            quartiles = ", ".join(str(self.statQuantile(attr_name, q)) for q in (0.25, 0.5, 0.75))
+            lines.append(f"{pokemon.Stats.short_name(attr_name):>5}: mean {self.statMean(attr_name):6.1f}, quartiles {quartiles}")
+        lines.append(f"  bst: quartiles {', '.join(str(self.bstQuantile(q)) for q in (0.25, 0.5, 0.75))}")
+        lines.append(f"Chance of an early (Lv <= {self.EARLY_MAX_LEVEL}) encounter by type:")
+        lines.extend(f"{type_str:>10}: {self.earlyTypeChance(type_str):6.1%}" for type_str in self.TYPES if self.type_counts[self.TYPES.index(type_str)])
+        return lines
+
+    def plot(self):
+        # Only needed for plotting, so not required by the rest of the module
+        from matplotlib import pyplot
+        figure, (stat_axes, type_axes) = pyplot.subplots(1, 2, figsize=(14, 5))
+        for attr_name, histogram in zip(pokemon.Stats.ALL_ATTR_NAMES, self.stat_histograms):
+            stat_axes.plot(numpy.arange(len(histogram)), histogram / max(histogram.sum(), 1), label=attr_name)
+        stat_axes.set_title(f"Stat Distribution ({self.seed_count} seeds)")
+        stat_axes.legend(loc="best")
+        type_axes.bar(self.TYPES, self.early_type_seed_counts / max(self.seed_count, 1))
+        type_axes.set_title(f"Seeds with an early (Lv <= {self.EARLY_MAX_LEVEL}) encounter, by type")
+        type_axes.tick_params(axis="x", labelrotation=90)
+        figure.tight_layout()
+        pyplot.show(block=False)
+        return figure
+
+####################################################
+def main(args):
+    """python -m src.analytics [--store <store file>] [--json <output file>] [<log file>...]
+
+    Aggregates the given logs (and every seed in the store, if given)."""
+    import contextlib
+    import io
+    from src import store
+
+    store_path = json_path = None
+    log_paths = []
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if arg == "--store":
+            store_path = args.pop(0)
+        elif arg == "--json":
+            json_path = args.pop(0)
+        else:
+            log_paths.append(arg)
+    if store_path is None and not log_paths:
+        print(main.__doc__)
+        return 1
+
+    aggregator = SeedAggregator()
+    for log_path in log_paths:
+        # Keep the ingest chatter out of the summary
+        with contextlib.redirect_stdout(io.StringIO()):
+            aggregator.addLog(pathlib.Path(log_path))
+    if store_path is not None:
+        seed_store = store.SeedStore(pathlib.Path(store_path))
+        for log_hash, *_ in seed_store.seeds():
+            aggregator.addStoredSeed(seed_store, log_hash)
+        seed_store.close()
+
+    print("\n".join(aggregator.summaryLines()))
+    if json_path is not None:
+        aggregator.exportJson(pathlib.Path(json_path))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
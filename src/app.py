@@ -1,70 +1,127 @@
-import collections
 import pathlib
 from   pprint import pprint
 import random
-import statistics
-from   typing import Mapping, List
 
-from   matplotlib import pyplot
-import numpy
 import PySimpleGUI as gui
-from   scipy import interpolate
 
-from src import controller, database, parsers, pokemon
+from src import controller, coverage, database, diff, distributions, idle, ingest, parsers, pokemon, query, server, similarity, store
 from src.custom_elements import SearchableListBox
 
 ####################################################
 ## Other (Temp?)
 ####################################################
-def popupStatAverages(all_pokemon: List[pokemon.Pokemon]):
-    # Group raw stats by attribute
-    grouped_raw_stats = {}
-    grouped_raw_stats : Mapping[str, int]
+def popupStatAverages(db : database.Database):
+    # Cached per database (and rendered in the background since ingest), so this is usually instant
+    stat_distributions = distributions.forDatabase(db)
     for attr_name in pokemon.Stats.ALL_ATTR_NAMES:
-        grouped_raw_stats[attr_name] = []
-        for pkmn in all_pokemon:
-            grouped_raw_stats[attr_name].append(getattr(pkmn.stats,attr_name).value)
-
-    # Covert raw counts into Counter objects
-    grouped_counters = {}
-    grouped_counters : Mapping[str, collections.Counter]
-    for attr_name in pokemon.Stats.ALL_ATTR_NAMES:
-        grouped_counters[attr_name] = collections.Counter(grouped_raw_stats[attr_name])
-
-    for attr_name in pokemon.Stats.ALL_ATTR_NAMES:
-        ## Plot splined curve over data
-        cdict = dict(sorted(dict(grouped_counters[attr_name]).items()))
-        (xs, ys) = list(cdict.keys()), list(cdict.values())
-        #pyplot.scatter(xs, ys)
-        spline = interpolate.UnivariateSpline(xs, ys, s=400)
-        xs2 = numpy.linspace(0, 255, 1000)
-        xs2 = numpy.linspace(min(xs), max(xs), 1000)
-        ys2 = spline(xs2)
-        plotted_curves = pyplot.plot(xs2, ys2, label=attr_name)
-
-        ## Plot median line
-        median_value = statistics.median(grouped_raw_stats[attr_name])
-        print(f"median of {attr_name} is {median_value}")
-        pyplot.axvline(x=median_value, color=plotted_curves[-1].get_color(), lw=1, ls="dashed")
-
-    pyplot.title("Stat Distribution (with 50th percentile)")
-    pyplot.legend(loc="best")
-    pyplot.show(block=False)
-
-
+        print(f"median of {attr_name} is {stat_distributions.all.median(attr_name)}")
+
+    layout = [ [gui.Text("Type:"), gui.Combo(["All", *stat_distributions.types()], default_value="All", key="stat_averages_type", readonly=True, enable_events=True)],
+               [gui.Text("Rendering...", key="stat_averages_status")],
+               [gui.Image(key="stat_averages_image")],
+             ]
+    window = gui.Window("Stat Averages", layout, finalize=True)
+
+    def showImage(type_str):
+        # Never wait on the render here: the image is swapped in once it's ready
+        def ready(future):
+            # Runs on the render thread, possibly after the popup was closed
+            if not window.is_closed():
+                window.write_event_value("stat_averages_ready", (type_str, future))
+        stat_distributions.image(type_str).add_done_callback(ready)
+
+    type_str = None
+    showImage(type_str)
+    while True:
+        event, values = window.read()
+        if event in (None, gui.WIN_CLOSED):
+            break
+        elif event == "stat_averages_type":
+            type_str = None if values["stat_averages_type"] == "All" else values["stat_averages_type"]
+            window["stat_averages_status"].update("Rendering...")
+            showImage(type_str)
+        elif event == "stat_averages_ready":
+            ready_type_str, future = values["stat_averages_ready"]
+            # A render for a type that's since been switched away from
+            if ready_type_str != type_str:
+                continue
+            if future.exception() is not None:
+                window["stat_averages_status"].update(f"Couldn't render: {future.exception()}")
+                continue
+            window["stat_averages_status"].update("")
+            window["stat_averages_image"].update(data=future.result())
+    window.close()
+
+def popupSeedDiff(loaded_logs : ingest.LoadedLogs):
+    keys = loaded_logs.keys()
+    layout = [ [gui.Text("Old:", size=(4,1)), gui.Combo(keys, default_value=keys[-1], key="diff_old", size=(60,1), readonly=True)],
+               [gui.Text("New:", size=(4,1)), gui.Combo(keys, default_value=keys[0], key="diff_new", size=(60,1), readonly=True)],
+               [gui.Button("Compare", key="diff_compare")],
+               [gui.Multiline("", key="diff_report", size=(100, 40), font="Consolas 10", disabled=True)],
+             ]
+    window = gui.Window("Seed Diff", layout, finalize=True)
+    while True:
+        event, values = window.read()
+        if event in (None, gui.WIN_CLOSED):
+            break
+        elif event == "diff_compare":
+            # Comparing only touches already loaded databases, so nothing is re-parsed
+            _, old_db = loaded_logs.entries[values["diff_old"]]
+            _, new_db = loaded_logs.entries[values["diff_new"]]
+            seed_diff = diff.diffDatabases(old_db, new_db, values["diff_old"], values["diff_new"])
+            window["diff_report"].update("No differences" if seed_diff.empty() else str(seed_diff))
+    window.close()
+
+def warmIndexes(db : database.Database):
+    """Idle job: builds the search, similarity and coverage indexes before they're first needed."""
+    yield from query.warm(db)
+    similarity.forDatabase(db)
+    yield
+    coverage.forDatabase(db)
+
+def warmDatabase(db : database.Database):
+    """Parses whatever's still deferred in the background (posting a "database_section_ready"
+    event for each section, with the error if it couldn't be parsed), or if there's
+    nothing left, warms the indexes while idle.
+    """
+    if db.pending():
+        db.warm(lambda section, error: controller.instance.window.write_event_value("database_section_ready", (db, section, error)))
+    else:
+        idle.instance.add("warm_indexes", warmIndexes(db))
+
+# How often (in ms) a watched log is checked for changes
+WATCH_POLL_MS = 1000
 
 def main():
     gui.theme(database.default_theme)
 
+    log_ingester : ingest.LogIngester = None
+    log_watcher : ingest.LogWatcher = None
+    loaded_logs = ingest.LoadedLogs()
+    query_server : server.QueryServer = None
+
     controller.instance.newWindow("Some Title")
 
     while True:
-        event, encoded_event, values = controller.instance.read()
+        event, encoded_event, values = controller.instance.read(timeout=WATCH_POLL_MS if log_watcher else None)
 
         ################################################################################
         if event in (None, "Close"):
+            if query_server is not None:
+                query_server.stop()
             break
         ################################################################################
+        # Nothing happened; check the watched log for changes
+        elif event == gui.TIMEOUT_KEY:
+            changed_sections = log_watcher.poll()
+            if changed_sections:
+                print(f"==== Watch: Re-ingested {', '.join(sorted(changed_sections))} ====")
+                controller.instance.current_element.refresh(changed_sections)
+                warmDatabase(database.instance)
+                # It's a different seed now, so it's loaded under its new hash
+                active_key = loaded_logs.add(log_ingester, database.instance)
+                controller.instance.current_element.updateLoadedLogs(loaded_logs.keys(), active_key)
+        ################################################################################
         # Check for ENTER key
         elif encoded_event in (b'\r',):
             print("==== Event: Enter Key ====")
@@ -75,6 +132,10 @@ def main():
                 controller.instance.current_element.summary_slb.button.Click()
             elif current_tab_key == "Moves":
                 controller.instance.current_element.move_slb.button.Click()
+            elif current_tab_key == "Items":
+                controller.instance.current_element.item_slb.button.Click()
+            elif current_tab_key == "Trainers":
+                controller.instance.current_element.trainer_slb.button.Click()
             elif current_tab_key == "Team Builder":
                 pass
             elif current_tab_key == "Options":
@@ -102,59 +163,26 @@ def main():
             if not input_text_file:
                 continue
 
+            new_ingester = ingest.LogIngester(pathlib.Path(input_text_file))
             try:
-                ingester = parsers.RandomizerLogParser(pathlib.Path(input_text_file))
+                database.instance = new_ingester.ingest()
             except parsers.InvalidFormatError:
                 gui.popup_error("Ingested file doesn't have a valid format!")
                 continue
-
-            database.instance = database.Database()
-
-            database.instance.setRandomizerVersion(ingester.extractRandomizerVersion())
-            print(f"Detected randomizer version {database.instance.randomizerVerionStr()}")
-
-            database.instance.setPokemonVersion(ingester.extractPokemonVersion())
-            print(f"Detected pokemon version {database.instance.version}")
-
-            # TODO: Ingester should just return list
-            database.instance.addPokemon(list(ingester.extractPokemon(database.instance.zxRandomizer()).values()))
-            # TODO: Move prints into ingester
-            print(f"Extracted {len(database.instance.pokemon)} pokemon")
-
-            try:
-                # TODO: Ingester should just return list
-                database.instance.addMoves(list(ingester.extractMoves().values()))
-                # TODO: Move prints into ingester?
-                print(f"Extracted {len(database.instance.moves)} moves")
-            except parsers.RegexNotFoundError:
-                print(f"Moves are unchanged... skipping")
-
-            if database.instance.zxRandomizer():
-                movesets = ingester.extractMovesetsZX()
-                database.instance.addMovesets(movesets)
-                print(f"Extracted movesets for {len(movesets)} pokemon (ZX)")
-            else:
-                movesets = ingester.extractMovesets()
-                database.instance.addMovesets(movesets)
-                print(f"Extracted movesets for {len(movesets)} pokemon")
-
-            if database.instance.zxRandomizer():
-                # TODO: Ingester should just return list
-                database.instance.addLocations(list(ingester.extractLocationsZX(database.instance.version).values()))
-                print(f"Extracted {len(database.instance.locations)} locations (ZX)")
-            else:
-                # TODO: Ingester should just return list
-                database.instance.addLocations(list(ingester.extractLocations().values()))
-                print(f"Extracted {len(database.instance.locations)} locations")
-
-            # Add wild occurrences to pokemon
-            database.instance.addWildOccurrencesToPokemon()
-
-                # Add static encounters to pokemon
-            if database.instance.zxRandomizer():
-                database.instance.addStaticPokemonEncounters(ingester.extractStaticOccurrencesZX(database.instance.version))
-            else:
-                database.instance.addStaticPokemonEncounters(ingester.extractStaticOccurrences())
+            log_ingester = new_ingester
+            active_key = loaded_logs.add(log_ingester, database.instance)
+            # Get the stat averages plot going in the background
+            distributions.forDatabase(database.instance).image()
+            controller.instance.current_element.updateLoadedLogs(loaded_logs.keys(), active_key)
+            if database.default_store_location is not None:
+                seed_store = store.SeedStore(pathlib.Path(database.default_store_location))
+                seed_store.save(database.instance, log_ingester.log_hash)
+                seed_store.close()
+                print(f"Saved seed {log_ingester.log_hash} to {database.default_store_location}")
+            log_watcher = ingest.LogWatcher(log_ingester, database.instance) if values["checkbox_watch"] else None
+            # Only the pokemon have been parsed; the rest is parsed in the background
+            # and each tab is filled in as its sections become ready
+            warmDatabase(database.instance)
 
             # Update Team Builder Screen
             controller.instance.current_element.team_analysis_element.update()
@@ -166,8 +194,63 @@ def main():
 
             # Update combo boxs
             controller.instance.current_element.summary_slb.populate(database.instance.pokemon)
-            controller.instance.current_element.move_slb.populate(database.instance.moves)
-            controller.instance.current_element.location_slb.populate(database.instance.locations)
+            controller.instance.current_element.item_slb.populate(database.instance.items)
+            controller.instance.current_element.resetTrainers()
+
+        ################################################################################
+        elif event in ("database_section_ready",):
+            ready_database, section, error = values["database_section_ready"]
+            print(f"==== Event: {'Parsed' if error is None else 'Failed to parse'} {section} ====")
+            # Another log may have been ingested (or switched to) since
+            if ready_database is not database.instance:
+                continue
+            if error is not None:
+                # The tabs that needed it are left empty rather than stuck loading
+                gui.popup_error(f"Couldn't parse the {section} of this log:\n{error!r}")
+            controller.instance.current_element.refresh(set(ingest.LogIngester.DEFERRED_SECTIONS[section]))
+            if not database.instance.pending():
+                idle.instance.add("warm_indexes", warmIndexes(database.instance))
+                # Nothing was prepared while sections were still being parsed (see SummaryElement.prepare)
+                summary_slb = controller.instance.current_element.summary_slb
+                summary_slb.prepareNeighbours(*summary_slb.currentlySelected())
+
+        ################################################################################
+        elif event in ("combo_loaded_logs",):
+            print("==== Event: Switch Loaded Log ====")
+            selected_key = values["combo_loaded_logs"]
+            if selected_key not in loaded_logs:
+                continue
+            # Nothing is re-parsed; just re-bind everything to the other database
+            log_ingester, database.instance = loaded_logs.get(selected_key)
+            log_watcher = ingest.LogWatcher(log_ingester, database.instance) if values["checkbox_watch"] else None
+            controller.instance.current_element.updateLoadedLogs(loaded_logs.keys(), selected_key)
+            controller.instance.current_element.refresh({*ingest.LogIngester.SECTIONS, *ingest.LogIngester.LAZY_SECTIONS})
+            warmDatabase(database.instance)
+            controller.instance.window['text_ingested_version'].update(database.instance.version.name)
+            controller.instance.window['input_text_file'].update(str(log_ingester.path))
+
+        ################################################################################
+        elif event in ("checkbox_watch",):
+            print("==== Event: Watch Checkbox ====")
+            if values["checkbox_watch"] and log_ingester is not None:
+                log_watcher = ingest.LogWatcher(log_ingester, database.instance)
+            else:
+                log_watcher = None
+
+        ################################################################################
+        elif event in ("checkbox_serve",):
+            print("==== Event: Serve Checkbox ====")
+            if values["checkbox_serve"] and query_server is None:
+                try:
+                    query_server = server.QueryServer()
+                except OSError as e:
+                    gui.popup_error(f"Couldn't serve on port {server.DEFAULT_PORT}: {e}")
+                    controller.instance.window["checkbox_serve"].update(False)
+                    continue
+                query_server.start()
+            elif not values["checkbox_serve"] and query_server is not None:
+                query_server.stop()
+                query_server = None
 
         ################################################################################
         elif event.endswith("_callback_available"):
@@ -180,7 +263,16 @@ def main():
                 gui.popup_error("No Pokemon have been ingested")
                 continue
 
-            popupStatAverages(database.instance.pokemon.values())
+            popupStatAverages(database.instance)
+
+        ################################################################################
+        elif event in ("diff_seeds",):
+            print("==== Event: Seed Diff ====")
+            if len(loaded_logs) < 2:
+                gui.popup_error("Ingest at least two logs to compare them")
+                continue
+
+            popupSeedDiff(loaded_logs)
 
         ################################################################################
         elif event in ("listbox_theme",):
@@ -199,6 +291,18 @@ def main():
             controller.instance.current_element.moves_tab.select()
 
 
+        ################################################################################
+        elif event.startswith("move_element_learner_name_") or event.startswith("item_element_holder_name_") or event.startswith("summary_element_similar_name_") or event.startswith("trainer_element_pokemon_name_"):
+            print("==== Event: Move Learner/Item Holder/Similar Pokemon/Trainer Pokemon Click ====")
+            selected_name = controller.instance.window[event].DisplayText
+            if selected_name not in database.instance.pokemon:
+                continue
+            controller.instance.current_element.summary_slb.setSelection(selected_name)
+            controller.instance.current_element.summary_slb.update(database.instance.pokemon[selected_name])
+
+            # Finally, switch tabs to the Summary tab
+            controller.instance.current_element.display_tab.select()
+
         ################################################################################
         elif event.startswith("summary_element_wild_occurrence_location_"):
             print("==== Event: Display Location Click ====")
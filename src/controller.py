@@ -1,5 +1,8 @@
+import time
+
 import PySimpleGUI as gui
 
+from src import idle
 from src.custom_elements import WindowElement
 
 class Controller:
@@ -8,8 +11,19 @@ class Controller:
         self.window = None
         self.current_element = None
 
-    def read(self):
-        event, values = self.window.read()
+    def read(self, timeout=None):
+        # With a timeout, gui.TIMEOUT_KEY is returned if nothing happened in time
+        deadline = None if timeout is None else time.perf_counter() + timeout / 1000
+        while True:
+            if idle.instance.pending():
+                # Only check for input, so idle jobs get the time in between
+                event, values = self.window.read(timeout=0)
+            else:
+                remaining = None if deadline is None else max(0, int((deadline - time.perf_counter()) * 1000))
+                event, values = self.window.read(timeout=remaining)
+            if event != gui.TIMEOUT_KEY or (deadline is not None and time.perf_counter() >= deadline):
+                break
+            idle.instance.runFor()
         encoded_event = event.encode('utf-8') if event is not None else None
         return event, encoded_event, values
 
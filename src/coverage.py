@@ -0,0 +1,112 @@
+from   typing import List, Tuple
+
+import numpy
+
+from src import damage, database, types
+
+####################################################
+## Type sets as 18-bit masks (bit i is types.all_types[i])
+####################################################
+ALL_TYPES_MASK = (1 << len(types.all_types)) - 1
+MAX_LEVEL = 100
+
+def maskTypes(mask) -> List[str]:
+    return [type_str for i, type_str in enumerate(types.all_types) if mask >> i & 1]
+
+def _unionTable(bit_values : numpy.ndarray) -> numpy.ndarray:
+    """Lookup table of the OR of bit_values[i] over every set bit i, for all 2^18 masks.
+
+    Built a bit at a time: the masks with bit b as their top bit are the ones
+    below 1 << b, plus bit b's value.
+    """
+    table = numpy.zeros(1 << len(bit_values), dtype=numpy.uint32)
+    for bit, value in enumerate(bit_values):
+        table[1 << bit:2 << bit] = table[:1 << bit] | value
+    return table
+
+def _defendingMasks(condition : numpy.ndarray) -> numpy.ndarray:
+    """For each attacking type, the mask of (single) defending types where condition holds."""
+    weights = numpy.left_shift(numpy.uint32(1), numpy.arange(len(types.all_types), dtype=numpy.uint32))
+    return (condition * weights).sum(axis=1).astype(numpy.uint32)
+
+_type_matrix = damage.TYPE_MATRIX[:len(types.all_types), :len(types.all_types)]
+# attacking types mask -> mask of types hit super effectively by at least one of them
+SUPER_EFFECTIVE = _unionTable(_defendingMasks(_type_matrix > 1))
+# attacking types mask -> mask of types hit at least neutrally by at least one of them
+NEUTRAL_OR_BETTER = _unionTable(_defendingMasks(_type_matrix >= 1))
+# mask -> number of set bits
+POPCOUNT = numpy.zeros(1 << len(types.all_types), dtype=numpy.uint8)
+for _bit in range(len(types.all_types)):
+    POPCOUNT[1 << _bit:2 << _bit] = POPCOUNT[:1 << _bit] + 1
+
+####################################################
+class OffensiveCoverage:
+    """Every pokemon's damaging move types, as an 18-bit mask per level.
+
+    masks[pkmn id, level] holds the types of every damaging move learned at or
+    below that level, so both "what does X hit at level L" and "what does
+    everyone hit at level L" are plain array lookups.
+
+    Built on first use (the GUI warms it while idle, once the movesets have
+    been parsed) rather than during ingest, which would force the deferred
+    moves and movesets to be parsed up front.
+    """
+    def __init__(self, db : database.Database):
+        db.materialise("moves", "movesets")
+        self.pokemon_ids = db.pokemon_ids
+        move_bits = {move.id: 1 << damage.TYPE_INDEX[move.type.primary]
+                     for move in db.moves.values()
+                     if move.power.value > 0 and move.category.primary != "STATUS" and move.type.primary in damage.TYPE_INDEX}
+
+        pkmn_ids, levels, bits = [], [], []
+        for pkmn in db.pokemon_by_id:
+            if not pkmn.moveset:
+                continue
+            for level, move_id in zip(pkmn.moveset.levels, pkmn.moveset.move_ids):
+                if move_id in move_bits:
+                    pkmn_ids.append(pkmn.id)
+                    levels.append(level)
+                    bits.append(move_bits[move_id])
+
+        self.masks = numpy.zeros((len(db.pokemon_by_id), MAX_LEVEL + 1), dtype=numpy.uint32)
+        numpy.bitwise_or.at(self.masks, (numpy.array(pkmn_ids, dtype=numpy.intp), numpy.clip(numpy.array(levels, dtype=numpy.intp), 0, MAX_LEVEL)),
+                            numpy.array(bits, dtype=numpy.uint32))
+        self.masks = numpy.bitwise_or.accumulate(self.masks, axis=1)
+
+    def maskOf(self, pkmn_name, level) -> int:
+        pkmn_id = self.pokemon_ids.get(pkmn_name)
+        return 0 if pkmn_id is None else int(self.masks[pkmn_id, min(max(level, 0), MAX_LEVEL)])
+
+    def teamMask(self, pkmn_names, level) -> int:
+        mask = 0
+        for pkmn_name in pkmn_names:
+            mask |= self.maskOf(pkmn_name, level)
+        return mask
+
+    def teamCoverage(self, pkmn_names, level) -> Tuple[int, int]:
+        """(types the team hits super effectively, types the team can only hit not very effectively (or not at all))."""
+        team_mask = self.teamMask(pkmn_names, level)
+        return int(SUPER_EFFECTIVE[team_mask]), ALL_TYPES_MASK & ~int(NEUTRAL_OR_BETTER[team_mask])
+
+    def gapCovers(self, pkmn_names, level, count=5) -> List[Tuple[str, List[str]]]:
+        """The pokemon that would add the most super effective coverage to the team,
+        with the types they'd add (best first).
+        """
+        super_effective, _ = self.teamCoverage(pkmn_names, level)
+        gaps = numpy.uint32(ALL_TYPES_MASK & ~super_effective)
+        added = SUPER_EFFECTIVE[self.masks[:, min(max(level, 0), MAX_LEVEL)]] & gaps
+        added_counts = POPCOUNT[added]
+        for pkmn_name in pkmn_names:
+            pkmn_id = self.pokemon_ids.get(pkmn_name)
+            if pkmn_id is not None:
+                added_counts[pkmn_id] = 0
+        count = min(count, int(numpy.count_nonzero(added_counts)))
+        if count <= 0:
+            return []
+        top = numpy.argpartition(-added_counts.astype(numpy.int64), count - 1)[:count]
+        top = top[numpy.argsort(-added_counts[top].astype(numpy.int64), kind="stable")]
+        return [(self.pokemon_ids.name(int(i)), maskTypes(int(added[i]))) for i in top]
+
+def forDatabase(db : database.Database) -> OffensiveCoverage:
+    """The (cached) coverage masks of a database, rebuilt if it changed since."""
+    return db.cached(OffensiveCoverage)
@@ -1,3 +1,5 @@
+from src.custom_elements.damage_matrix_element import DamageMatrixElement
+from src.custom_elements.item_element import ItemElement
 from src.custom_elements.location_element import LocationElement
 from src.custom_elements.summary_element import SummaryElement
 from src.custom_elements.move_element import MoveElement
@@ -5,4 +7,5 @@ from src.custom_elements.searchable_list_box import SearchableListBox
 from src.custom_elements.team_analysis_element import TeamAnalysisElement
 from src.custom_elements.team_display_element import TeamDisplayElement
 from src.custom_elements.theme_change_element import ThemeChangeElement
+from src.custom_elements.trainer_element import TrainerElement
 from src.custom_elements.window_element import WindowElement
@@ -0,0 +1,55 @@
+import typing
+import uuid
+
+import PySimpleGUI as gui
+
+from src import damage, database
+from src.element import Element
+from src.custom_elements.team_display_element import TeamDisplayElement
+
+class DamageMatrixElement(Element):
+    """Best damage of each team member against everything found at a location."""
+    DEFAULT_LEVEL = 20
+
+    def __init__(self, team_elements : typing.List[TeamDisplayElement]):
+        self.uuid = uuid.uuid4().hex
+        self.team_elements = team_elements
+
+        self.location_combo = gui.Combo([], key=f"damage_matrix_element_location_{self.uuid}_callback_available", size=(25,1), readonly=True, enable_events=True, metadata=self.update)
+        self.level_input = gui.Input(str(self.DEFAULT_LEVEL), key=f"damage_matrix_element_level_{self.uuid}", size=(4,1))
+        self.calculate_button = gui.Button("Calculate", key=f"damage_matrix_element_calculate_{self.uuid}_callback_available", metadata=self.update)
+        self.team_text = gui.Text("", key=f"damage_matrix_element_team_{self.uuid}", size=(70,1), font="Consolas 10")
+        headings = ["Wild Pokemon", "Lv", *[f"#{element.index + 1}" for element in self.team_elements]]
+        self.table = gui.Table([], headings=headings, key=f"damage_matrix_element_table_{self.uuid}", num_rows=12,
+                               auto_size_columns=False, col_widths=[14, 3, *[16] * len(self.team_elements)], font="Consolas 9", justification="left")
+
+    def updateLocations(self):
+        location_names = sorted(database.instance.locations)
+        current = self.location_combo.get()
+        self.location_combo.update(values=location_names, value=current if current in location_names else "")
+        self.update()
+
+    def update(self, obj=None):
+        location_name = self.location_combo.get()
+        level_str = self.level_input.get().strip()
+        level = int(level_str) if level_str.isdigit() else self.DEFAULT_LEVEL
+        members = [element.current_pokemon for element in self.team_elements]
+        team = [pkmn for pkmn in members if pkmn is not None]
+        self.team_text.update("  ".join(f"#{i + 1} {pkmn.name}" for i, pkmn in enumerate(members) if pkmn is not None))
+        if not location_name or location_name not in database.instance.locations:
+            self.table.update(values=[])
+            return
+
+        matrix = damage.teamVsLocation(database.instance, team, level, location_name)
+        # Matrix columns only exist for filled slots; empty slots get blank columns
+        rows = []
+        for row in matrix.rows():
+            cells = iter(row[2:])
+            rows.append([*row[:2], *[next(cells) if pkmn is not None else "" for pkmn in members]])
+        self.table.update(values=rows)
+
+    def layout(self):
+        return [ [gui.Text("Damage vs:"), self.location_combo, gui.Text("Team Lv:"), self.level_input, self.calculate_button],
+                 [self.team_text],
+                 [self.table],
+               ]
@@ -0,0 +1,39 @@
+import uuid
+
+import PySimpleGUI as gui
+
+from src import database, element, pokemon
+
+class ItemElement(element.Element):
+    def __init__(self):
+        self.uuid = uuid.uuid4().hex
+        self.title = gui.Text(f"", key=f"item_element_title_{self.uuid}", size=(20, 1), font="Impact 20")
+        self.holders_title_text = gui.Text(f"", key=f"item_element_holders_title_{self.uuid}", size=(10,1), font="Arial 14")
+        self.holders_rows = []
+        for i in range(25):
+            # One text for the pokemon name (which is clickable!), and one for the occurrence rate
+            self.holders_rows.append((gui.Text(f"", key=f"item_element_holder_name_{i}_{self.uuid}", size=(20,1), font="Consolas 10", enable_events=True),
+                                      gui.Text(f"", key=f"item_element_holder_rate_{i}_{self.uuid}", size=(7,1), font="Consolas 10")))
+        self.holders_overflow_text = gui.Text(f"", key=f"item_element_holders_overflow_{self.uuid}", size=(30,1), font="Consolas 10")
+
+    def update(self, item : pokemon.Item):
+        self.title.update(f"{item.name}")
+        holders = database.instance.holdersOf(item.name)
+        self.holders_title_text.update("Held By:")
+        for i, (name_elem, rate_elem) in enumerate(self.holders_rows):
+            if i < len(holders):
+                pkmn_name, rate = holders[i]
+                name_elem.update(pkmn_name)
+                rate_elem.update(rate)
+            else:
+                name_elem.update("")
+                rate_elem.update("")
+        overflow = len(holders) - len(self.holders_rows)
+        self.holders_overflow_text.update(f"... and {overflow} more" if overflow > 0 else "")
+
+    def layout(self):
+        return  [ [self.title],
+                  [self.holders_title_text],
+                  *[[x, y] for x, y in self.holders_rows],
+                  [self.holders_overflow_text],
+                ]
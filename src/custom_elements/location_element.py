@@ -3,7 +3,7 @@ import uuid
 
 import PySimpleGUI as gui
 
-from src import element, pokemon
+from src import database, element, pokemon
 
 
 class SublocationDisplayElement(element.Element):
@@ -14,7 +14,7 @@ class SublocationDisplayElement(element.Element):
 
     def update(self, sublocation : pokemon.Sublocation):
         self.set_num_element.update(sublocation.set_num)
-        wo_texts = [f"{wo.pkmn_name} {wo.condensedLevelStr()}" for wo in sublocation.wild_occurrences]
+        wo_texts = [f"{database.instance.pokemon_ids.name(wo.pkmn_id)} {wo.condensedLevelStr()}" for wo in sublocation.wild_occurrences]
         self.wild_occurrences_element.update(" | ".join(wo_texts))
 
     def clear(self):
@@ -28,6 +28,7 @@ class LocationElement(element.Element):
     def __init__(self):
         self.uuid = uuid.uuid4().hex
         self.title = gui.Text(f"", key=f"location_element_title_{self.uuid}", size=(25, 1), font="Impact 20")
+        self.summary_text = gui.Text(f"", key=f"location_element_summary_{self.uuid}", size=(40, 1), font="Consolas 10")
         self.tab_elements : Mapping[str, List[SublocationDisplayElement]] = {}
         self.tabs : Mapping[str, gui.Tab] = {}
         for classification in pokemon.Sublocation.classifications():
@@ -36,6 +37,9 @@ class LocationElement(element.Element):
 
     def update(self, location : pokemon.Location):
         self.title.update(f"{location.name}")
+        level_range = database.instance.levelRangeAt(location.name)
+        level_str = f", Lv {level_range[0]}-{level_range[1]}" if level_range else ""
+        self.summary_text.update(f"{len(database.instance.pokemonAt(location.name))} pokemon{level_str}")
         self.set_tab_visibility({sl.classification for sl in location.sublocations})
         iter_mapping = self.tab_element_iterators()
         for sl in sorted(location.sublocations):
@@ -68,5 +72,6 @@ class LocationElement(element.Element):
 
     def layout(self):
         return  [ [self.title],
+                  [self.summary_text],
                   [gui.TabGroup([[*self.tabs.values()]])]
                 ]
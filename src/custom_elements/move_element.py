@@ -1,7 +1,7 @@
 import PySimpleGUI as gui
 import uuid
 
-from src import element, pokemon
+from src import database, element, pokemon
 
 class MoveElement(element.Element):
     def __init__(self):
@@ -9,14 +9,25 @@ class MoveElement(element.Element):
         self.title = gui.Text(f"", key=f"move_element_title_{self.uuid}", size=(13, 1), font="Impact 20")
         self.type_button = pokemon.Type.createButton(f"move_element_type_{self.uuid}")
         self.category_button = pokemon.Type.createButton(f"move_element_category_{self.uuid}")
+        self.machine_text = gui.Text(f"", key=f"move_element_machine_{self.uuid}", size=(12, 1), font="Impact 14")
         self.attribute_rows = {}
         for attr_name in pokemon.Move.ALL_ATTR_NAMES:
             self.attribute_rows[attr_name] = [gui.Text("", key=f"move_element_attribute_name_{attr_name}_{self.uuid}", size=(12, 1)), gui.Text("", size=(3, 1)), pokemon.Stats.Attribute.createGraph(f"move_element_attribute_bar_{attr_name}_{self.uuid}")]
+        # Learners
+        self.learners_title_text = gui.Text(f"", key=f"move_element_learners_title_{self.uuid}", size=(12,1), font="Arial 14")
+        self.learners_rows = []
+        for i in range(20):
+            # One text for the level ("Level 50 - "), and one for the pokemon name (which is clickable!)
+            self.learners_rows.append((gui.Text(f"", key=f"move_element_learner_level_{i}_{self.uuid}", size=(10,1), font="Consolas 10"),
+                                       gui.Text(f"", key=f"move_element_learner_name_{i}_{self.uuid}", size=(20,1), font="Consolas 10", enable_events=True)))
+        self.learners_overflow_text = gui.Text(f"", key=f"move_element_learners_overflow_{self.uuid}", size=(30,1), font="Consolas 10")
+        self.tm_learners_text = gui.Text(f"", key=f"move_element_tm_learners_{self.uuid}", size=(35,1), font="Consolas 10")
 
     def update(self, move : pokemon.Move):
         self.title.update(f"{move.name}")
         move.type.updateButtons(self.type_button)
         move.category.updateButtons(self.category_button)
+        self.machine_text.update(" / ".join(database.instance.machines.machinesOf(move.name)))
 
         for attr_name in pokemon.Move.ALL_ATTR_NAMES:
             aname, avalue, agraph = self.attribute_rows[attr_name]
@@ -25,7 +36,27 @@ class MoveElement(element.Element):
             avalue.update(attribute.value)
             attribute.drawOn(agraph)
 
+        # Learners
+        learners = database.instance.learnersOf(move.name)
+        self.learners_title_text.update("Learned By:")
+        for i, (level_elem, name_elem) in enumerate(self.learners_rows):
+            if i < len(learners):
+                pkmn_name, level = learners[i]
+                level_elem.update(f"Level{level: >3} -")
+                name_elem.update(pkmn_name)
+            else:
+                level_elem.update("")
+                name_elem.update("")
+        overflow = len(learners) - len(self.learners_rows)
+        self.learners_overflow_text.update(f"... and {overflow} more" if overflow > 0 else "")
+        tm_learner_count = len(database.instance.machines.learnersOf(move.name))
+        self.tm_learners_text.update(f"Learnable by TM/HM: {tm_learner_count} pokemon" if tm_learner_count else "")
+
     def layout(self):
-        return  [ [self.title, self.type_button, self.category_button],
-                  *self.attribute_rows.values()
+        return  [ [self.title, self.type_button, self.category_button, self.machine_text],
+                  *self.attribute_rows.values(),
+                  [self.learners_title_text],
+                  *[[x, y] for x, y in self.learners_rows],
+                  [self.learners_overflow_text],
+                  [self.tm_learners_text],
                 ]
@@ -4,6 +4,7 @@ import uuid
 
 import PySimpleGUI as gui
 
+from src import idle, query
 from src.element import Element
 
 T = TypeVar('T')
@@ -18,15 +19,29 @@ class SearchableListBox(Element):
         self.button = gui.Button("Search", key=f"SearchableListBox_Button_{self.uuid}_callback_available", size=(8, 1), font="Arial 16", metadata=self.onSearchButton)
         self.sort_buttons = []
         self.filter_buttons = []
+        # Last sort picked, kept by filters and queries
+        self.sort_lambda = None
+        # fn(query text) -> matching names (see registerQuery)
+        self.query_fn = None
 
     def onSearchButton(self):
         snippet = self.input_text.get()
+        # Anything with a field in it (e.g. "type:fire spd>90") is a query rather than a name
+        if self.query_fn is not None and query.isQuery(snippet) and snippet not in self.original_data:
+            try:
+                matching_names = set(self.query_fn(snippet))
+            except query.QueryError as e:
+                gui.popup_error(f"Bad query: {e}")
+                return
+            self.applyFilter(lambda name: name in matching_names)
+            return
         [closest_match] = difflib.get_close_matches(snippet, self.list_box.Values, n=1, cutoff=0) or [None]
         if closest_match is None:
             return
         assert closest_match in self.original_data, f"{closest_match} not found in data passed to slb-{self.uuid}"
         self.setSelection(closest_match)
         self.update(self.original_data[closest_match])
+        self.prepareNeighbours(closest_match)
 
     def onListSelection(self):
         [selected] = self.currentlySelected()
@@ -34,6 +49,20 @@ class SearchableListBox(Element):
             return
         assert selected in self.original_data, f"{selected} not found in data passed to slb-{self.uuid}"
         self.update(self.original_data[selected])
+        self.prepareNeighbours(selected)
+
+    def prepareNeighbours(self, name, distance=3):
+        """Has the element prepare the entries around 'name' (the likeliest to be picked next) while idle."""
+        names = self.list_box.get_list_values()
+        index = names.index(name) if name in names else 0
+        # Nearest first, alternating below and above
+        neighbours = [names[index + offset] for step in range(1, distance + 1) for offset in (step, -step) if 0 <= index + offset < len(names)]
+        def job():
+            for neighbour in neighbours:
+                if neighbour in self.original_data:
+                    self.element.prepare(self.original_data[neighbour])
+                yield
+        idle.instance.add(f"SearchableListBox_Prepare_{self.uuid}", job())
 
     def populate(self, data : Mapping[str, T]):
         self.original_data = data
@@ -57,6 +86,7 @@ class SearchableListBox(Element):
         key = f"SearchableListBox_SortButton_{len(self.sort_buttons)}_{self.uuid}_callback_available"
         def createSortLambda(sort_lambda):
             def sort():
+                self.sort_lambda = sort_lambda
                 self.list_box.update(sorted(self.list_box.Values, key=sort_lambda))
             return sort
 
@@ -64,10 +94,20 @@ class SearchableListBox(Element):
         self.sort_buttons.append(button)
         return button
 
+    def applyFilter(self, filter_lambda):
+        names = list(filter(filter_lambda, list(self.original_data.keys())))
+        if self.sort_lambda is not None:
+            names.sort(key=self.sort_lambda)
+        self.list_box.update(names)
+
+    def registerQuery(self, query_fn):
+        """Lets the search box take queries (see src.query): query_fn(text) returns the matching names."""
+        self.query_fn = query_fn
+
     def registerFilter(self, name, filter_lambda):
         def createFilterLambda(filter_lambda):
             def filt():
-                self.list_box.update(list(filter(filter_lambda, list(self.original_data.keys()))))
+                self.applyFilter(filter_lambda)
             return filt
 
         if len(self.filter_buttons) == 0:
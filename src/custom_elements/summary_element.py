@@ -1,14 +1,19 @@
 import uuid
+from   typing import List, Mapping, Tuple
 
 import PySimpleGUI as gui
 
-from src import pokemon
+from src import database, pokemon, similarity
 from src.element import Element
 from src.external.parsers import getGroups
 
 class SummaryElement(Element):
+    SIMILAR_METRICS = {"Stats": similarity.StatSimilarity.EUCLIDEAN, "Stat Spread": similarity.StatSimilarity.COSINE}
+    SIMILAR_TYPE_CONSTRAINTS = {"Any Type": None, "Same Type": True, "Different Type": False}
+
     def __init__(self):
         self.uuid = uuid.uuid4().hex
+        self.current_pokemon = None
         # Header
         self.title = gui.Text(f"", key=f"summary_element_title_{self.uuid}", size=(13, 1), font="Impact 20")
         self.primary_type_button = pokemon.Type.createButton(f"summary_element_type_primary_{self.uuid}")
@@ -39,8 +44,18 @@ class SummaryElement(Element):
             # One text for the location (which is clickable!), and one for the levels
             self.wild_occurrence_rows.append((gui.Text(f"", key=f"summary_element_wild_occurrence_location_{i}_{self.uuid}", size=(30,1), font="Consolas 10", enable_events=True),
                                                gui.Text(f"", key=f"summary_element_wild_occurrence_levels_{i}_{self.uuid}", size=(20,1), font="Consolas 10")))
+        # Similar Pokemon
+        self.similar_title_text = gui.Text(f"", key=f"summary_element_similar_title_{self.uuid}", size=(8,1), font="Arial 14")
+        self.similar_metric_combo = gui.Combo(list(self.SIMILAR_METRICS), default_value="Stats", key=f"summary_element_similar_metric_{self.uuid}_callback_available", readonly=True, enable_events=True, metadata=self.updateSimilar)
+        self.similar_type_combo = gui.Combo(list(self.SIMILAR_TYPE_CONSTRAINTS), default_value="Any Type", key=f"summary_element_similar_type_{self.uuid}_callback_available", readonly=True, enable_events=True, metadata=self.updateSimilar)
+        self.similar_rows = []
+        for i in range(5):
+            # One text for the pokemon name (which is clickable!), and one for the distance
+            self.similar_rows.append((gui.Text(f"", key=f"summary_element_similar_name_{i}_{self.uuid}", size=(20,1), font="Consolas 10", enable_events=True),
+                                      gui.Text(f"", key=f"summary_element_similar_distance_{i}_{self.uuid}", size=(6,1), font="Consolas 10")))
 
     def update(self, pkmn : pokemon.Pokemon):
+        self.current_pokemon = pkmn
         # Header
         self.title.update(f"{pkmn.name}")
         pkmn.type.updateButtons(self.primary_type_button, self.secondary_type_button)
@@ -53,23 +68,29 @@ class SummaryElement(Element):
             avalue.update(attribute.value)
             attribute.drawOn(agraph)
 
+        items, level_move_mappings, wild_occurrences = self.view(pkmn)
+        # Sections still being parsed are filled in by the window's refresh once they're ready
+        if level_move_mappings is None:
+            level_move_mappings = [("Loading...", "")]
+        if wild_occurrences is None:
+            wild_occurrences = [("", "Loading...")]
+
         # Held Items
         self.held_items_title_text.update("Held Items:")
         for i, (name_elem, rate_elem) in enumerate(self.held_items_rows):
-            if i < len(pkmn.items):
-                item_name, item_rate = getGroups(r"(.+) [(](.+)[)]", pkmn.items[i].strip())
+            if i < len(items):
+                item_name, item_rate = items[i]
                 name_elem.update(item_name)
                 rate_elem.update(item_rate)
             else:
                 name_elem.update("")
                 rate_elem.update("")
 
-        # Moveset
         self.moveset_title_text.update("Moveset:")
         for i in range(len(self.moveset_rows)):
-            if i < len(pkmn.moveset.level_move_mappings):
-                level, move_name = pkmn.moveset.level_move_mappings[i]
-                self.moveset_rows[i][0].update(f"Level{level: >3} -")
+            if i < len(level_move_mappings):
+                level_str, move_name = level_move_mappings[i]
+                self.moveset_rows[i][0].update(level_str)
                 self.moveset_rows[i][1].update(f"{move_name}")
             else:
                 self.moveset_rows[i][0].update("")
@@ -78,14 +99,69 @@ class SummaryElement(Element):
         # Wild Occurrences
         self.wild_occurrence_title_text.update("Locations:")
         for i in range(len(self.wild_occurrence_rows)):
-            if i < len(pkmn.wild_occurrences):
-                wo = pkmn.wild_occurrences[i]
-                self.wild_occurrence_rows[i][0].update(wo.displayName())
-                self.wild_occurrence_rows[i][1].update(wo.condensedLevelStr())
+            if i < len(wild_occurrences):
+                location_name, levels_str = wild_occurrences[i]
+                self.wild_occurrence_rows[i][0].update(location_name)
+                self.wild_occurrence_rows[i][1].update(levels_str)
             else:
                 self.wild_occurrence_rows[i][0].update("")
                 self.wild_occurrence_rows[i][1].update("")
 
+        # Similar Pokemon
+        self.updateSimilar()
+
+    def updateSimilar(self):
+        if self.current_pokemon is None:
+            return
+        self.similar_title_text.update("Similar:")
+        similar = self.similar(self.current_pokemon)
+        for i, (name_elem, distance_elem) in enumerate(self.similar_rows):
+            if i < len(similar):
+                pkmn_name, distance = similar[i]
+                name_elem.update(pkmn_name)
+                distance_elem.update(f"{distance:.2f}")
+            else:
+                name_elem.update("")
+                distance_elem.update("")
+
+    def prepare(self, pkmn : pokemon.Pokemon):
+        # Half a view isn't cached, and the GUI thread shouldn't contend with the
+        # background parse for the database; the app re-queues this once it's done.
+        if database.instance.pending():
+            return
+        self.view(pkmn)
+        self.similar(pkmn)
+
+    def _views(self) -> Mapping:
+        """This database's cached views (see view), emptied whenever it changes."""
+        return database.instance.cached("summary_views", lambda db: {})
+
+    def view(self, pkmn : pokemon.Pokemon) -> Tuple[List, List, List]:
+        """(held items, moveset rows, location rows) of a pokemon, as the strings update() shows.
+
+        Never waits for a deferred section: the rows of one that's still pending
+        are None (and the view isn't cached until every part of it is there).
+        """
+        views = self._views()
+        if pkmn.name in views:
+            return views[pkmn.name]
+        pending = database.instance.pending()
+        view = ([getGroups(r"(.+) [(](.+)[)]", item.strip()) for item in pkmn.items],
+                None if "movesets" in pending else [(f"Level{level: >3} -", move_name) for level, move_name in (pkmn.moveset.level_move_mappings if pkmn.moveset else [])],
+                None if "encounters" in pending else [(wo.displayName(), wo.condensedLevelStr()) for wo in pkmn.wild_occurrences])
+        if None not in view:
+            views[pkmn.name] = view
+        return view
+
+    def similar(self, pkmn : pokemon.Pokemon) -> List[Tuple[str, float]]:
+        """Nearest pokemon by the currently picked metric and type constraint."""
+        metric = self.SIMILAR_METRICS[self.similar_metric_combo.get()]
+        shares_type = self.SIMILAR_TYPE_CONSTRAINTS[self.similar_type_combo.get()]
+        views = self._views()
+        key = (pkmn.name, metric, shares_type)
+        if key not in views:
+            views[key] = similarity.forDatabase(database.instance).nearest(pkmn.name, k=len(self.similar_rows), metric=metric, shares_type=shares_type)
+        return views[key]
 
     def layout(self):
         summary_column = gui.Column([ [self.title, self.primary_type_button, self.secondary_type_button] ,
@@ -100,6 +176,9 @@ class SummaryElement(Element):
         wild_occurrence_column = gui.Column([ [self.wild_occurrence_title_text],
                                               *[[x, y] for x, y in self.wild_occurrence_rows],
                                             ])
-        return  [ [summary_column, held_items_column],
+        similar_column = gui.Column([ [self.similar_title_text, self.similar_metric_combo, self.similar_type_combo],
+                                      *[[x, y] for x, y in self.similar_rows],
+                                    ])
+        return  [ [summary_column, held_items_column, similar_column],
                   [moveset_column, wild_occurrence_column],
                 ]
@@ -4,12 +4,14 @@ import uuid
 
 import PySimpleGUI as gui
 
-from src import pokemon, types
+from src import coverage, database, idle, pokemon, types
 from src.element import Element
 from src.custom_elements.team_display_element import TeamDisplayElement
 from src.external import utils
 
 class TeamAnalysisElement(Element):
+    DEFAULT_COVERAGE_LEVEL = 100
+
     def __init__(self, team_elements : typing.List[TeamDisplayElement]):
         self.uuid = uuid.uuid4().hex
         self.team_elements = team_elements
@@ -57,6 +59,21 @@ to that type will remove the type from the "Missing" list.
         self.team_resistance_type_buttons = [pokemon.Type.createButton(f"team_analysis_element_resistance_button_{i}_{self.uuid}") for i in range(len(types.all_types))]
         self.team_missing_type_buttons = [pokemon.Type.createButton(f"team_analysis_element_missing_button_{i}_{self.uuid}") for i in range(len(types.all_types))]
 
+        # Offensive coverage (from the damaging moves each member has learned by the coverage level)
+        cex = """\
+"Super Effective" lists the types that at least one move learned by your team (by the given level)
+hits super effectively.
+
+"Not Very Effective" lists the types that none of those moves hit for at least normal damage.
+
+"Gap Covers" are the Pokemon whose moves would add the most types to your "Super Effective" list.
+"""
+        self.coverage_explanation_button = gui.Button("?", key=f"explanation_button_coverage_{self.uuid}", size=(2,1), metadata=cex)
+        self.coverage_level_input = gui.Input(str(self.DEFAULT_COVERAGE_LEVEL), key=f"team_analysis_element_coverage_level_{self.uuid}_callback_available", size=(4,1), enable_events=True, metadata=self.update)
+        self.team_super_effective_type_buttons = [pokemon.Type.createButton(f"team_analysis_element_super_effective_button_{i}_{self.uuid}") for i in range(len(types.all_types))]
+        self.team_not_very_effective_type_buttons = [pokemon.Type.createButton(f"team_analysis_element_not_very_effective_button_{i}_{self.uuid}") for i in range(len(types.all_types))]
+        self.gap_cover_rows = [gui.Text("", key=f"team_analysis_element_gap_cover_{i}_{self.uuid}", size=(40,1), font="Consolas 10") for i in range(5)]
+
 
     def update(self):
         team_pkmn = [element.current_pokemon for element in self.team_elements if element.current_pokemon is not None]
@@ -85,11 +102,45 @@ to that type will remove the type from the "Missing" list.
             pokemon.Type.updateButton(self.team_resistance_type_buttons[i], next(r_iter, None), subsample=subsample)
             pokemon.Type.updateButton(self.team_missing_type_buttons[i], next(m_iter, None), subsample=subsample)
 
+        self.updateCoverage(team_pkmn)
+
+    def updateCoverage(self, team_pkmn : typing.List[pokemon.Pokemon]):
+        level_str = self.coverage_level_input.get().strip()
+        level = int(level_str) if level_str.isdigit() else self.DEFAULT_COVERAGE_LEVEL
+        team_names = [pkmn.name for pkmn in team_pkmn]
+        # An empty team covers nothing, so don't build (and parse the moves for) the masks for it
+        team_coverage = coverage.forDatabase(database.instance) if team_pkmn else None
+        super_effective, not_very_effective = team_coverage.teamCoverage(team_names, level) if team_pkmn else (0, 0)
+        se_iter = iter(coverage.maskTypes(super_effective))
+        nve_iter = iter(coverage.maskTypes(not_very_effective) if team_pkmn else [])
+        for i in range(len(types.all_types)):
+            pokemon.Type.updateButton(self.team_super_effective_type_buttons[i], next(se_iter, None), subsample=6)
+            pokemon.Type.updateButton(self.team_not_very_effective_type_buttons[i], next(nve_iter, None), subsample=6)
+
+        # Suggestions scan the whole dex, so they're worked out once the team stops changing
+        for row in self.gap_cover_rows:
+            row.update("")
+        if team_pkmn:
+            idle.instance.add(f"team_analysis_gap_covers_{self.uuid}", self.suggestGapCovers(team_coverage, team_names, level))
+        else:
+            idle.instance.cancel(f"team_analysis_gap_covers_{self.uuid}")
+
+    def suggestGapCovers(self, team_coverage : coverage.OffensiveCoverage, team_names, level):
+        yield
+        gap_covers = team_coverage.gapCovers(team_names, level, count=len(self.gap_cover_rows))
+        for row, (pkmn_name, added_types) in zip(self.gap_cover_rows, gap_covers):
+            row.update(f"{pkmn_name} (+{len(added_types)}: {', '.join(added_types)})")
+
     def layout(self):
         return [ [gui.Column([[gui.Text("Weaknesses:", size=(10,1)), self.weakness_explanation_button],   *[[x] for x in self.team_weakness_type_buttons]]),
                   gui.Column([[gui.Text("Resistances:", size=(10,1)), self.resistance_explanation_button], *[[x] for x in self.team_resistance_type_buttons]]),
-                  gui.Column([[gui.Text("Missing:", size=(10,1)), self.missing_explanation_button],   *[[x] for x in self.team_missing_type_buttons]])
+                  gui.Column([[gui.Text("Missing:", size=(10,1)), self.missing_explanation_button],   *[[x] for x in self.team_missing_type_buttons]]),
+                  gui.Column([[gui.Text("Super Effective:", size=(13,1)), self.coverage_explanation_button],   *[[x] for x in self.team_super_effective_type_buttons]]),
+                  gui.Column([[gui.Text("Not Very Effective:", size=(16,1))],   *[[x] for x in self.team_not_very_effective_type_buttons]]),
                  ],
+                 [gui.Text("Coverage by Lv:"), self.coverage_level_input],
+                 [gui.Text("Gap Covers:")],
+                 *[[x] for x in self.gap_cover_rows],
                ]
         #return  [ [gui.Text("Team Weaknesses:"),     gui.Column([*halve(self.team_weakness_type_buttons)])],
         #          [gui.Text("Team Resistances:"),    gui.Column([*halve(self.team_resistance_type_buttons)])],
@@ -0,0 +1,36 @@
+import uuid
+
+import PySimpleGUI as gui
+
+from src import database, element
+
+class TrainerElement(element.Element):
+    def __init__(self):
+        self.uuid = uuid.uuid4().hex
+        self.title = gui.Text(f"", key=f"trainer_element_title_{self.uuid}", size=(25, 1), font="Impact 20")
+        self.team_title_text = gui.Text(f"", key=f"trainer_element_team_title_{self.uuid}", size=(10,1), font="Arial 14")
+        self.team_rows = []
+        for i in range(6):
+            # One text for the pokemon name (which is clickable!), and one for its level
+            self.team_rows.append((gui.Text(f"", key=f"trainer_element_pokemon_name_{i}_{self.uuid}", size=(20,1), font="Consolas 10", enable_events=True),
+                                   gui.Text(f"", key=f"trainer_element_pokemon_level_{i}_{self.uuid}", size=(7,1), font="Consolas 10")))
+
+    def update(self, trainer_index : int):
+        trainers = database.instance.trainers
+        self.title.update(trainers.displayName(trainer_index))
+        team = trainers.team(trainer_index)
+        self.team_title_text.update("Team:")
+        for i, (name_elem, level_elem) in enumerate(self.team_rows):
+            if i < len(team):
+                pkmn_id, level = team[i]
+                name_elem.update(database.instance.pokemon_ids.name(pkmn_id) if pkmn_id >= 0 else "???")
+                level_elem.update(f"Lv {level}")
+            else:
+                name_elem.update("")
+                level_elem.update("")
+
+    def layout(self):
+        return  [ [self.title],
+                  [self.team_title_text],
+                  *[[x, y] for x, y in self.team_rows],
+                ]
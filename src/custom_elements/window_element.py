@@ -2,9 +2,9 @@ import uuid
 
 import PySimpleGUI as gui
 
-from src import database, pokemon, types
+from src import database, pokemon, query, server, types
 from src.element import Element
-from src.custom_elements import SummaryElement, MoveElement, LocationElement, SearchableListBox, TeamAnalysisElement, TeamDisplayElement, ThemeChangeElement
+from src.custom_elements import DamageMatrixElement, SummaryElement, MoveElement, ItemElement, LocationElement, SearchableListBox, TeamAnalysisElement, TeamDisplayElement, ThemeChangeElement, TrainerElement
 
 # TODO: Move sorts/filters?
 def sortByNum(pkmn_name):
@@ -54,15 +54,28 @@ def filterMoveByType(expected_type):
         return expected_type in (move.type.primary, move.type.secondary)
     return innerFilter
 
+def filterMoveByMachine(move_name):
+    return move_name in database.instance.machines.machines_by_move
+
+def queryPokemon(text):
+    return query.matchingPokemon(database.instance, text)
+
+def queryMoves(text):
+    return query.matchingMoves(database.instance, text)
 
 class WindowElement(Element):
     def __init__(self):
         # Home
         self.file_ingested = False
         self.ingest_button = gui.Button("Ingest", key="button_ingest")
+        # Every log loaded this session (most recent first); picking one makes it the active database
+        self.loaded_logs_combo = gui.Combo([], key="combo_loaded_logs", size=(60, 1), readonly=True, enable_events=True)
+        self.watch_checkbox = gui.Checkbox("Watch", key="checkbox_watch", default=False, enable_events=True, tooltip="Re-ingest the log whenever it changes on disk")
+        self.serve_checkbox = gui.Checkbox("Serve JSON", key="checkbox_serve", default=False, enable_events=True, tooltip=f"Serve the loaded log as JSON on http://127.0.0.1:{server.DEFAULT_PORT}/")
         self.home_tab = gui.Tab("Home", [ [gui.InputText(key="input_text_file", default_text=database.default_source_location), gui.FileBrowse(button_text="Browse For Log File")] ,
-                                          [self.ingest_button, gui.Text(self.file_ingested, key="text_ingested_boolean"), gui.Text("Version:"), gui.Text("", size=(15,1), key="text_ingested_version")],
-                                          [gui.Button("Stat Averages", key="stat_averages"), gui.Button("Close"), gui.Button("???")],
+                                          [self.ingest_button, self.watch_checkbox, self.serve_checkbox, gui.Text(self.file_ingested, key="text_ingested_boolean"), gui.Text("Version:"), gui.Text("", size=(15,1), key="text_ingested_version")],
+                                          [gui.Text("Loaded:"), self.loaded_logs_combo],
+                                          [gui.Button("Stat Averages", key="stat_averages"), gui.Button("Diff Seeds", key="diff_seeds"), gui.Button("Close"), gui.Button("???")],
                                         ])
 
         # Summary
@@ -76,9 +89,15 @@ class WindowElement(Element):
 
         for type_name in types.all_types:
             self.summary_slb.registerFilter(type_name, filterByType(type_name))
+        self.summary_slb.registerQuery(queryPokemon)
+
+        self.catch_level_input = gui.InputText("", key="summary_catch_level_input", size=(4, 1))
+        self.catch_classification_combo = gui.Combo(["All", *pokemon.Sublocation.classifications()], default_value="All", key="summary_catch_classification_combo", readonly=True)
+        self.catch_filter_button = gui.Button("Filter Catchable", key="summary_catch_filter_button_callback_available", metadata=self.filterByCatchLevel)
 
         self.display_tab = gui.Tab("Summary", [ [gui.Column(self.summary_slb.element.layout()), gui.Column([ *self.summary_slb.layout(),
                                                                                                                      [self.summary_add_to_team_builder_button],
+                                                                                                                     [gui.Text("Catchable by Lv:"), self.catch_level_input, self.catch_classification_combo, self.catch_filter_button],
                                                                                                                     ], justification="left")],
                                               ])
 
@@ -90,7 +109,18 @@ class WindowElement(Element):
             self.move_slb.registerFilter(category, filterMoveByCategory(category))
         for type_name in types.all_types:
             self.move_slb.registerFilter(type_name, filterMoveByType(type_name))
-        self.moves_tab = gui.Tab("Moves", [ [gui.Column(self.move_slb.element.layout()), gui.Sizer(350, 0), gui.Column(self.move_slb.layout(), justification="left")],
+        self.move_slb.registerFilter("machine", filterMoveByMachine)
+        self.move_slb.registerQuery(queryMoves)
+        self.move_learnable_input = gui.InputText("", key="move_learnable_input", size=(15, 1))
+        self.move_learnable_button = gui.Button("Filter TM Learnable", key="move_learnable_button_callback_available", metadata=self.filterMovesByTMLearner)
+        self.moves_tab = gui.Tab("Moves", [ [gui.Column(self.move_slb.element.layout()), gui.Sizer(350, 0), gui.Column([ *self.move_slb.layout(),
+                                                                                                                           [gui.Text("TM Learnable By:"), self.move_learnable_input, self.move_learnable_button],
+                                                                                                                          ], justification="left")],
+                                          ])
+
+        # Items
+        self.item_slb = SearchableListBox(ItemElement())
+        self.items_tab = gui.Tab("Items", [ [gui.Column(self.item_slb.element.layout()), gui.Sizer(50, 0), gui.Column(self.item_slb.layout(), justification="left")],
                                           ])
 
         # Locations
@@ -98,6 +128,16 @@ class WindowElement(Element):
         self.locations_tab = gui.Tab("Locations", [ [gui.Column(self.location_slb.element.layout()), gui.Sizer(10, 0), gui.Column(self.location_slb.layout(), justification="left")],
                                                   ])
 
+        # Trainers (parsed the first time this tab is opened; see onTabChange)
+        self.trainers_populated = False
+        self.trainer_slb = SearchableListBox(TrainerElement())
+        self.trainer_uses_input = gui.InputText("", key="trainer_uses_input", size=(15, 1))
+        self.trainer_uses_button = gui.Button("Filter Uses", key="trainer_uses_button_callback_available", metadata=self.filterTrainersByPokemon)
+        self.trainers_tab = gui.Tab("Trainers", [ [gui.Column(self.trainer_slb.element.layout()), gui.Sizer(50, 0), gui.Column([ *self.trainer_slb.layout(),
+                                                                                                                                   [gui.Text("Uses Pokemon:"), self.trainer_uses_input, self.trainer_uses_button],
+                                                                                                                                  ], justification="left")],
+                                                ])
+
         # Team Builder
         self.team_builder_elements = [TeamDisplayElement(i) for i in range(6)]
         self.team_analysis_element = TeamAnalysisElement(self.team_builder_elements)
@@ -110,7 +150,9 @@ class WindowElement(Element):
                                     ],
                                  ])
         right_column = gui.Column(self.team_analysis_element.layout())
-        self.team_builder_tab = gui.Tab("Team Builder", [ [left_column, right_column] ]
+        self.damage_matrix_element = DamageMatrixElement(self.team_builder_elements)
+        self.team_builder_tab = gui.Tab("Team Builder", [ [left_column, right_column],
+                                                          [gui.Frame("Damage Matrix", self.damage_matrix_element.layout())] ]
                                                     , element_justification="top")
 
         # Options
@@ -120,14 +162,89 @@ class WindowElement(Element):
                                               ]
                                             , element_justification="right")
 
-        self.tab_group = gui.TabGroup([[self.home_tab, self.display_tab, self.moves_tab, self.locations_tab, self.team_builder_tab, self.options_tab]]
-                                    , key=f"main_window_layout_tab_group_{uuid.uuid4().hex}"
+        self.tab_group = gui.TabGroup([[self.home_tab, self.display_tab, self.moves_tab, self.items_tab, self.locations_tab, self.trainers_tab, self.team_builder_tab, self.options_tab]]
+                                    , key=f"main_window_layout_tab_group_{uuid.uuid4().hex}_callback_available"
+                                    , enable_events=True
+                                    , metadata=self.onTabChange
                                     , font="Impact 12")
 
     def update(self, obj):
         # Do Nothing (for now?)
         pass
 
+    def filterByCatchLevel(self):
+        level_str = self.catch_level_input.get().strip()
+        max_level = int(level_str) if level_str.isdigit() else None
+        classification = self.catch_classification_combo.get()
+        classifications = None if classification in ("", "All") else [classification]
+        catchable = database.instance.catchablePokemon(max_level=max_level, classifications=classifications)
+        self.summary_slb.applyFilter(lambda pkmn_name: pkmn_name in catchable)
+
+    def filterMovesByTMLearner(self):
+        pkmn_name = self.move_learnable_input.get().strip()
+        if not pkmn_name:
+            self.move_slb.applyFilter(lambda x: x)
+            return
+        # One bit test per move, against its precomputed learners mask
+        pkmn_id = database.instance.pokemon_ids.get(pkmn_name)
+        self.move_slb.applyFilter(lambda move_name: database.instance.machines.canLearn(move_name, pkmn_id))
+
+    def onTabChange(self):
+        if self.tab_group.Get() == "Trainers" and not self.trainers_populated:
+            self.trainer_slb.populate({database.instance.trainers.displayName(i): i for i in range(len(database.instance.trainers))})
+            self.trainers_populated = True
+
+    def resetTrainers(self):
+        """Drops the trainers list, re-populating it now only if it's on display."""
+        self.trainers_populated = False
+        self.onTabChange()
+
+    def filterTrainersByPokemon(self):
+        pkmn_name = self.trainer_uses_input.get().strip()
+        self.onTabChange()
+        if not pkmn_name:
+            self.trainer_slb.applyFilter(lambda x: x)
+            return
+        users = set(database.instance.trainersUsing(pkmn_name))
+        self.trainer_slb.applyFilter(lambda trainer_name: trainer_name in users)
+
+    def updateLoadedLogs(self, keys, active_key):
+        self.loaded_logs_combo.update(values=keys, value=active_key)
+
+    def refresh(self, changed_sections):
+        """Re-populates only the parts of the window affected by re-ingested log sections."""
+        if "pokemon" in changed_sections or "movesets" in changed_sections or "locations" in changed_sections or "statics" in changed_sections:
+            self._repopulate(self.summary_slb, database.instance.pokemon)
+            self._repopulate(self.item_slb, database.instance.items)
+            # Team members are old Pokemon objects, so re-bind them by name
+            for team_builder_element in self.team_builder_elements:
+                if team_builder_element.empty:
+                    continue
+                pkmn_name = team_builder_element.current_pokemon.name
+                if pkmn_name in database.instance.pokemon:
+                    team_builder_element.update(database.instance.pokemon[pkmn_name])
+                else:
+                    team_builder_element.clear()
+        if "moves" in changed_sections or "movesets" in changed_sections or "tm_moves" in changed_sections or "tm_compatibility" in changed_sections:
+            self._repopulate(self.move_slb, database.instance.moves)
+        if "locations" in changed_sections or "statics" in changed_sections:
+            self._repopulate(self.location_slb, database.instance.locations)
+        if "trainers" in changed_sections or "pokemon" in changed_sections:
+            self.resetTrainers()
+        self.team_analysis_element.update()
+        if "locations" in changed_sections or "statics" in changed_sections:
+            self.damage_matrix_element.updateLocations()
+        else:
+            self.damage_matrix_element.update()
+
+    def _repopulate(self, slb : SearchableListBox, data):
+        [selected_name] = slb.currentlySelected()
+        slb.populate(data)
+        # Keep whatever was on display, showing its new data
+        if selected_name in data:
+            slb.setSelection(selected_name)
+            slb.element.update(data[selected_name])
+
     def layout(self):
         return [[self.tab_group]]
 
@@ -0,0 +1,125 @@
+from   typing import List, Tuple
+
+import numpy
+
+from src import database, pokemon, types
+
+####################################################
+## Type effectiveness as an array
+####################################################
+# Types the calculator doesn't know (e.g. UNKNOWN, "???") get the last row/column, which is neutral
+TYPE_INDEX = {type_str: i for i, type_str in enumerate(types.all_types)}
+NEUTRAL_TYPE = len(types.all_types)
+# attacking type x defending type
+TYPE_MATRIX = numpy.ones((len(types.all_types) + 1, len(types.all_types) + 1))
+for _attacking_type, _defending_types in types.calculator.mapping.items():
+    for _defending_type, _multiplier in _defending_types.items():
+        TYPE_MATRIX[TYPE_INDEX[_attacking_type], TYPE_INDEX[_defending_type]] = _multiplier
+
+def typeIndex(type_str):
+    return TYPE_INDEX.get(type_str, NEUTRAL_TYPE)
+
+def scaledStats(base_stats : numpy.ndarray, levels : numpy.ndarray) -> numpy.ndarray:
+    """Actual stats at the given levels (rows of ALL_ATTR_NAMES stats), assuming no IVs, EVs or natures."""
+    levels = levels[:, None]
+    stats = (2 * base_stats * levels) // 100 + 5
+    stats[:, pokemon.Stats.ALL_ATTR_NAMES.index("hp")] += levels[:, 0] + 5
+    return stats
+
+####################################################
+class DamageMatrix:
+    """Damage every team member's moves do to every pokemon of a pool.
+
+    Everything is (team member x move slot x defender) arrays, computed in one
+    broadcast pass: the standard damage formula with STAB and type
+    effectiveness, where the random roll (0.85-1.0) gives the min/max.
+    Crits, abilities, items, weather and IVs/EVs are ignored.
+    """
+    MOVE_SLOTS = 4
+    STAB = 1.5
+    MIN_ROLL = 0.85
+
+    def __init__(self, db : database.Database, team : List[pokemon.Pokemon], team_level, defender_names : List[str], defender_levels : List[int]):
+        db.materialise("moves", "movesets")
+        self.team_names = [pkmn.name for pkmn in team]
+        self.defender_names = list(defender_names)
+        self.defender_levels = numpy.array(defender_levels, dtype=numpy.int64)
+        stat_index = {attr_name: i for i, attr_name in enumerate(pokemon.Stats.ALL_ATTR_NAMES)}
+
+        # Team member x move slot; empty slots have no power
+        self.move_names = [[""] * self.MOVE_SLOTS for _ in team]
+        power = numpy.zeros((len(team), self.MOVE_SLOTS))
+        move_types = numpy.full((len(team), self.MOVE_SLOTS), NEUTRAL_TYPE)
+        special = numpy.zeros((len(team), self.MOVE_SLOTS), dtype=bool)
+        stab = numpy.ones((len(team), self.MOVE_SLOTS))
+        for i, pkmn in enumerate(team):
+            known = pkmn.moveset.movesKnownAt(team_level, count=self.MOVE_SLOTS) if pkmn.moveset else []
+            for j, move in enumerate(db.moves[move_name] for move_name in known if move_name in db.moves):
+                if move.power.value <= 0 or move.category.primary == "STATUS":
+                    continue
+                self.move_names[i][j] = move.name
+                power[i, j] = move.power.value
+                move_types[i, j] = typeIndex(move.type.primary)
+                special[i, j] = move.category.primary == "SPECIAL"
+                stab[i, j] = self.STAB if move.type.primary in (pkmn.type.primary, pkmn.type.secondary) else 1.0
+
+        attacker_stats = scaledStats(numpy.array([pkmn.stats.values for pkmn in team], dtype=numpy.int64).reshape(-1, len(stat_index)),
+                                     numpy.full(len(team), team_level, dtype=numpy.int64))
+        defenders = [db.pokemon[name] for name in self.defender_names]
+        defender_stats = scaledStats(numpy.array([pkmn.stats.values for pkmn in defenders], dtype=numpy.int64).reshape(-1, len(stat_index)),
+                                     self.defender_levels)
+        self.defender_hp = defender_stats[:, stat_index["hp"]]
+
+        # (team x slot x 1) against (1 x 1 x defender)
+        attack = numpy.where(special, attacker_stats[:, stat_index["special_attack"], None], attacker_stats[:, stat_index["attack"], None])[:, :, None]
+        defence = numpy.where(special[:, :, None], defender_stats[None, None, :, stat_index["special_defence"]], defender_stats[None, None, :, stat_index["defence"]])
+        effectiveness = TYPE_MATRIX[move_types[:, :, None], numpy.array([typeIndex(pkmn.type.primary) for pkmn in defenders], dtype=numpy.intp)[None, None, :]]
+        secondary_types = numpy.array([NEUTRAL_TYPE if pkmn.type.secondary is None else typeIndex(pkmn.type.secondary) for pkmn in defenders], dtype=numpy.intp)
+        effectiveness = effectiveness * TYPE_MATRIX[move_types[:, :, None], secondary_types[None, None, :]]
+        self.effectiveness = effectiveness
+
+        base_damage = ((2 * team_level) // 5 + 2) * power[:, :, None] * attack / defence // 50 + 2
+        self.max_damage = numpy.where(power[:, :, None] > 0, numpy.floor(base_damage * stab[:, :, None] * effectiveness), 0)
+        self.min_damage = numpy.floor(self.max_damage * self.MIN_ROLL)
+
+    def percentOfHp(self, damage : numpy.ndarray) -> numpy.ndarray:
+        return 100 * damage / self.defender_hp
+
+    def best(self) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """(move slot, min %, max %) of each member's strongest move against each defender (team x defender)."""
+        slots = self.max_damage.argmax(axis=1)
+        min_damage = numpy.take_along_axis(self.min_damage, slots[:, None, :], axis=1)[:, 0, :]
+        max_damage = numpy.take_along_axis(self.max_damage, slots[:, None, :], axis=1)[:, 0, :]
+        return slots, self.percentOfHp(min_damage), self.percentOfHp(max_damage)
+
+    def rows(self) -> List[List[str]]:
+        """One row per defender: its name and level, then each member's best move and % range."""
+        slots, min_percents, max_percents = self.best()
+        rows = []
+        for d, (name, level) in enumerate(zip(self.defender_names, self.defender_levels.tolist())):
+            row = [name, str(level)]
+            for t in range(len(self.team_names)):
+                move_name = self.move_names[t][slots[t, d]]
+                row.append(f"{move_name} {min_percents[t, d]:.0f}-{max_percents[t, d]:.0f}%" if move_name else "-")
+            rows.append(row)
+        return rows
+
+####################################################
+def encounterPool(db : database.Database, location_name, default_level) -> Tuple[List[str], List[int]]:
+    """Every pokemon found at a location and the highest level it's found at
+    there (default_level for statics and others without a level).
+    """
+    rows = db.encounterRowsAt(location_name)
+    pkmn_ids = db.encounters.pkmn_ids[rows]
+    max_levels = db.encounters.max_levels[rows]
+    known = pkmn_ids >= 0
+    pkmn_ids, max_levels = pkmn_ids[known], max_levels[known]
+    unique_ids, inverse = numpy.unique(pkmn_ids, return_inverse=True)
+    levels = numpy.full(len(unique_ids), -1, dtype=numpy.int64)
+    numpy.maximum.at(levels, inverse, max_levels)
+    levels[levels < 0] = default_level
+    return [db.pokemon_ids.name(int(pkmn_id)) for pkmn_id in unique_ids], levels.tolist()
+
+def teamVsLocation(db : database.Database, team : List[pokemon.Pokemon], team_level, location_name) -> DamageMatrix:
+    defender_names, defender_levels = encounterPool(db, location_name, team_level)
+    return DamageMatrix(db, team, team_level, defender_names, defender_levels)
@@ -1,14 +1,64 @@
 import collections
 import pathlib
-from   typing import List, Mapping
+import threading
+from   typing import Callable, List, Mapping, Set, Tuple
 
-from src import pokemon
+import numpy
+
+from src import indexes, pokemon
+from src.external.parsers import getGroups
 
 default_source_location = "X:/Games/Emulators/Pokemon Randomizer/roms/Pokemon HeartGold Lite.nds.log"
 default_theme = "Topanga"
+# Optional SQLite file every ingested seed is also saved to (see store.SeedStore)
+default_store_location = None
+
+class _DeferredAttribute:
+    """A Database attribute filled in by deferred sections; reading it
+    materialises them first (see Database.defer).
+
+    The loaders themselves (the add* and clear* methods) use the underscored
+    fields directly, so applying a section never goes back through materialise.
+    """
+    def __init__(self, *sections):
+        self.sections = sections
+
+    def __set_name__(self, owner, name):
+        self.attr_name = f"_{name}"
+
+    def __get__(self, db, owner=None):
+        if db is None:
+            return self
+        db.materialise(*self.sections)
+        return getattr(db, self.attr_name)
+
+    def __set__(self, db, value):
+        setattr(db, self.attr_name, value)
 
 class Database:
+    # Everything but the pokemon themselves can be deferred until first used
+    moves = _DeferredAttribute("moves")
+    move_ids = _DeferredAttribute("moves")
+    move_learners = _DeferredAttribute("movesets")
+    locations = _DeferredAttribute("encounters")
+    location_ids = _DeferredAttribute("encounters")
+    sublocation_by_id = _DeferredAttribute("encounters")
+    encounters = _DeferredAttribute("encounters")
+    machines = _DeferredAttribute("machines")
+
+    # Rough retained sizes, fitted to benchmarks/model_memory.py
+    ESTIMATED_BYTES_PER_POKEMON = 3000
+    ESTIMATED_BYTES_PER_MOVE = 400
+    ESTIMATED_BYTES_PER_ENCOUNTER = 300
+
     def __init__(self):
+        # Deferred section name -> function that parses and applies it, in the order they were deferred
+        self._pending : Mapping[str, Callable] = {}
+        self._materialising : Set[str] = set()
+        # Deferred section name -> what its loader raised in a background warm (it's left empty)
+        self.failed : Mapping[str, Exception] = {}
+        # Held while sections are applied, so a background warm and the GUI never interleave
+        self.lock = threading.RLock()
         # TODO: Default should be ingested from file
         self.source_location : pathlib.Path = None
         self.theme : str = "Topanga"
@@ -16,9 +66,142 @@ class Database:
         self.rv_minor : int = 0
         self.rv_patch : int = 0
         self.version : pokemon.Version = None
+        # Bumped on every change, so anything derived from the database knows when to recompute
+        self.generation = 0
+        # key -> (generation, value) of what's been derived from it (see cached)
+        self._derived : Mapping[object, Tuple[int, object]] = {}
+        self._derived_lock = threading.Lock()
+        # Name-keyed mappings (used by the GUI)
         self.pokemon : Mapping[str, pokemon.Pokemon] = {}
         self.moves : Mapping[str, pokemon.Move] = {}
         self.locations : Mapping[str, pokemon.Location] = {}
+        # Dense id tables (used for internal references)
+        self.pokemon_ids = indexes.NameTable()
+        self.move_ids = indexes.NameTable()
+        self.location_ids = indexes.NameTable()
+        self.pokemon_by_id : List[pokemon.Pokemon] = []
+        self.sublocation_by_id : List[pokemon.Sublocation] = []
+        # Indexes
+        self.encounters = indexes.EncounterTable()
+        self.items : Mapping[str, pokemon.Item] = {}
+        # ability name -> [pkmn id]
+        self.ability_holders : Mapping[str, List[int]] = {}
+        # move id -> [(pkmn id, level)], sorted by level
+        self.move_learners : Mapping[int, List[Tuple[int, int]]] = {}
+        self.machines = indexes.MachineTable()
+        # Trainers are only parsed when first asked for (see trainers)
+        self._load_trainers = None
+        self._trainers : indexes.TrainerTable = None
+
+    def defer(self, section, load_fn):
+        """Registers 'load_fn' to apply a section the first time anything that
+        depends on it is read (replacing whatever was pending for it).
+        """
+        with self.lock:
+            self.generation += 1
+            self._pending[section] = load_fn
+            self.failed.pop(section, None)
+
+    def pending(self) -> List[str]:
+        return list(self._pending)
+
+    def materialise(self, *sections):
+        """Applies any of the given sections that are still deferred."""
+        # Fast path: a section stays pending until it's fully applied
+        if not any(section in self._pending for section in sections):
+            return
+        with self.lock:
+            for section in sections:
+                load_fn = self._pending.get(section)
+                # The loader itself reads the attributes it fills in
+                if load_fn is None or section in self._materialising:
+                    continue
+                self._materialising.add(section)
+                # Materialising reveals data that was already part of this generation
+                generation = self.generation
+                try:
+                    load_fn()
+                finally:
+                    self._materialising.discard(section)
+                self.generation = generation
+                del self._pending[section]
+
+    def materialiseAll(self):
+        self.materialise(*self._pending)
+
+    def warm(self, on_materialised=None) -> threading.Thread:
+        """Materialises every deferred section in a background thread, calling
+        on_materialised(section, error) (from that thread) after each one.
+
+        A section whose loader raises is recorded in 'failed' (with error
+        passed on) and no longer pending, so reading it later doesn't raise
+        the same error again on whatever thread happens to read it.
+        """
+        def run():
+            for section in self.pending():
+                load_fn = self._pending.get(section)
+                error = None
+                try:
+                    self.materialise(section)
+                except Exception as e:
+                    error = e
+                    with self.lock:
+                        # Unless a re-ingest has deferred it again since
+                        if self._pending.get(section) is load_fn:
+                            del self._pending[section]
+                            self.failed[section] = e
+                if on_materialised is not None:
+                    on_materialised(section, error)
+        thread = threading.Thread(target=run, name="DatabaseWarm", daemon=True)
+        thread.start()
+        return thread
+
+    def cached(self, key, factory : Callable = None):
+        """factory(self) (by default key(self)), made once per generation and
+        kept until the database changes: for indexes and views derived from it.
+
+        Built without holding any lock; if two threads race, both get whichever
+        was stored first.
+        """
+        generation = self.generation
+        entry = self._derived.get(key)
+        if entry is not None and entry[0] == generation:
+            return entry[1]
+        value = (factory or key)(self)
+        with self._derived_lock:
+            entry = self._derived.get(key)
+            if entry is None or entry[0] != generation:
+                entry = (generation, value)
+                self._derived[key] = entry
+            return entry[1]
+
+    def clearPokemon(self):
+        """Forgets all pokemon, and everything indexed by pokemon id."""
+        self.generation += 1
+        self.clearEncounters()
+        self.pokemon = {}
+        self.pokemon_ids = indexes.NameTable()
+        self.pokemon_by_id = []
+        self.items = {}
+        self.ability_holders = {}
+        self._move_learners = {}
+        # Trainer teams and TM compatibility refer to pokemon ids
+        self._trainers = None
+        self._machines = indexes.MachineTable()
+
+    def clearMoves(self):
+        self.generation += 1
+        self._moves = {}
+
+    def clearEncounters(self):
+        """Forgets all locations and wild/static occurrences."""
+        self.generation += 1
+        self._locations = {}
+        self._location_ids = indexes.NameTable()
+        self._sublocation_by_id = []
+        self._encounters = indexes.EncounterTable()
+        for pkmn in self.pokemon_by_id:
+            pkmn.wild_occurrences = []
 
     def setRandomizerVersion(self, version_tuple):
         [major_str, minor_str, patch_str] = version_tuple
@@ -30,44 +213,194 @@ class Database:
         self.version = version
 
     def addPokemon(self, pkmn : List[pokemon.Pokemon]):
+        self.generation += 1
         for p in pkmn:
+            p.id = self.pokemon_ids.id(p.name)
+            if p.id == len(self.pokemon_by_id):
+                self.pokemon_by_id.append(p)
+            else:
+                self.pokemon_by_id[p.id] = p
             self.pokemon[p.name] = p
+        self._indexItemsAndAbilities(pkmn)
+
+    def _indexItemsAndAbilities(self, pkmn : List[pokemon.Pokemon]):
+        ability_holders = collections.defaultdict(list, self.ability_holders)
+        for p in pkmn:
+            for raw_item in p.items:
+                # Held items look like "Oran Berry (50%)"
+                groups = getGroups(r"(.+) [(](.+)[)]", raw_item.strip())
+                item_name, rate = groups if groups is not None else (raw_item.strip(), "")
+                if item_name not in self.items:
+                    self.items[item_name] = pokemon.Item(item_name)
+                self.items[item_name].addHolder(p.id, rate)
+            for ability in p.abilities:
+                ability_holders[ability].append(p.id)
+        self.items = dict(sorted(self.items.items()))
+        self.ability_holders = dict(sorted(ability_holders.items()))
 
     def addMoves(self, moves : List[pokemon.Move]):
+        self.generation += 1
         for m in moves:
-            self.moves[m.name] = m
+            m.id = self._move_ids.id(m.name)
+            self._moves[m.name] = m
+
+    def addMovesets(self, records : List[Tuple[str, List[int], List[str]]]):
+        """[(pkmn name, levels, move names)] records, as extracted; names are only resolved to ids here."""
+        self.generation += 1
+        move_ids = self._move_ids
+        movesets = []
+        for pkmn_name, levels, move_names in records:
+            pkmn_id = self.pokemon_ids.get(pkmn_name)
+            assert pkmn_id is not None, f"{pkmn_name} not found in {len(self.pokemon)} pokemon ingested into database"
+            # Moves may be missing from the move table (e.g. unchanged move data),
+            # so movesets are allowed to introduce new move ids
+            ms = pokemon.Moveset(pkmn_id, list(levels), [move_ids.id(move_name) for move_name in move_names], move_ids)
+            self.pokemon_by_id[pkmn_id].addMoveset(ms)
+            movesets.append(ms)
 
-    def addMovesets(self, movesets : List[pokemon.Moveset]):
+        learners = collections.defaultdict(list)
         for ms in movesets:
-            assert ms.pkmn_name in self.pokemon, f"{ms.pkmn_name} not found in {len(self.pokemon)} pokemon ingested into database"
-            self.pokemon[ms.pkmn_name].addMoveset(ms)
+            for level, move_id in zip(ms.levels, ms.move_ids):
+                learners[move_id].append((ms.pkmn_id, level))
+        for pairs in learners.values():
+            pairs.sort(key=lambda pair: (pair[1], self.pokemon_ids.name(pair[0])))
+        self._move_learners = dict(learners)
+
+    def addMachines(self, tm_moves : List[Tuple[str, str]], compatibility : List[Tuple[str, List[str]]]):
+        self.generation += 1
+        self._machines = indexes.MachineTable(tm_moves, compatibility, self.pokemon_ids)
 
-    def addLocations(self, locations : List[pokemon.Location]):
-        for l in locations:
-            self.locations[l.name] = l
+    def addLocations(self, records : List[Tuple[str, List[Tuple]]]):
+        """[(location name, [(set num, classification, rate, [(pkmn name, levels)])])] records, as extracted.
+
+        Builds the Location -> Sublocation -> WildOccurrence tree with every name
+        resolved to an id once, here; occurrences of pokemon the database doesn't
+        know are dropped.
+        """
+        self.generation += 1
+        for location_name, sublocation_records in records:
+            l = pokemon.Location(location_name)
+            l.id = self._location_ids.id(l.name)
+            for set_num, classification, rate, occurrence_records in sublocation_records:
+                sl = pokemon.Sublocation(set_num, l, classification, rate)
+                if sl in l.sublocations:
+                    continue
+                for pkmn_name, levels in occurrence_records:
+                    pkmn_id = self.pokemon_ids.get(pkmn_name)
+                    if pkmn_id is not None:
+                        sl.wild_occurrences.append(pokemon.WildOccurrence(pkmn_id, sl, levels))
+                l.sublocations.add(sl)
+            for sl in sorted(l.sublocations):
+                sl.id = len(self._sublocation_by_id)
+                self._sublocation_by_id.append(sl)
+            self._locations[l.name] = l
 
     def addWildOccurrencesToPokemon(self):
-        # 1) Extract occurrences into map of [pkmn_name, wo]
-        wild_occurrences : Mapping[str, List[pokemon.WildOccurrence]] = collections.defaultdict(list)
-        wo_counter = 0
-        for location in self.locations.values():
-            for sublocation in location.sublocations:
-                for wild_occurrence in sublocation.wild_occurrences:
-                    wild_occurrences[wild_occurrence.pkmn_name] += [wild_occurrence]
-                    wo_counter += 1
-        # 2) Apply all wild occurrences to list of all pokemon
-        for pkmn in self.pokemon.values():
-            pkmn.addWildOccurrences(*wild_occurrences[pkmn.name])
+        self.generation += 1
+        # 1) One encounter table row per occurrence, in sublocation order
+        occurrences = [wo for sublocation in self._sublocation_by_id for wo in sublocation.wild_occurrences]
+        self._encounters.add(occurrences)
+        # 2) Group the rows by pkmn id, and apply each group to its pokemon
+        by_pokemon = self._encounters.groups("wild_by_pokemon", self._encounters.pkmn_ids, len(self.pokemon_by_id))
+        for pkmn, pkmn_occurrences in zip(self.pokemon_by_id, by_pokemon):
+            pkmn.addWildOccurrences(*pkmn_occurrences)
         # TODO: Is the print really in the right place/necessary?
-        print(f"Applied {wo_counter} wild occurrences to {len(self.pokemon)} pokemon")
+        print(f"Applied {len(occurrences)} wild occurrences to {len(self.pokemon)} pokemon")
 
-    def addStaticPokemonEncounters(self, encounters : Mapping[str, pokemon.WildOccurrence]):
-        for pkmn in self.pokemon.values():
-            if pkmn.name in encounters:
-                pkmn.addWildOccurrences(encounters[pkmn.name])
+    def addStaticPokemonEncounters(self, encounters : Mapping[str, str]):
+        """{pkmn name: name of the pokemon it replaced}, as extracted."""
+        self.generation += 1
+        known = []
+        for pkmn_name, old_name in encounters.items():
+            pkmn_id = self.pokemon_ids.get(pkmn_name)
+            if pkmn_id is not None:
+                wo = pokemon.WildOccurrence(pkmn_id, pokemon.StaticSublocation(old_name), [])
+                self.pokemon_by_id[pkmn_id].addWildOccurrences(wo)
+                known.append(wo)
+        self._encounters.add(known)
         # TODO: Is the print really in the right place/necessary?
         print(f"Extracted static occurrences for {len(encounters)} pokemon")
 
+    def _rowsByLevel(self, min_level, max_level, classifications, location_names):
+        location_ids = None if location_names is None else [self.location_ids.get(name) for name in location_names if name in self.location_ids]
+        return self.encounters.rowsByLevel(min_level, max_level, classifications, location_ids)
+
+    def occurrencesByLevel(self, min_level=None, max_level=None, classifications=None, location_names=None) -> List[pokemon.WildOccurrence]:
+        """Every occurrence whose level range overlaps [min_level, max_level] (see EncounterTable.rowsByLevel)."""
+        return [self.encounters.occurrences[row] for row in self._rowsByLevel(min_level, max_level, classifications, location_names)]
+
+    def catchablePokemon(self, min_level=None, max_level=None, classifications=None, location_names=None) -> Set[str]:
+        """Names of all pokemon that can be encountered somewhere within the given level range."""
+        pkmn_ids = numpy.unique(self.encounters.pkmn_ids[self._rowsByLevel(min_level, max_level, classifications, location_names)])
+        return {self.pokemon_ids.name(int(pkmn_id)) for pkmn_id in pkmn_ids if pkmn_id >= 0}
+
+    def pokemonAt(self, location_name) -> List[str]:
+        """Names of every pokemon found anywhere at a location, in pkmn id order."""
+        rows = self.encounterRowsAt(location_name)
+        return [self.pokemon_ids.name(pkmn_id) for pkmn_id in numpy.unique(self.encounters.pkmn_ids[rows]) if pkmn_id >= 0]
+
+    def levelRangeAt(self, location_name) -> Tuple[int, int]:
+        """(min, max) wild level at a location, or None if nothing there has a level."""
+        location_id = self.location_ids.get(location_name)
+        if location_id is None:
+            return None
+        mins, maxs = self.encounters.levelRanges(self.encounters.location_ids, len(self.location_ids), "level_ranges_by_location")
+        return (int(mins[location_id]), int(maxs[location_id])) if maxs[location_id] >= 0 else None
+
+    def encounterRowsAt(self, location_name):
+        """Rows of the encounter table found at a location."""
+        location_id = self.location_ids.get(location_name)
+        if location_id is None:
+            return numpy.empty(0, dtype=numpy.intp)
+        order, starts = self.encounters.groupBy("by_location", self.encounters.location_ids, len(self.location_ids))
+        return order[starts[location_id]:starts[location_id + 1]]
+
+    def setTrainerSource(self, load_fn):
+        """'load_fn' returns the log's trainers as [(num, name, [(pkmn name, level)])].
+        It's only called the first time trainers are needed.
+        """
+        self.generation += 1
+        self._load_trainers = load_fn
+        self._trainers = None
+
+    @property
+    def trainers(self) -> indexes.TrainerTable:
+        if self._trainers is None:
+            self._trainers = indexes.TrainerTable(self._load_trainers() if self._load_trainers else [], self.pokemon_ids)
+        return self._trainers
+
+    def trainersUsing(self, pkmn_name) -> List[str]:
+        return [self.trainers.displayName(index) for index in self.trainers.trainersUsing(self.pokemon_ids.get(pkmn_name))]
+
+    def tmLearnersOf(self, move_name) -> List[str]:
+        return [self.pokemon_ids.name(pkmn_id) for pkmn_id in self.machines.learnersOf(move_name)]
+
+    def pokemonCompatibleWith(self, machines) -> List[str]:
+        """Names of the pokemon that can learn every one of the given TMs/HMs (e.g. ["TM26", "TM89"]).
+
+        Throws KeyError if any of them isn't in the log.
+        """
+        return [self.pokemon_ids.name(pkmn_id) for pkmn_id in self.machines.compatibleWith(machines)]
+
+    def holdersOf(self, item_name) -> List[Tuple[str, str]]:
+        if item_name not in self.items:
+            return []
+        return [(self.pokemon_ids.name(pkmn_id), rate) for pkmn_id, rate in self.items[item_name].holders]
+
+    def pokemonWithAbility(self, ability) -> List[str]:
+        return [self.pokemon_ids.name(pkmn_id) for pkmn_id in self.ability_holders.get(ability, [])]
+
+    def learnersOf(self, move_name) -> List[Tuple[str, int]]:
+        move_id = self.move_ids.get(move_name)
+        return [(self.pokemon_ids.name(pkmn_id), level) for pkmn_id, level in self.move_learners.get(move_id, [])]
+
+    def estimatedBytes(self) -> int:
+        """A cheap estimate of how much memory this database keeps alive."""
+        # Only counts what's been materialised so far
+        return (len(self.pokemon) * self.ESTIMATED_BYTES_PER_POKEMON
+              + len(self._moves) * self.ESTIMATED_BYTES_PER_MOVE
+              + len(self._encounters) * self.ESTIMATED_BYTES_PER_ENCOUNTER)
+
     def randomizerVerionStr(self):
         return f"{self.rv_major}.{self.rv_minor}.{self.rv_patch}"
 
@@ -0,0 +1,166 @@
+import pathlib
+import sys
+from   typing import Callable, List, Mapping, Tuple
+
+from src import database, pokemon
+
+####################################################
+class FieldChange:
+    def __init__(self, field, old, new):
+        self.field = field
+        self.old = old
+        self.new = new
+
+    def __str__(self):
+        return f"{self.field}: {self.old} -> {self.new}"
+
+class EntityDiff:
+    """Every field that differs between two versions of the same (by name) entity."""
+    def __init__(self, name, changes : List[FieldChange]):
+        self.name = name
+        self.changes = changes
+
+    def __repr__(self):
+        return f"EntityDiff[{self.name}, {len(self.changes)} changes]"
+
+class SectionDiff:
+    def __init__(self, kind):
+        self.kind = kind
+        self.added : List[str] = []
+        self.removed : List[str] = []
+        self.changed : List[EntityDiff] = []
+        self.unchanged_count = 0
+
+    def empty(self):
+        return not (self.added or self.removed or self.changed)
+
+class SeedDiff:
+    """Structured report of what differs between two ingested seeds."""
+    def __init__(self, old_label, new_label):
+        self.old_label = old_label
+        self.new_label = new_label
+        self.sections : Mapping[str, SectionDiff] = {}
+
+    def empty(self):
+        return all(section.empty() for section in self.sections.values())
+
+    def lines(self) -> List[str]:
+        lines = [f"Diff of {self.old_label} -> {self.new_label}"]
+        for section in self.sections.values():
+            lines.append("")
+            lines.append(f"== {section.kind}: {len(section.changed)} changed, {len(section.added)} added, {len(section.removed)} removed, {section.unchanged_count} unchanged ==")
+            lines.extend(f"+ {name}" for name in section.added)
+            lines.extend(f"- {name}" for name in section.removed)
+            for entity in section.changed:
+                lines.append(f"* {entity.name}")
+                lines.extend(f"    {change}" for change in entity.changes)
+        return lines
+
+    def __str__(self):
+        return "\n".join(self.lines())
+
+####################################################
+## Facts
+## Each entity is reduced to a tuple of named, comparable facts, cached
+## per database generation along with its fingerprint (the tuple's hash).
+## Entities whose fingerprints differ are known to differ without comparing
+## their facts; field diffs are only worked out for the entities that differ.
+####################################################
+POKEMON_FIELDS = ("type", *pokemon.Stats.ALL_ATTR_NAMES, "abilities", "items", "moveset", "encounters")
+MOVE_FIELDS = ("type", "category", *pokemon.Move.ALL_ATTR_NAMES)
+LOCATION_FIELDS = ("encounters",)
+
+def pokemonFacts(db : database.Database, pkmn : pokemon.Pokemon) -> Tuple:
+    moveset = tuple(zip(pkmn.moveset.levels, pkmn.moveset.move_names)) if pkmn.moveset else ()
+    encounters = tuple(sorted((wo.displayName(), wo.levels) for wo in pkmn.wild_occurrences))
+    return (str(pkmn.type), *pkmn.stats.values, tuple(pkmn.abilities), tuple(pkmn.items), moveset, encounters)
+
+def moveFacts(db : database.Database, move : pokemon.Move) -> Tuple:
+    return (move.type.primary, move.category.primary, *move.values)
+
+def locationFacts(db : database.Database, location : pokemon.Location) -> Tuple:
+    # Set numbers shift between seeds, so encounters are compared by classification
+    encounters = tuple(sorted((sl.classification, db.pokemon_ids.name(wo.pkmn_id), wo.levels) for sl in location.sublocations for wo in sl.wild_occurrences))
+    return (encounters,)
+
+def _collectionChanges(field, old, new) -> List[FieldChange]:
+    """Collection facts are reported as what was added and removed, not as two full lists."""
+    old_set, new_set = set(old), set(new)
+    changes = []
+    removed = sorted(old_set - new_set)
+    added = sorted(new_set - old_set)
+    if removed:
+        changes.append(FieldChange(f"{field} removed", removed, None))
+    if added:
+        changes.append(FieldChange(f"{field} added", None, added))
+    return changes
+
+class DatabaseFacts:
+    """Facts and fingerprints of a database's entities, by kind and then name."""
+    def __init__(self, db : database.Database):
+        self.db = db
+        self.by_kind : Mapping[str, Mapping[str, Tuple[int, Tuple]]] = {}
+
+    def of(self, kind, entities_fn : Callable, facts_fn : Callable) -> Mapping[str, Tuple[int, Tuple]]:
+        """{name: (fingerprint, facts)} of every entity of the kind."""
+        if kind not in self.by_kind:
+            facts = {name: facts_fn(self.db, entity) for name, entity in entities_fn(self.db).items()}
+            self.by_kind[kind] = {name: (hash(entity_facts), entity_facts) for name, entity_facts in facts.items()}
+        return self.by_kind[kind]
+
+def forDatabase(db : database.Database) -> DatabaseFacts:
+    """The (cached) facts of a database, rebuilt if it changed since."""
+    return db.cached(DatabaseFacts)
+
+def diffEntities(kind, old_db : database.Database, new_db : database.Database, entities_fn : Callable, facts_fn : Callable, fields) -> SectionDiff:
+    section = SectionDiff(kind)
+    old = forDatabase(old_db).of(kind, entities_fn, facts_fn)
+    new = forDatabase(new_db).of(kind, entities_fn, facts_fn)
+    section.added = [name for name in new if name not in old]
+    section.removed = [name for name in old if name not in new]
+    for name, (new_fingerprint, new_facts) in new.items():
+        if name not in old:
+            continue
+        old_fingerprint, old_facts = old[name]
+        # Equal fingerprints can still collide, so only the facts decide that nothing changed
+        if old_fingerprint == new_fingerprint and old_facts == new_facts:
+            section.unchanged_count += 1
+            continue
+        changes = []
+        for field, old_fact, new_fact in zip(fields, old_facts, new_facts):
+            if old_fact == new_fact:
+                continue
+            if isinstance(old_fact, tuple):
+                changes.extend(_collectionChanges(field, old_fact, new_fact))
+            else:
+                changes.append(FieldChange(field, old_fact, new_fact))
+        section.changed.append(EntityDiff(name, changes))
+    return section
+
+def diffDatabases(old : database.Database, new : database.Database, old_label="old", new_label="new") -> SeedDiff:
+    old.materialiseAll()
+    new.materialiseAll()
+    seed_diff = SeedDiff(old_label, new_label)
+    seed_diff.sections["Pokemon"] = diffEntities("Pokemon", old, new, lambda db: db.pokemon, pokemonFacts, POKEMON_FIELDS)
+    seed_diff.sections["Moves"] = diffEntities("Moves", old, new, lambda db: db.moves, moveFacts, MOVE_FIELDS)
+    seed_diff.sections["Locations"] = diffEntities("Locations", old, new, lambda db: db.locations, locationFacts, LOCATION_FIELDS)
+    return seed_diff
+
+####################################################
+def main(args):
+    """python -m src.diff <old log file> <new log file>"""
+    import contextlib
+    import io
+    from src import ingest
+
+    if len(args) != 2:
+        print(main.__doc__)
+        return 1
+    # Keep the ingest chatter out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        old, new = (ingest.LogIngester(pathlib.Path(path), lazy=False).ingest() for path in args)
+    print(diffDatabases(old, new, *args))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,101 @@
+import concurrent.futures
+import io
+from   typing import List, Mapping
+
+import numpy
+
+from src import database, pokemon
+
+####################################################
+class StatDistribution:
+    """Histograms, smoothed (KDE) curves and percentiles for all six stats of
+    a group of pokemon, each computed in one vectorized pass over an
+    (n pokemon x 6 stats) array.
+    """
+    PERCENTILES = (10, 25, 50, 75, 90)
+    MAX_STAT = pokemon.Stats.Attribute.ATTR_MAX
+
+    def __init__(self, stats : numpy.ndarray, title="All Pokemon"):
+        self.title = title
+        self.count = len(stats)
+        stat_count = len(pokemon.Stats.ALL_ATTR_NAMES)
+        stats = stats.reshape(-1, stat_count).astype(numpy.int64)
+        self.xs = numpy.arange(self.MAX_STAT + 1)
+
+        # Every stat's histogram from a single bincount, by offsetting each column into its own range
+        offsets = numpy.arange(stat_count) * (self.MAX_STAT + 1)
+        self.histograms = numpy.bincount((stats + offsets).ravel(), minlength=stat_count * (self.MAX_STAT + 1)).reshape(stat_count, -1)
+        # PERCENTILES x stats
+        self.percentiles = numpy.percentile(stats, self.PERCENTILES, axis=0) if self.count else numpy.zeros((len(self.PERCENTILES), stat_count))
+        self.means = stats.mean(axis=0) if self.count else numpy.zeros(stat_count)
+
+        # Gaussian KDE (Silverman's rule bandwidth) evaluated on every possible stat value.
+        # Stats are integers, so smoothing the histograms is exact and doesn't depend on n.
+        std = stats.std(axis=0) if self.count else numpy.zeros(stat_count)
+        bandwidths = numpy.maximum(1.06 * std * max(self.count, 1) ** (-1 / 5), 1.0)
+        distances = self.xs[:, None] - self.xs[None, :]
+        kernels = numpy.exp(-0.5 * (distances[None, :, :] / bandwidths[:, None, None]) ** 2) / (bandwidths[:, None, None] * numpy.sqrt(2 * numpy.pi))
+        # stats x values: sum over sample values of count * kernel
+        self.densities = numpy.einsum("sv,svx->sx", self.histograms, kernels) / max(self.count, 1)
+
+        self._png = None
+
+    def median(self, attr_name) -> float:
+        return float(self.percentiles[self.PERCENTILES.index(50), pokemon.Stats.ALL_ATTR_NAMES.index(attr_name)])
+
+    def renderPng(self) -> bytes:
+        """Renders (once) the stat curves with their medians to PNG bytes.
+
+        Uses matplotlib's Agg canvas directly rather than pyplot, so it's safe
+        to call from a background thread.
+        """
+        if self._png is None:
+            from matplotlib.figure import Figure
+            figure = Figure(figsize=(8, 5))
+            axes = figure.add_subplot()
+            for i, attr_name in enumerate(pokemon.Stats.ALL_ATTR_NAMES):
+                plotted_curves = axes.plot(self.xs, self.densities[i], label=attr_name)
+                axes.axvline(x=self.median(attr_name), color=plotted_curves[-1].get_color(), lw=1, ls="dashed")
+            axes.set_title(f"Stat Distribution of {self.title} (with 50th percentile)")
+            axes.legend(loc="best")
+            buffer = io.BytesIO()
+            figure.savefig(buffer, format="png")
+            self._png = buffer.getvalue()
+        return self._png
+
+####################################################
+class DatabaseDistributions:
+    """Every StatDistribution of one database: all pokemon, plus one per type."""
+    def __init__(self, db : database.Database):
+        pkmn = db.pokemon_by_id
+        self.stats = numpy.array([p.stats.values for p in pkmn], dtype=numpy.int64).reshape(-1, len(pokemon.Stats.ALL_ATTR_NAMES))
+        self.primary_types = numpy.array([p.type.primary for p in pkmn], dtype=object)
+        self.secondary_types = numpy.array([p.type.secondary for p in pkmn], dtype=object)
+        self.all = StatDistribution(self.stats)
+        self.by_type : Mapping[str, StatDistribution] = {}
+        # type (or None for all) -> future of rendered PNG bytes
+        self.images : Mapping[str, concurrent.futures.Future] = {}
+
+    def types(self) -> List[str]:
+        return sorted({t for t in (*self.primary_types, *self.secondary_types) if t is not None})
+
+    def forType(self, type_str=None) -> StatDistribution:
+        if type_str is None:
+            return self.all
+        if type_str not in self.by_type:
+            mask = (self.primary_types == type_str) | (self.secondary_types == type_str)
+            self.by_type[type_str] = StatDistribution(self.stats[mask], title=f"{type_str} Pokemon")
+        return self.by_type[type_str]
+
+    def image(self, type_str=None) -> concurrent.futures.Future:
+        """Starts rendering (in the background) if it hasn't been already."""
+        if type_str not in self.images:
+            self.images[type_str] = _render_executor.submit(self.forType(type_str).renderPng)
+        return self.images[type_str]
+
+# One render at a time, off the GUI thread
+_render_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+def forDatabase(db : database.Database) -> DatabaseDistributions:
+    """The (cached) distributions of a database, recomputed if it changed since."""
+    return db.cached(DatabaseDistributions)
@@ -11,3 +11,7 @@ class Element(metaclass=abc.ABCMeta):
     @abc.abstractmethod
     def layout(self) -> List:
         pass
+
+    def prepare(self, obj : T):
+        """Pre-computes whatever update(obj) needs, so it's quick later (called while idle)."""
+        pass
@@ -1,4 +1,5 @@
 import gzip
+import io
 import re as regex
 
 def getLatestFileFrom(directory_path, glob_filter='*.log'):
@@ -13,31 +14,187 @@ def getLatestFileFrom(directory_path, glob_filter='*.log'):
     if len(file_matches) == 0: raise Exception(f"No files matching glob filter {glob_filter} could be found in directory {directory_path.name}")
     return str(file_matches[0])
 
-def getLinesFromFile(file, custom_strip_fn=lambda x: x):
+def _openText(file):
+    if '.gz' in file.suffixes:
+        return gzip.open(file,'rt',encoding="utf-8")
+    else:
+        return open(file,'r',encoding="utf-8")
+
+def _buildMojibakeTables():
+    """UTF-8 text that was decoded as cp1252 and re-encoded turns each
+    multi-byte character into 2-4 characters (e.g. "♀" into "â™€").
+
+    Returns a pattern matching such character runs, plus the table that
+    maps each of those characters back to the byte it came from.
+    """
+    char_to_byte = {}
+    for b in range(0x80, 0x100):
+        # cp1252 leaves a handful of bytes undefined; those come through as latin-1
+        try:
+            char = bytes([b]).decode("cp1252")
+        except UnicodeDecodeError:
+            char = bytes([b]).decode("latin-1")
+        char_to_byte[char] = b
+
+    def charClass(first, last):
+        return "[" + "".join(regex.escape(c) for c, b in char_to_byte.items() if first <= b <= last) + "]"
+
+    cont = charClass(0x80, 0xBF)
+    pattern = regex.compile(f"{charClass(0xC2, 0xDF)}{cont}|{charClass(0xE0, 0xEF)}{cont}{{2}}|{charClass(0xF0, 0xF4)}{cont}{{3}}")
+    return pattern, char_to_byte
+
+_MOJIBAKE_PATTERN, _MOJIBAKE_CHAR_TO_BYTE = _buildMojibakeTables()
+# Names are easier to search for with a plain apostrophe (e.g. "Farfetch'd")
+_MOJIBAKE_NORMALISATION = str.maketrans({"\u2019": "'"})
+
+def _repairMojibakeMatch(match):
+    try:
+        return bytes(_MOJIBAKE_CHAR_TO_BYTE[c] for c in match.group(0)).decode("utf-8").translate(_MOJIBAKE_NORMALISATION)
+    except UnicodeDecodeError:
+        # Just text that happens to look like mojibake; leave it alone
+        return match.group(0)
+
+_NON_ASCII_PATTERN = regex.compile(r"[^\x00-\x7f]+")
+
+def _repairNonAsciiRun(match):
+    return _MOJIBAKE_PATTERN.sub(_repairMojibakeMatch, match.group(0))
+
+def repairMojibake(text):
+    """Repairs double-encoded UTF-8 (e.g. "â™€" -> "♀") in a single pass over text."""
+    if text.isascii():
+        return text
+    # Mojibake is made entirely of non-ascii characters, so only those runs need a closer look
+    return _NON_ASCII_PATTERN.sub(_repairNonAsciiRun, text)
+
+def getBytesFromFile(file):
+    """Returns the raw (undecoded) contents of either a regular or gzipped file."""
+    if '.gz' in file.suffixes:
+        with gzip.open(file, 'rb') as f:
+            return f.read()
+    with open(file, 'rb') as f:
+        return f.read()
+
+def decodeLines(data, custom_strip_fn=None):
+    """Decodes raw UTF-8 bytes into a list of strings (lines).
+
+    Double-encoded UTF-8 (mojibake) is detected once for the
+    whole buffer and repaired before it is split into lines.
+
+    Can specify a function (custom_strip_fn) to run
+    on each line while building the list.
+    """
+    text = repairMojibake(data.decode("utf-8"))
+    # Universal newlines ('\r\n', '\r' and '\n' all end a line, as '\n'), like iterating over a
+    # file opened in text mode; str.splitlines would also split on form feeds and the like
+    lines = list(io.StringIO(text, newline=None))
+    if custom_strip_fn is None:
+        return lines
+    return [custom_strip_fn(line) for line in lines]
+
+def getLinesFromFile(file, custom_strip_fn=None):
     """Returns the file as a list of strings (lines).
 
     Can read from either regular or gzipped files.
 
     Can specify a function (custom_strip_fn) to run
     on each line while building the list.
+
+    (See decodeLines for how the contents are decoded)
     """
-    if '.gz' in file.suffixes:
-        open_fn = lambda x: gzip.open(x,'rt')
-    else:
-        open_fn = lambda x: open(x,'r',encoding="utf-8")
+    return decodeLines(getBytesFromFile(file), custom_strip_fn=custom_strip_fn)
+
+def getHeadLines(file, max_bytes, stop_regex=None):
+    """Returns the lines at the start of the file, reading at most
+    (roughly) max_bytes characters. Stops early after the first line
+    matching stop_regex, if one is given.
 
-    with open_fn(file) as f:
-        return [custom_strip_fn(line) for line in f]
+    Only as much of a gzipped file as is needed gets decompressed.
+
+    Throws InvalidFormatError if the start of the file isn't text.
+    """
+    stop_pattern = compiled(stop_regex) if stop_regex else None
+    lines = []
+    remaining = max_bytes
+    try:
+        with _openText(file) as f:
+            while remaining > 0:
+                # The size limit stops binary files without newlines being read whole
+                line = f.readline(remaining)
+                if not line:
+                    break
+                if '\0' in line:
+                    raise InvalidFormatError
+                lines.append(line)
+                remaining -= len(line)
+                if stop_pattern and stop_pattern.search(line):
+                    break
+    except (UnicodeDecodeError, OSError):
+        raise InvalidFormatError
+    return lines
+
+def getTailLines(file, max_bytes):
+    """Returns the (complete) lines within the last max_bytes of the file.
+
+    Gzipped files can't be read from the end without decompressing
+    everything before it, so they always return an empty list.
+    """
+    if '.gz' in file.suffixes:
+        return []
+    with open(file, 'rb') as f:
+        f.seek(0, 2)
+        size = f.tell()
+        f.seek(max(0, size - max_bytes))
+        data = f.read()
+    lines = data.decode("utf-8", errors="replace").splitlines(keepends=True)
+    # The first line is probably cut in half unless we read the whole file
+    return lines if size <= max_bytes else lines[1:]
+
+_compiled_patterns = {}
+
+def compiled(pattern):
+    """Returns the compiled form of pattern, compiling (and caching) it
+    on first use. Already compiled patterns are returned unchanged.
+    """
+    if isinstance(pattern, regex.Pattern):
+        return pattern
+    if pattern not in _compiled_patterns:
+        _compiled_patterns[pattern] = regex.compile(pattern)
+    return _compiled_patterns[pattern]
+
+# A backreference (or conditional) to a numbered group, e.g. \1 or (?(1)...),
+# that isn't itself escaped
+_numbered_reference = regex.compile(r'(?<!\\)(?:\\\\)*(?:\\[1-9]|\(\?\(\d)')
+
+def combined(*patterns):
+    """Returns a single compiled alternation matching any of the given patterns.
+
+    Returns None if the patterns can't share one expression
+    (e.g. they reuse the same named group, or refer to a group by
+    number, which would mean another group once the patterns are joined).
+    """
+    if len(patterns) == 1:
+        return compiled(patterns[0])
+    key = tuple(compiled(p).pattern for p in patterns)
+    if key not in _compiled_patterns:
+        _compiled_patterns[key] = None
+        if not any(_numbered_reference.search(p) for p in key):
+            try:
+                _compiled_patterns[key] = regex.compile("|".join(f"(?:{p})" for p in key))
+            except regex.error:
+                pass
+    return _compiled_patterns[key]
 
 def getGroups(pattern, line):
     """Gets regex groups listed in pattern from line (as a tuple).
 
+    Pattern can either be a string or a pre-compiled pattern.
+
     If only one group found, returns value (not tuple).
 
     If no groups are found, returns None.
     """
     groups = None
-    match = regex.search(pattern, line)
+    match = compiled(pattern).search(line)
     if match:
         groups = match.groups()
         if len(groups) == 1:
@@ -68,6 +225,9 @@ class StringParser:
     progress through the lines, can extract regex groups
     from a line match, and can even return entire sections
     specified by a start and end regex.
+
+    Every method that takes a regex accepts either a string
+    (compiled once and cached) or a pre-compiled pattern.
     """
 
     def __init__(self, lines):
@@ -91,13 +251,15 @@ class StringParser:
 
         Throws RegexNotFoundError if regex_str not found.
         """
+        pattern = compiled(regex_str)
+        end_pattern = compiled(end_regex) if end_regex else None
         index = self.current_line + 1
         while index < len(self.lines):
 
-            if end_regex and regex.search(end_regex, self.lines[index]):
+            if end_pattern and end_pattern.search(self.lines[index]):
                 raise RegexNotFoundError
 
-            groups = getGroups(regex_str, self.lines[index])
+            groups = getGroups(pattern, self.lines[index])
             #print(f"index = {index}, len = {len(self.lines)}, groups = {groups}")
             if groups is not None:
                 self.current_line = index
@@ -113,10 +275,11 @@ class StringParser:
 
         Throws RegexNotFoundError if end of file reached (no matches found).
         """
+        pattern = compiled(regex_str)
         index = self.current_line + 1
         consumed_lines = []
         while index < len(self.lines):
-            if regex.search(regex_str, self.lines[index]):
+            if pattern.search(self.lines[index]):
                 return consumed_lines
             consumed_lines.append(self.lines[index])
             index += 1
@@ -149,7 +312,7 @@ class StringParser:
 
         Throws RegexNotFoundError if no matches found.
         """
-        return_line_fn = lambda i, s: self.lines[i] if regex.search(s, self.lines[i]) else None
+        return_line_fn = lambda i, p: self.lines[i] if p.search(self.lines[i]) else None
         return self._findBase(return_line_fn, *regex_strings)
 
     def findGroups(self, *regex_strings):
@@ -159,7 +322,7 @@ class StringParser:
 
         Throws RegexNotFoundError if no matches found.
         """
-        return_groups_fn = lambda i, s: getGroups(s, self.lines[i])
+        return_groups_fn = lambda i, p: getGroups(p, self.lines[i])
         return self._findBase(return_groups_fn, *regex_strings)
 
     def findIndex(self, *regex_strings):
@@ -168,19 +331,25 @@ class StringParser:
 
         Throws RegexNotFoundError if no matches found.
         """
-        return_index_fn = lambda i, s: i if regex.search(s, self.lines[i]) else None
+        return_index_fn = lambda i, p: i if p.search(self.lines[i]) else None
         return self._findBase(return_index_fn, *regex_strings)
 
     def _findBase(self, for_each_fn, *regex_strings):
         """The private base function for all find operations.
+
+        All 'regex_strings' are combined into one alternation so each line
+        is only searched once; the individual patterns are only tried on
+        lines that the combined pattern matched.
         """
-        index = 0
-        while index < len(self.lines):
-            for regex_str in regex_strings:
-                result = for_each_fn(index, regex_str)
+        patterns = [compiled(r) for r in regex_strings]
+        any_pattern = combined(*patterns)
+        for index, line in enumerate(self.lines):
+            if any_pattern is not None and not any_pattern.search(line):
+                continue
+            for pattern in patterns:
+                result = for_each_fn(index, pattern)
                 if result:
                     return result
-            index += 1
         raise RegexNotFoundError
 
 class FileParser(StringParser):
@@ -192,6 +361,6 @@ class FileParser(StringParser):
     Can optionally take a "custom_strip_fn" to apply to
     each line as it is processed and converted to a string.
     """
-    def __init__(self, file, custom_strip_fn=lambda x: x):
+    def __init__(self, file, custom_strip_fn=None):
         super().__init__(getLinesFromFile(file, custom_strip_fn=custom_strip_fn))
         self.file = file
\ No newline at end of file
@@ -0,0 +1,43 @@
+import collections
+import time
+from   typing import Generator, Mapping
+
+# How long (in ms) jobs may run before the event loop checks for input again
+SLICE_MS = 15
+
+class IdleScheduler:
+    """Small jobs run by the GUI thread while nothing else is happening.
+
+    A job is a generator: each next() does one bounded step of work, so the
+    scheduler can stop between steps once its time slice is used up. Jobs
+    run round robin, and adding a job under a key that's already scheduled
+    replaces it (e.g. pre-rendering for a selection that has since changed).
+    """
+    def __init__(self):
+        self.jobs : Mapping[str, Generator] = collections.OrderedDict()
+
+    def add(self, key, job : Generator):
+        self.jobs.pop(key, None)
+        self.jobs[key] = job
+
+    def cancel(self, key):
+        self.jobs.pop(key, None)
+
+    def pending(self) -> bool:
+        return len(self.jobs) > 0
+
+    def runFor(self, budget_ms=SLICE_MS):
+        """Runs job steps until the budget is used up or there's nothing left to do."""
+        deadline = time.perf_counter() + budget_ms / 1000
+        while self.jobs and time.perf_counter() < deadline:
+            key, job = next(iter(self.jobs.items()))
+            # To the back of the queue, so one long job doesn't starve the rest
+            self.jobs.move_to_end(key)
+            try:
+                next(job)
+            except StopIteration:
+                # Unless it was replaced while it ran
+                if self.jobs.get(key) is job:
+                    del self.jobs[key]
+
+instance = IdleScheduler()
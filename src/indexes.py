@@ -0,0 +1,290 @@
+import collections
+import sys
+from   typing import Iterable, List, Mapping, Tuple
+
+import numpy
+
+from src import pokemon
+
+####################################################
+class NameTable:
+    """Assigns dense integer ids to (interned) names, in order of first sighting."""
+    def __init__(self):
+        self.names : List[str] = []
+        self.ids : Mapping[str, int] = {}
+
+    def id(self, name) -> int:
+        """Returns the id for 'name', assigning the next free id if it hasn't been seen yet."""
+        if name not in self.ids:
+            self.ids[name] = len(self.names)
+            self.names.append(sys.intern(name))
+        return self.ids[name]
+
+    def get(self, name, default=None):
+        return self.ids.get(name, default)
+
+    def name(self, id) -> str:
+        return self.names[id]
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def __len__(self):
+        return len(self.names)
+
+####################################################
+class EncounterTable:
+    """Every wild and static occurrence as parallel (columnar) arrays, one row each:
+    pokemon id, sublocation id (and its location id), classification id,
+    min level, max level and rate.
+
+    Unknown values (e.g. the levels and sublocation of a static encounter)
+    are stored as -1. Views are computed with a vectorized group-by over a
+    column instead of walking the Location -> Sublocation -> occurrence tree.
+    """
+    def __init__(self):
+        self.classifications = NameTable()
+        # row -> occurrence object (what the GUI displays)
+        self.occurrences : List[pokemon.WildOccurrence] = []
+        self.pkmn_ids = numpy.empty(0, dtype=numpy.int32)
+        self.sublocation_ids = numpy.empty(0, dtype=numpy.int32)
+        self.location_ids = numpy.empty(0, dtype=numpy.int32)
+        self.classification_ids = numpy.empty(0, dtype=numpy.int16)
+        self.min_levels = numpy.empty(0, dtype=numpy.int16)
+        self.max_levels = numpy.empty(0, dtype=numpy.int16)
+        self.rates = numpy.empty(0, dtype=numpy.int16)
+        # Cached groupings, keyed by name
+        self._groupings = {}
+
+    def __len__(self):
+        return len(self.occurrences)
+
+    def add(self, occurrences : Iterable[pokemon.WildOccurrence]):
+        """Appends a row per occurrence. pkmn_id must already be resolved (or None)."""
+        occurrences = list(occurrences)
+        count = len(occurrences)
+        def column(values, dtype):
+            return numpy.fromiter(values, dtype=dtype, count=count)
+        def unknown(value):
+            return -1 if value is None else value
+
+        self.occurrences.extend(occurrences)
+        self.pkmn_ids = numpy.concatenate((self.pkmn_ids, column((unknown(wo.pkmn_id) for wo in occurrences), numpy.int32)))
+        self.sublocation_ids = numpy.concatenate((self.sublocation_ids, column((unknown(getattr(wo.location, "id", None)) for wo in occurrences), numpy.int32)))
+        self.location_ids = numpy.concatenate((self.location_ids, column((unknown(getattr(wo.location, "location_id", None)) for wo in occurrences), numpy.int32)))
+        self.classification_ids = numpy.concatenate((self.classification_ids, column((self.classifications.id(wo.location.classification) for wo in occurrences), numpy.int16)))
+        # Levels are stored sorted, so the ends are the min and max
+        self.min_levels = numpy.concatenate((self.min_levels, column((wo.levels[0] if wo.levels else -1 for wo in occurrences), numpy.int16)))
+        self.max_levels = numpy.concatenate((self.max_levels, column((wo.levels[-1] if wo.levels else -1 for wo in occurrences), numpy.int16)))
+        self.rates = numpy.concatenate((self.rates, column((unknown(wo.location.rate) for wo in occurrences), numpy.int16)))
+        self._groupings = {}
+
+    def groupBy(self, name, keys : numpy.ndarray, size) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """Groups rows by 'keys' (one non-negative int per row, or -1 to leave the row out).
+
+        Returns (order, starts): the rows of group g are order[starts[g]:starts[g+1]],
+        in their original order. Cached under 'name' until more rows are added.
+        """
+        if name not in self._groupings:
+            order = numpy.argsort(keys, kind="stable")
+            # -1 keys sort first, before the start of group 0
+            starts = numpy.searchsorted(keys[order], numpy.arange(size + 1), side="left")
+            self._groupings[name] = (order, starts)
+        return self._groupings[name]
+
+    def groups(self, name, keys : numpy.ndarray, size) -> List[List[pokemon.WildOccurrence]]:
+        """The occurrences in every group of groupBy (size lists)."""
+        order, starts = self.groupBy(name, keys, size)
+        return [[self.occurrences[row] for row in order[start:end]] for start, end in zip(starts[:-1], starts[1:])]
+
+    def _levelOrders(self) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """Levelled rows sorted by min level and by max level, with the sorted levels
+        (cached until more rows are added).
+        """
+        if "level_orders" not in self._groupings:
+            levelled = numpy.flatnonzero(self.max_levels >= 0)
+            by_min = levelled[numpy.argsort(self.min_levels[levelled], kind="stable")]
+            by_max = levelled[numpy.argsort(self.max_levels[levelled], kind="stable")]
+            self._groupings["level_orders"] = (by_min, self.min_levels[by_min], by_max, self.max_levels[by_max])
+        return self._groupings["level_orders"]
+
+    def rowsByLevel(self, min_level=None, max_level=None, classifications=None, location_ids=None) -> numpy.ndarray:
+        """Rows whose level range overlaps [min_level, max_level], in row order.
+
+        Either bound may be None to leave that side open. With one bound, the
+        rows are a slice of the min (or max) sorted order, found by binary
+        search; with both, the smaller of the two slices is checked against the
+        other bound. Rows with no known level (e.g. most statics) are only
+        returned when both bounds are open.
+        """
+        by_min, sorted_mins, by_max, sorted_maxs = self._levelOrders()
+        if min_level is None and max_level is None:
+            rows = numpy.arange(len(self), dtype=numpy.intp)
+        else:
+            # Everything before 'starts_below' starts at or below max_level...
+            starts_below = len(by_min) if max_level is None else int(numpy.searchsorted(sorted_mins, max_level, side="right"))
+            # ...and everything from 'ends_above' ends at or above min_level
+            ends_above = 0 if min_level is None else int(numpy.searchsorted(sorted_maxs, min_level, side="left"))
+            if starts_below <= len(by_max) - ends_above:
+                rows = by_min[:starts_below]
+                if min_level is not None:
+                    rows = rows[self.max_levels[rows] >= min_level]
+            else:
+                rows = by_max[ends_above:]
+                if max_level is not None:
+                    rows = rows[self.min_levels[rows] <= max_level]
+            rows = numpy.sort(rows)
+
+        if classifications is not None:
+            classification_ids = [self.classifications.get(c) for c in classifications if c in self.classifications]
+            rows = rows[numpy.isin(self.classification_ids[rows], classification_ids)]
+        if location_ids is not None:
+            rows = rows[numpy.isin(self.location_ids[rows], list(location_ids))]
+        return rows
+
+    def levelRanges(self, keys : numpy.ndarray, size, name=None) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """Lowest min level and highest max level per group (-1 if no levelled rows).
+        Cached under 'name' (if given) until more rows are added.
+        """
+        if name is not None:
+            if name not in self._groupings:
+                self._groupings[name] = self.levelRanges(keys, size)
+            return self._groupings[name]
+        levelled = (keys >= 0) & (self.min_levels >= 0)
+        mins = numpy.full(size, numpy.iinfo(numpy.int16).max, dtype=numpy.int16)
+        maxs = numpy.full(size, -1, dtype=numpy.int16)
+        numpy.minimum.at(mins, keys[levelled], self.min_levels[levelled])
+        numpy.maximum.at(maxs, keys[levelled], self.max_levels[levelled])
+        mins[maxs < 0] = -1
+        return mins, maxs
+
+####################################################
+class TrainerTable:
+    """Every trainer's team, flattened into two columns (pokemon id, level);
+    trainer i's team is rows offsets[i]:offsets[i+1].
+
+    Pokemon the database doesn't know are stored as -1.
+    """
+    def __init__(self, trainers : List[Tuple[str, str, List[Tuple[str, int]]]] = (), pokemon_ids : NameTable = None):
+        trainers = list(trainers)
+        self.nums : List[str] = [num for num, _, _ in trainers]
+        self.names : List[str] = [sys.intern(name) for _, name, _ in trainers]
+        self.offsets = numpy.zeros(len(trainers) + 1, dtype=numpy.int32)
+        numpy.cumsum([len(team) for _, _, team in trainers], out=self.offsets[1:])
+        members = [member for _, _, team in trainers for member in team]
+        self.pkmn_ids = numpy.fromiter((pokemon_ids.get(pkmn_name, -1) for pkmn_name, _ in members), dtype=numpy.int32, count=len(members))
+        self.levels = numpy.fromiter((level for _, level in members), dtype=numpy.int16, count=len(members))
+        self._by_pokemon = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def displayName(self, index) -> str:
+        return f"#{self.nums[index]} {self.names[index]}"
+
+    def team(self, index) -> List[Tuple[int, int]]:
+        """[(pkmn id, level)] of a trainer's team, in order."""
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return list(zip(self.pkmn_ids[start:end].tolist(), self.levels[start:end].tolist()))
+
+    def trainersUsing(self, pkmn_id) -> List[int]:
+        """Indexes of every trainer with the pokemon on their team (in trainer order)."""
+        if self._by_pokemon is None:
+            # row -> trainer, then rows grouped by pokemon id (like EncounterTable.groupBy)
+            trainer_of_row = numpy.repeat(numpy.arange(len(self), dtype=numpy.int32), numpy.diff(self.offsets))
+            order = numpy.argsort(self.pkmn_ids, kind="stable")
+            size = int(self.pkmn_ids.max()) + 1 if len(self.pkmn_ids) else 0
+            starts = numpy.searchsorted(self.pkmn_ids[order], numpy.arange(size + 1), side="left")
+            self._by_pokemon = (trainer_of_row[order], starts)
+        trainers, starts = self._by_pokemon
+        if pkmn_id is None or not 0 <= pkmn_id < len(starts) - 1:
+            return []
+        return numpy.unique(trainers[starts[pkmn_id]:starts[pkmn_id + 1]]).tolist()
+
+####################################################
+class MachineTable:
+    """TM/HM moves and which pokemon can learn them, as bitsets.
+
+    compatibility[pkmn id] is a fixed-width row of 64-bit words with bit m set
+    if the pokemon can learn machine m, so "who can learn all of these" is an
+    AND across the whole dex. The transpose (machine -> packed bits over
+    pokemon ids) gives each move's TM learners as a single bit test.
+    """
+    WORD_BITS = 64
+
+    def __init__(self, tm_moves : List[Tuple[str, str]] = (), compatibility : List[Tuple[str, List[str]]] = (), pokemon_ids : NameTable = None):
+        self.machines = NameTable()
+        # machine id -> move name
+        self.move_names : List[str] = []
+        for machine, move_name in tm_moves:
+            self.machines.id(machine)
+            self.move_names.append(sys.intern(move_name))
+        # Machines only named by the compatibility table (e.g. unlisted HMs) teach unknown moves
+        for _, machines in compatibility:
+            for machine in machines:
+                if machine not in self.machines:
+                    self.machines.id(machine)
+                    self.move_names.append("")
+
+        pokemon_count = len(pokemon_ids) if pokemon_ids is not None else 0
+        self.word_count = max(1, -(-len(self.machines) // self.WORD_BITS))
+        compatible = numpy.zeros((pokemon_count, self.word_count * self.WORD_BITS), dtype=bool)
+        for pkmn_name, machines in compatibility:
+            pkmn_id = pokemon_ids.get(pkmn_name)
+            if pkmn_id is not None:
+                compatible[pkmn_id, [self.machines.get(machine) for machine in machines]] = True
+        # Bit m of the row is machine m (little endian bit and word order)
+        self.compatibility = numpy.packbits(compatible, axis=1, bitorder="little").view("<u8").astype(numpy.uint64).reshape(pokemon_count, self.word_count)
+        # machine id -> packed bits over pokemon ids
+        self.learners = numpy.packbits(compatible[:, :len(self.machines)].T, axis=1, bitorder="little")
+
+        # move name -> [machine id], and the packed union of their learners
+        self.machines_by_move : Mapping[str, List[int]] = collections.defaultdict(list)
+        for machine_id, move_name in enumerate(self.move_names):
+            if move_name:
+                self.machines_by_move[move_name].append(machine_id)
+        self.machines_by_move = dict(self.machines_by_move)
+        self.move_learners = {move_name: numpy.bitwise_or.reduce(self.learners[machine_ids], axis=0)
+                              for move_name, machine_ids in self.machines_by_move.items()}
+
+    def __len__(self):
+        return len(self.machines)
+
+    def machinesOf(self, move_name) -> List[str]:
+        return [self.machines.name(machine_id) for machine_id in self.machines_by_move.get(move_name, [])]
+
+    def queryWords(self, machines) -> numpy.ndarray:
+        """Bitset row with the given machines set.
+
+        Throws KeyError for machines this table doesn't have (a typo would
+        otherwise quietly widen a query).
+        """
+        unknown = [machine for machine in machines if machine not in self.machines]
+        if unknown:
+            raise KeyError(f"Unknown machines {', '.join(unknown)}")
+        words = numpy.zeros(self.word_count, dtype=numpy.uint64)
+        for machine in machines:
+            machine_id = self.machines.get(machine)
+            words[machine_id // self.WORD_BITS] |= numpy.uint64(1 << (machine_id % self.WORD_BITS))
+        return words
+
+    def compatibleWith(self, machines) -> numpy.ndarray:
+        """Pokemon ids that can learn every one of the given machines (none, if no machines are given)."""
+        words = self.queryWords(machines)
+        if not words.any():
+            return numpy.empty(0, dtype=numpy.intp)
+        return numpy.flatnonzero(((self.compatibility & words) == words).all(axis=1))
+
+    def canLearn(self, move_name, pkmn_id) -> bool:
+        """Whether the pokemon can learn the move from any TM/HM."""
+        packed = self.move_learners.get(move_name)
+        if packed is None or pkmn_id is None or pkmn_id // 8 >= len(packed):
+            return False
+        return bool(packed[pkmn_id // 8] >> (pkmn_id % 8) & 1)
+
+    def learnersOf(self, move_name) -> numpy.ndarray:
+        """Pokemon ids that can learn the move from any TM/HM."""
+        packed = self.move_learners.get(move_name)
+        if packed is None:
+            return numpy.empty(0, dtype=numpy.intp)
+        return numpy.flatnonzero(numpy.unpackbits(packed, bitorder="little"))
@@ -0,0 +1,295 @@
+import collections
+import functools
+import hashlib
+import os
+import pathlib
+from   typing import Mapping, Set, Tuple
+
+from src import database, parsers
+from src.external.parsers import getBytesFromFile
+
+class LogIngester:
+    """Runs the RandomizerLogParser extractors over a log file and assembles
+    the results into a Database.
+
+    A hash of every section is kept between runs, so refreshing a database
+    after the log has been regenerated only re-runs the extractors whose
+    section actually changed.
+
+    By default only the pokemon section is extracted up front; every other
+    section is deferred on the database (see Database.defer) and parsed the
+    first time something reads it, or when the database is warmed.
+    """
+    SECTIONS = ("pokemon", "moves", "movesets", "locations", "statics", "tm_moves", "tm_compatibility")
+    # Database section -> the log sections it's built from, for everything that can be deferred
+    DEFERRED_SECTIONS = {
+        "moves": ("moves",),
+        "movesets": ("movesets",),
+        "encounters": ("locations", "statics"),
+        "machines": ("tm_moves", "tm_compatibility"),
+    }
+    # Only located (and hashed) on ingest; parsed the first time the database is asked for them
+    LAZY_SECTIONS = ("trainers",)
+
+    def __init__(self, path : pathlib.Path, lazy : bool = True):
+        self.path = pathlib.Path(path)
+        # False extracts (and applies) every section up front
+        self.lazy = lazy
+        self.header : parsers.LogHeader = None
+        # Hash of the whole log, as of the last refresh (identifies the seed)
+        self.log_hash : str = None
+        self.section_hashes : Mapping[str, bytes] = {}
+        # Extractor output of each section that hasn't been applied to the database yet
+        # (plus the pokemon, which everything else is re-applied on top of)
+        self.results = {}
+
+    def ingest(self) -> database.Database:
+        """Parses the whole log into a brand new Database.
+
+        Throws parsers.InvalidFormatError if the file isn't a randomizer log.
+        """
+        db = database.Database()
+        db.source_location = self.path
+        self.section_hashes = {}
+        self.results = {}
+        self.refresh(db)
+        return db
+
+    def refresh(self, db : database.Database) -> Set[str]:
+        """Re-reads the log and patches 'db' in place, re-running only the
+        extractors whose section content changed since the last run.
+
+        Returns the names of the sections that changed.
+        """
+        header = parsers.RandomizerLogParser.sniff(self.path)
+        data = getBytesFromFile(self.path)
+        log_hash = hashlib.blake2b(data, digest_size=16).hexdigest()
+        if data.count(b"\r") != data.count(b"\r\n"):
+            # Sections are split on '\n', so lone '\r' line endings are made '\n' first
+            data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+        if header.pokemon_version is None:
+            # The tail isn't sniffed for compressed logs
+            header.pokemon_version = parsers.RandomizerLogParser.findPokemonVersion(data)
+        sections = parsers.RandomizerLogParser.splitSections(data)
+        if "pokemon" not in sections:
+            raise parsers.InvalidFormatError
+        # Found before anything is touched, so a half written log leaves the section hashes alone
+        ingester = parsers.RandomizerLogParser.fromSection(b"", header)
+        randomizer_version = ingester.extractRandomizerVersion()
+        pokemon_version = ingester.extractPokemonVersion()
+
+        # Nothing may be materialising (e.g. in a background warm) while the database is patched
+        with db.lock:
+            previous_versions = (self.header.randomizer_version, self.header.pokemon_version) if self.header else None
+            if (header.randomizer_version, header.pokemon_version) != previous_versions:
+                # A different randomizer/game may lay sections out differently; start over
+                self.section_hashes = {}
+            self.header = header
+            self.log_hash = log_hash
+
+            db.setRandomizerVersion(randomizer_version)
+            print(f"Detected randomizer version {db.randomizerVerionStr()}")
+            db.setPokemonVersion(pokemon_version)
+            print(f"Detected pokemon version {db.version}")
+
+            # Only sections whose raw bytes changed get decoded and parsed
+            section_hashes = {name: hashlib.blake2b(sections.get(name, b"")).digest() for name in (*self.SECTIONS, *self.LAZY_SECTIONS)}
+            changed = {name for name in self.SECTIONS if section_hashes[name] != self.section_hashes.get(name)}
+            lazy_changed = {name for name in self.LAZY_SECTIONS if section_hashes[name] != self.section_hashes.get(name)}
+            for name in changed:
+                self.results.pop(name, None)
+            # Lazily, only the pokemon are extracted now; the rest waits for the database to ask
+            extract_now = changed if not self.lazy else changed & {"pokemon"}
+            self.results.update(self._extractAll({name: sections.get(name, b"") for name in extract_now}, header))
+            self.section_hashes = section_hashes
+
+            self._assemble(db, changed, sections, header)
+            if "trainers" in lazy_changed:
+                db.setTrainerSource(functools.partial(extractSection, "trainers", sections.get("trainers", b""), header))
+            if not self.lazy:
+                db.materialiseAll()
+        return changed | lazy_changed
+
+    def _extractAll(self, sections : Mapping[str, bytes], header : parsers.LogHeader):
+        return {name: extractSection(name, data, header) for name, data in sections.items()}
+
+    def _assemble(self, db : database.Database, changed : Set[str], sections : Mapping[str, bytes], header : parsers.LogHeader):
+        """Applies the pokemon section (if it changed) to db, and defers every
+        other database section built from anything in 'changed'.
+        """
+        changed = set(changed)
+        if "pokemon" in changed:
+            # Everything else hangs off the pokemon objects, so it all has to be re-applied
+            changed |= {"movesets", "locations", "statics", "tm_compatibility"}
+            db.clearPokemon()
+            db.addPokemon(self.results["pokemon"])
+        for db_section, log_sections in self.DEFERRED_SECTIONS.items():
+            if changed.intersection(log_sections):
+                db.defer(db_section, functools.partial(self._materialise, db, db_section, {name: sections.get(name, b"") for name in log_sections}, header))
+
+    def _materialise(self, db : database.Database, db_section, sections : Mapping[str, bytes], header : parsers.LogHeader):
+        """Extracts whatever 'db_section' needs that hasn't been already, and applies it to db."""
+        self.results.update(self._extractAll({name: data for name, data in sections.items() if name not in self.results}, header))
+        if db_section == "moves":
+            db.clearMoves()
+            db.addMoves(self.results["moves"])
+        elif db_section == "movesets":
+            # Moves get their ids first, as they would have when applied in order
+            db.materialise("moves")
+            db.addMovesets(self.results["movesets"])
+        elif db_section == "encounters":
+            db.clearEncounters()
+            db.addLocations(self.results["locations"])
+            # Add wild occurrences to pokemon
+            db.addWildOccurrencesToPokemon()
+            # Add static encounters to pokemon
+            db.addStaticPokemonEncounters(self.results["statics"])
+        elif db_section == "machines":
+            db.addMachines(self.results["tm_moves"], self.results["tm_compatibility"])
+        else:
+            assert False, f"Unknown database section {db_section}"
+        # The database holds what was built from the records now; if the pokemon
+        # change, the section is re-extracted from the bytes it was deferred with
+        for name in sections:
+            self.results.pop(name, None)
+
+####################################################
+class LoadedLogs:
+    """Least-recently-used map of every log loaded this session (keyed by path
+    and log hash, so re-randomizing to the same path loads a second seed instead
+    of replacing the first) to its LogIngester and Database, so switching
+    between seeds doesn't re-parse anything.
+
+    Bounded by both a count and the databases' estimated memory; the most
+    recently used log is never evicted.
+    """
+    def __init__(self, max_count=4, max_bytes=256 * 1024 * 1024):
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.entries : Mapping[str, Tuple[LogIngester, database.Database]] = collections.OrderedDict()
+
+    @staticmethod
+    def key(ingester : LogIngester) -> str:
+        """"[<log hash>] <path>" (what the Home tab shows), hash first so it's never cut off."""
+        return f"[{ingester.log_hash[:12]}] {pathlib.Path(ingester.path).resolve()}"
+
+    def add(self, ingester : LogIngester, db : database.Database) -> str:
+        """Adds (or re-keys, if a watched log has changed since) a loaded log."""
+        for key, (loaded_ingester, _) in list(self.entries.items()):
+            if loaded_ingester is ingester:
+                del self.entries[key]
+        key = self.key(ingester)
+        self.entries[key] = (ingester, db)
+        self.entries.move_to_end(key)
+        self._evict()
+        return key
+
+    def get(self, key) -> Tuple[LogIngester, database.Database]:
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def keys(self):
+        """Most recently used first."""
+        return list(reversed(self.entries.keys()))
+
+    def estimatedBytes(self):
+        return sum(db.estimatedBytes() for _, db in self.entries.values())
+
+    def _evict(self):
+        while len(self.entries) > 1 and (len(self.entries) > self.max_count or self.estimatedBytes() > self.max_bytes):
+            key, _ = self.entries.popitem(last=False)
+            print(f"Unloaded {key}")
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+####################################################
+## Section extraction
+####################################################
+def extractSection(section, data : bytes, header : parsers.LogHeader):
+    """Runs the extractor for one section over that section's raw bytes
+    (see RandomizerLogParser.splitSections), returning model objects (pokemon
+    and moves) or records of names (everything else; the database resolves
+    those to ids as it applies them).
+    """
+    ingester = parsers.RandomizerLogParser.fromSection(data, header)
+    zx = header.zxRandomizer()
+    if section == "pokemon":
+        # TODO: Ingester should just return list
+        pkmn = list(ingester.extractPokemon(zx).values())
+        print(f"Extracted {len(pkmn)} pokemon")
+        return pkmn
+    elif section == "moves":
+        try:
+            # TODO: Ingester should just return list
+            moves = list(ingester.extractMoves().values())
+            print(f"Extracted {len(moves)} moves")
+            return moves
+        except parsers.RegexNotFoundError:
+            print(f"Moves are unchanged... skipping")
+            return []
+    elif section == "movesets":
+        movesets = ingester.extractMovesetsZX() if zx else ingester.extractMovesets()
+        print(f"Extracted movesets for {len(movesets)} pokemon{' (ZX)' if zx else ''}")
+        return movesets
+    elif section == "locations":
+        locations = ingester.extractLocationsZX(header.pokemon_version) if zx else ingester.extractLocations()
+        print(f"Extracted {len(locations)} locations{' (ZX)' if zx else ''}")
+        return locations
+    elif section == "statics":
+        return ingester.extractStaticOccurrencesZX(header.pokemon_version) if zx else ingester.extractStaticOccurrences()
+    elif section == "tm_moves":
+        if not data:
+            return []
+        tm_moves = ingester.extractTMMoves()
+        print(f"Extracted {len(tm_moves)} TM/HM moves")
+        return tm_moves
+    elif section == "tm_compatibility":
+        if not data:
+            return []
+        compatibility = ingester.extractTMCompatibility()
+        print(f"Extracted TM compatibility for {len(compatibility)} pokemon")
+        return compatibility
+    elif section == "trainers":
+        if not data:
+            return []
+        trainers = ingester.extractTrainers()
+        print(f"Extracted {len(trainers)} trainers")
+        return trainers
+    else:
+        assert False, f"Unknown section {section}"
+
+####################################################
+class LogWatcher:
+    """Polls a log file's size and modification time (no OS-specific notifiers),
+    and refreshes the database through its LogIngester whenever it changes.
+    """
+    def __init__(self, ingester : LogIngester, db : database.Database):
+        self.ingester = ingester
+        self.db = db
+        self.last_stat = self._stat()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.ingester.path)
+        except OSError:
+            return None
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def poll(self) -> Set[str]:
+        """Returns the sections that changed (and were re-ingested) since the last poll."""
+        stat = self._stat()
+        if stat is None or stat == self.last_stat:
+            return set()
+        try:
+            changed = self.ingester.refresh(self.db)
+        except (OSError, UnicodeDecodeError, parsers.InvalidFormatError, parsers.RegexNotFoundError) as e:
+            # Most likely caught the randomizer half way through writing (or replacing)
+            # the log; leave last_stat alone so the next poll tries again.
+            print(f"Couldn't re-ingest {self.ingester.path.name}: {e!r}")
+            return set()
+        self.last_stat = stat
+        return changed
@@ -1,34 +1,197 @@
 import collections
 import itertools
 import pprint
-from   typing import Mapping, List
+import re as regex
+from   typing import Mapping, List, Tuple
 
 from src import pokemon
 from src.external import parsers, utils
 from src.external.parsers import InvalidFormatError, RegexNotFoundError
 
+class LogHeader:
+    """What could be learned about a log from sniffing its start (and end)."""
+    def __init__(self, randomizer_version=None, pokemon_version : pokemon.Version = None):
+        self.randomizer_version = randomizer_version
+        self.pokemon_version = pokemon_version
+        # Whether the headers a valid log must have (see _header_regexes) were in the sniffed start
+        self.headers_found = False
+
+    def zxRandomizer(self):
+        return self.randomizer_version is not None and int(self.randomizer_version[0]) >= 4
+
+    def __repr__(self):
+        return f"LogHeader[{self.randomizer_version}, {self.pokemon_version}]"
+
 class RandomizerLogParser(parsers.FileParser):
     """ TODO: Documentation
     """
-    RANDOMIZER_VERSION_HEADER = r"Randomizer Version: (\d+).(\d+).(\d+)"
-    POKEMON_VERSION_HEADER = r"Randomization of Pokemon (\w+(?: \d)?).+completed"
-    POKEMON_DISPLAY_HEADER = r"Pokemon Base Stats & Types"
-    POKEMON_MOVE_HEADER = r"--Move Data--"
-    POKEMON_MOVESET_HEADER = r"Pokemon Movesets"
-    LOCATION_HEADER = r"Wild Pokemon"
-    WILD_POKEMON_HEADER = r"Wild Pokemon"
-    STATIC_POKEMON_HEADER = r"Static Pokemon"
+    # Headers (compiled once per class)
+    RANDOMIZER_VERSION_HEADER = regex.compile(r"Randomizer Version: (\d+).(\d+).(\d+)")
+    POKEMON_VERSION_HEADER = regex.compile(r"Randomization of Pokemon (\w+(?: \d)?).+completed")
+    POKEMON_DISPLAY_HEADER = regex.compile(r"Pokemon Base Stats & Types")
+    POKEMON_MOVE_HEADER = regex.compile(r"--Move Data--")
+    POKEMON_MOVESET_HEADER = regex.compile(r"Pokemon Movesets")
+    LOCATION_HEADER = regex.compile(r"Wild Pokemon")
+    WILD_POKEMON_HEADER = regex.compile(r"Wild Pokemon")
+    STATIC_POKEMON_HEADER = regex.compile(r"Static Pokemon")
+    TRAINER_HEADER = regex.compile(r"Trainers Pokemon")
+    TM_MOVES_HEADER = regex.compile(r"--TM Moves--")
+    TM_COMPATIBILITY_HEADER = regex.compile(r"--TM Compatibility--")
+
+    # Line patterns (compiled once per class)
+    MOVESET_ZX_PKMN_LINE = regex.compile(r"^\d+\s(.+)\s-> .+")
+    LOCATION_RATE_LINE = regex.compile(r"(.+)[(]rate=(\d+)[)]")
+    LOCATION_ZX_SET_LINE = regex.compile(r"^Set #(\d+) - (.+)[(]rate=(\d+)[)]")
+    LOCATION_ZX_PKMN_LINE = regex.compile(r"(.+)\s+HP.+")
+    STATIC_LINE = regex.compile(r"(\w+)([(]\d[)])? [=][>] (\w+)")
+    STATIC_ZX_HGSS_LINE = regex.compile(r"^([\w.-]+|Mr. Mime)(?:\(\d\)| \(egg\))? => ([\w.-]+|Mr. Mime)(?:\(\d\)| \(egg\))?")
+    STATIC_ZX_LINE = regex.compile(r"(\w+),? (?:Lv\d+(?:[(]\d[)])?|[(]egg[)]) [=][>] (\w+),? (?:Lv\d+|[(]egg[)])")
+    TRAINER_LINE = regex.compile(r"^#(\d+) [(](.+)[)] - (.+)$")
+    TRAINER_PKMN_ENTRY = regex.compile(r"^(.+?)(?:@.*)? Lv(\d+)")
+    TM_MOVE_LINE = regex.compile(r"^((?:TM|HM)\d+) (.+)$")
+    TM_COMPATIBILITY_LINE = regex.compile(r"^\s*\d+ (.+?)\s*[|](.*)$")
+
+    # Location name/classification patterns (compiled once per version)
+    _location_regexes = {}
+
+    # Any "--Section Name--" line marks the start of a new section
+    SECTION_DELIMITER = regex.compile(r"^--[^-].*--\s*$")
+
+    # How much of the start/end of a file to look at before committing to a full read
+    SNIFF_HEAD_BYTES = 64 * 1024
+    SNIFF_TAIL_BYTES = 4 * 1024
 
     def __init__(self, file):
+        # Reject obviously wrong files (ROMs, unrelated logs) before reading them in full
+        self.header = self.sniff(file)
         super().__init__(file)
         if not self._valid():
             raise parsers.InvalidFormatError
         pass
 
-    def _header_regexes(self):
-        return [self.POKEMON_DISPLAY_HEADER]
+    @classmethod
+    def sniff(cls, file) -> LogHeader:
+        """Reads only the start of the file (up to the stats header), plus the
+        last few KB of uncompressed files, to validate the format and pull out
+        the randomizer and game versions.
+
+        Throws InvalidFormatError if the file can't be a randomizer log.
+        """
+        head = parsers.getHeadLines(file, cls.SNIFF_HEAD_BYTES, stop_regex=cls.POKEMON_DISPLAY_HEADER)
+        head_parser = parsers.StringParser(head)
+        try:
+            head_parser.find(cls.RANDOMIZER_VERSION_HEADER, *cls._header_regexes())
+        except RegexNotFoundError:
+            raise InvalidFormatError
+
+        header = LogHeader()
+        try:
+            header.randomizer_version = head_parser.findGroups(cls.RANDOMIZER_VERSION_HEADER)
+        except RegexNotFoundError:
+            pass
+        try:
+            head_parser.find(*cls._header_regexes())
+            header.headers_found = True
+        except RegexNotFoundError:
+            pass
+
+        # The game version is normally the last thing written to the log
+        for lines in (parsers.getTailLines(file, cls.SNIFF_TAIL_BYTES), head):
+            header.pokemon_version = cls._parsePokemonVersion(lines)
+            if header.pokemon_version is not None:
+                break
+        return header
+
+    @classmethod
+    def _parsePokemonVersion(cls, lines):
+        try:
+            return pokemon.Version.parse(parsers.StringParser(lines).findGroups(cls.POKEMON_VERSION_HEADER))
+        except (RegexNotFoundError, AssertionError):
+            return None
+
+    @classmethod
+    def findPokemonVersion(cls, data : bytes) -> pokemon.Version:
+        """Finds the game version anywhere in a raw (undecoded) log, or None."""
+        match = parsers.compiled(cls.POKEMON_VERSION_HEADER.pattern.encode("utf-8")).search(data)
+        if match is None:
+            return None
+        return cls._parsePokemonVersion([match.group(0).decode("utf-8")])
+
+    @classmethod
+    def _header_regexes(cls):
+        return [cls.POKEMON_DISPLAY_HEADER]
+
+    @classmethod
+    def _locationRegex(cls, version : pokemon.Version = None):
+        if version not in cls._location_regexes:
+            joined_sublocation_str = '|'.join(pokemon.Sublocation.classifications(version))
+            cls._location_regexes[version] = regex.compile(fr"\s*(.+)\s+({joined_sublocation_str})")
+        return cls._location_regexes[version]
+
+    @classmethod
+    def sectionHeaders(cls):
+        """Section name -> header pattern for every section the extractors read."""
+        return {
+            "pokemon": cls.POKEMON_DISPLAY_HEADER,
+            "moves": cls.POKEMON_MOVE_HEADER,
+            "movesets": cls.POKEMON_MOVESET_HEADER,
+            "locations": cls.WILD_POKEMON_HEADER,
+            "statics": cls.STATIC_POKEMON_HEADER,
+            "tm_moves": cls.TM_MOVES_HEADER,
+            "tm_compatibility": cls.TM_COMPATIBILITY_HEADER,
+            "trainers": cls.TRAINER_HEADER,
+        }
+
+    @classmethod
+    def splitSections(cls, data : bytes) -> Mapping[str, bytes]:
+        """Splits a raw (undecoded) log into section name -> raw section bytes,
+        for every section whose header can be found.
+
+        A section runs from its header line up to the next section delimiter
+        or known header (or the end of the file). Everything is located with
+        searches over the raw buffer, so nothing is decoded or split into lines.
+        """
+        starts = {}
+        for name, header in cls.sectionHeaders().items():
+            match = parsers.compiled(header.pattern.encode("utf-8")).search(data)
+            if match:
+                starts[name] = data.rfind(b"\n", 0, match.start()) + 1
+
+        boundaries = set(starts.values())
+        delimiter = parsers.compiled(cls.SECTION_DELIMITER.pattern.encode("utf-8"))
+        index = data.find(b"\n--")
+        while index != -1:
+            line_start = index + 1
+            line_end = data.find(b"\n", line_start)
+            line_end = len(data) if line_end == -1 else line_end
+            if delimiter.search(data[line_start:line_end].rstrip(b"\r")):
+                boundaries.add(line_start)
+            index = data.find(b"\n--", line_end)
+        boundaries = sorted(boundaries)
+
+        sections = {}
+        for name, start in starts.items():
+            end = next((b for b in boundaries if b > start), len(data))
+            sections[name] = data[start:end]
+        return sections
+
+    @classmethod
+    def fromSection(cls, data : bytes, header : LogHeader = None):
+        """Creates a parser over the raw bytes of a single section (see splitSections),
+        skipping the file read and validation. The extractor for that section can
+        then be run on it as usual.
+        """
+        parser = cls.__new__(cls)
+        # A trailing empty line guarantees the extractors' "until empty line" loops stop
+        parsers.StringParser.__init__(parser, parsers.decodeLines(data) + ["\n"])
+        parser.file = None
+        parser.header = header or LogHeader()
+        return parser
 
     def _valid(self):
+        # Only logs whose headers weren't within the sniffed start need the whole file searched
+        if self.header.headers_found:
+            return True
         try:
             self.find(*self._header_regexes())
             return True
@@ -36,6 +199,8 @@ class RandomizerLogParser(parsers.FileParser):
             return False
 
     def extractRandomizerVersion(self):
+        if self.header.randomizer_version is not None:
+            return self.header.randomizer_version
         self.reset()
         try:
             return self.moveAndGetGroups(self.RANDOMIZER_VERSION_HEADER)
@@ -43,6 +208,8 @@ class RandomizerLogParser(parsers.FileParser):
             return "0","0","0"
 
     def extractPokemonVersion(self) -> pokemon.Version:
+        if self.header.pokemon_version is not None:
+            return self.header.pokemon_version
         self.reset()
         version_str = self.moveAndGetGroups(self.POKEMON_VERSION_HEADER)
         return pokemon.Version.parse(version_str)
@@ -77,7 +244,7 @@ class RandomizerLogParser(parsers.FileParser):
                 assert len(pkmn_pieces) in (12,13), f"Expected(12/13) vs Actual({len(pkmn_pieces)})"
 
             num = pkmn_pieces[0]
-            name = pokemon.fix_unicode_name(pkmn_pieces[1])
+            name = pkmn_pieces[1]
             types = pkmn_pieces[2].split("/")
             stats = pkmn_pieces[3:9]
             # MAX TODO: It's a bit ugly to do it this way. Gotta find a better way.
@@ -128,7 +295,8 @@ class RandomizerLogParser(parsers.FileParser):
             self.current_line += 1
         return extracted_moves
 
-    def extractMovesets(self):
+    def extractMovesets(self) -> List[Tuple[str, List[int], List[str]]]:
+        """[(pkmn name, levels, move names)], each moveset sorted by level."""
         # Move marker back to start
         self.reset()
 
@@ -147,19 +315,20 @@ class RandomizerLogParser(parsers.FileParser):
                 break
 
             pkmn, raw_moveset = line.split(':')
-            pkmn_name = pokemon.fix_unicode_name(pkmn[4:].strip())
+            pkmn_name = pkmn[4:].strip()
 
-            curr_moveset = pokemon.Moveset(pkmn_name)
+            level_move_mappings = []
             for learned_move_string in raw_moveset.split(','):
                 learned_move_string = learned_move_string.strip()
                 move_name, level = learned_move_string.strip().split("at level")
-                curr_moveset.addMapping(int(level), move_name.strip())
-            movesets.append(curr_moveset)
+                level_move_mappings.append((int(level), move_name.strip()))
+            movesets.append(self._movesetRecord(pkmn_name, level_move_mappings))
 
             self.current_line += 1
         return movesets
 
-    def extractMovesetsZX(self):
+    def extractMovesetsZX(self) -> List[Tuple[str, List[int], List[str]]]:
+        """[(pkmn name, levels, move names)], each moveset sorted by level."""
         # Move marker back to start
         self.reset()
 
@@ -174,28 +343,35 @@ class RandomizerLogParser(parsers.FileParser):
         while True:
             # Find next pokemon
             line = self.lines[self.current_line]
-            pkmn = parsers.getGroups(r"^\d+\s(.+)\s-> .+", line)
+            pkmn = parsers.getGroups(self.MOVESET_ZX_PKMN_LINE, line)
             if pkmn is None:
                 break
-            pkmn_name = pokemon.fix_unicode_name(pkmn.strip())
+            pkmn_name = pkmn.strip()
 
             # Move past stats (why the fuck are they even here to begin with)
             self.current_line += 7
 
             # Extract moves until empty line encountered
-            curr_moveset = pokemon.Moveset(pkmn_name)
+            level_move_mappings = []
             while True:
                 line = self.lines[self.current_line]
                 if not line.strip():
                     break
                 level, move_name = line[6:].strip().split(":")
-                curr_moveset.addMapping(int(level), move_name.strip())
+                level_move_mappings.append((int(level), move_name.strip()))
                 self.current_line += 1
-            movesets.append(curr_moveset)
+            movesets.append(self._movesetRecord(pkmn_name, level_move_mappings))
             self.current_line += 1
         return movesets
 
-    def extractLocations(self) -> Mapping[str, pokemon.Location]:
+    @staticmethod
+    def _movesetRecord(pkmn_name, level_move_mappings):
+        # Logs list moves in level order, so this is almost always already sorted (and the sort is stable)
+        level_move_mappings.sort(key=lambda mapping: mapping[0])
+        return (pkmn_name, [level for level, _ in level_move_mappings], [move_name for _, move_name in level_move_mappings])
+
+    def extractLocations(self) -> List[Tuple[str, List[Tuple]]]:
+        """[(location name, [(set num, classification, rate, [(pkmn name, levels)])])], sorted by location name."""
         # Move marker back to start
         self.reset()
 
@@ -205,7 +381,7 @@ class RandomizerLogParser(parsers.FileParser):
         # Move past headers
         self.current_line += 1
 
-        locations : Mapping[str, pokemon.Location] = {}
+        locations : Mapping[str, List[Tuple]] = collections.defaultdict(list)
 
         # Loop until empty line encountered
         while True:
@@ -215,21 +391,14 @@ class RandomizerLogParser(parsers.FileParser):
 
             # set_num is currently unused
             set_num, raw_location, raw_pkmn_list = line.split(' - ')
-            # rate is currently unused
-            raw_location_name, rate = parsers.getGroups(r"(.+)[(]rate=(\d+)[)]", raw_location.strip())
+            raw_location_name, rate = parsers.getGroups(self.LOCATION_RATE_LINE, raw_location.strip())
 
             # seperate the actual name from the classification
-            location_regex = fr"\s*(.+)\s+({'|'.join(pokemon.Sublocation.classifications())})"
-            location_name, location_classification = parsers.getGroups(location_regex, raw_location_name.strip())
-
-            location_name = pokemon.fix_unicode_name(location_name)
-
-            if location_name not in locations:
-                locations[location_name] = pokemon.Location(location_name)
+            location_name, location_classification = parsers.getGroups(self._locationRegex(), raw_location_name.strip())
 
-            # create a sublocation instance
-            sl = pokemon.Sublocation(set_num, location_name, location_classification)
-            locations[location_name].sublocations.add(sl)
+            # create a sublocation record
+            wild_occurrences = []
+            locations[location_name].append((set_num, location_classification, rate, wild_occurrences))
 
             # Extract mapping from list of raw pokemon/level pairs
             raw_pkmn = raw_pkmn_list.split(',')
@@ -243,16 +412,16 @@ class RandomizerLogParser(parsers.FileParser):
                 # where XX is the min, and YY is the max
                 if "Lvs" in raw:
                     pkmn_name, lvl_range = raw.split(" Lvs ")
-                    pkmn_name = pokemon.fix_unicode_name(pkmn_name.strip())
+                    pkmn_name = pkmn_name.strip()
                     min_level, max_level = (int(l) for l in lvl_range.split('-'))
                     pkmn_level_mapping[pkmn_name].update(range(min_level, max_level+1))
                 elif "Lv" in raw:
                     pkmn_name, level = raw.split(" Lv")
-                    pkmn_name = pokemon.fix_unicode_name(pkmn_name.strip())
+                    pkmn_name = pkmn_name.strip()
                     pkmn_level_mapping[pkmn_name].add(int(level.strip()))
 
             for pkmn_name, levels in pkmn_level_mapping.items():
-                sl.wild_occurrences.append(pokemon.WildOccurrence(pkmn_name, sl, levels))
+                wild_occurrences.append((pkmn_name, tuple(sorted(levels))))
 
             self.current_line += 1
 
@@ -261,9 +430,10 @@ class RandomizerLogParser(parsers.FileParser):
         if "? Unknown ?" in locations:
             del locations["? Unknown ?"]
 
-        return dict(sorted(locations.items()))
+        return sorted(locations.items())
 
-    def extractLocationsZX(self, version : pokemon.Version) -> Mapping[str, pokemon.Location]:
+    def extractLocationsZX(self, version : pokemon.Version) -> List[Tuple[str, List[Tuple]]]:
+        """[(location name, [(set num, classification, rate, [(pkmn name, levels)])])], sorted by location name."""
         # Move marker back to start
         self.reset()
 
@@ -273,33 +443,26 @@ class RandomizerLogParser(parsers.FileParser):
         # Move past headers
         self.current_line += 1
 
-        locations : Mapping[str, pokemon.Location] = {}
+        locations : Mapping[str, List[Tuple]] = collections.defaultdict(list)
 
         # Location Loop
         while True:
             line = self.lines[self.current_line]
 
-            location_values = parsers.getGroups(r"^Set #(\d+) - (.+)[(]rate=(\d+)[)]", line)
+            location_values = parsers.getGroups(self.LOCATION_ZX_SET_LINE, line)
             if location_values is None:
                 break
             elif len(location_values) != 3:
                 break
-            # rate currently unused
             set_num, raw_location, rate = location_values
 
             # seperate the actual name from the classification
-            joined_sublocation_str = '|'.join(pokemon.Sublocation.classifications(version))
-            location_regex = fr"\s*(.+)\s+({joined_sublocation_str})"
             print(f"Location Name = {raw_location.strip()}")
-            location_name, location_classification = parsers.getGroups(location_regex, raw_location.strip())
-            location_name = pokemon.fix_unicode_name(location_name)
-
-            if location_name not in locations:
-                locations[location_name] = pokemon.Location(location_name)
+            location_name, location_classification = parsers.getGroups(self._locationRegex(version), raw_location.strip())
 
-            # create a sublocation instance
-            sl = pokemon.Sublocation(set_num, location_name, location_classification)
-            locations[location_name].sublocations.add(sl)
+            # create a sublocation record
+            wild_occurrences = []
+            locations[location_name].append((set_num, location_classification, rate, wild_occurrences))
 
             # collect all pokemon instances at this location
             pkmn_level_mapping = collections.defaultdict(set)
@@ -309,7 +472,7 @@ class RandomizerLogParser(parsers.FileParser):
                 if not line.strip():
                     break
 
-                raw_pkmn = parsers.getGroups(r"(.+)\s+HP.+", line)
+                raw_pkmn = parsers.getGroups(self.LOCATION_ZX_PKMN_LINE, line)
                 if raw_pkmn is None:
                     print(f"Error parsing line as wild occurrence: ''{line}''")
                     break
@@ -321,16 +484,16 @@ class RandomizerLogParser(parsers.FileParser):
                 # where XX is the min, and YY is the max
                 if "Lvs" in raw_pkmn:
                     pkmn_name, lvl_range = raw_pkmn.split(" Lvs ")
-                    pkmn_name = pokemon.fix_unicode_name(pkmn_name.strip())
+                    pkmn_name = pkmn_name.strip()
                     min_level, max_level = (int(l) for l in lvl_range.split('-'))
                     pkmn_level_mapping[pkmn_name].update(range(min_level, max_level+1))
                 elif "Lv" in raw_pkmn:
                     pkmn_name, level = raw_pkmn.split(" Lv")
-                    pkmn_name = pokemon.fix_unicode_name(pkmn_name.strip())
+                    pkmn_name = pkmn_name.strip()
                     pkmn_level_mapping[pkmn_name].add(int(level.strip()))
 
             for pkmn_name, levels in pkmn_level_mapping.items():
-                sl.wild_occurrences.append(pokemon.WildOccurrence(pkmn_name, sl, levels))
+                wild_occurrences.append((pkmn_name, tuple(sorted(levels))))
 
             self.current_line += 1
 
@@ -339,9 +502,10 @@ class RandomizerLogParser(parsers.FileParser):
         if "? Unknown ?" in locations:
             del locations["? Unknown ?"]
 
-        return dict(sorted(locations.items()))
+        return sorted(locations.items())
 
-    def extractStaticOccurrences(self):
+    def extractStaticOccurrences(self) -> Mapping[str, str]:
+        """{new pkmn name: name of the pokemon it replaced}"""
         # Move marker back to start
         self.reset()
 
@@ -361,14 +525,15 @@ class RandomizerLogParser(parsers.FileParser):
 
             # old_num is to differentiate between different occurrences of the same static pokemon.
             # It is currently unused.
-            old, old_num, new = parsers.getGroups(r"(\w+)([(]\d[)])? [=][>] (\w+)", line)
-            static_pkmn_occurrences[new] = pokemon.WildOccurrence(new, pokemon.StaticSublocation(old), [])
+            old, old_num, new = parsers.getGroups(self.STATIC_LINE, line)
+            static_pkmn_occurrences[new] = old
             self.current_line += 1
 
         return static_pkmn_occurrences
 
 
-    def extractStaticOccurrencesZX(self, pokemon_version : pokemon.Version):
+    def extractStaticOccurrencesZX(self, pokemon_version : pokemon.Version) -> Mapping[str, str]:
+        """{new pkmn name: name of the pokemon it replaced}"""
         # Move marker back to start
         self.reset()
 
@@ -387,13 +552,103 @@ class RandomizerLogParser(parsers.FileParser):
                 break
 
             if pokemon_version is pokemon.Version.HEARTGOLD or pokemon.Version.SOULSILVER:
-                regex = r"^([\w.-]+|Mr. Mime)(?:\(\d\)| \(egg\))? => ([\w.-]+|Mr. Mime)(?:\(\d\)| \(egg\))?"
+                static_regex = self.STATIC_ZX_HGSS_LINE
             else:
-                regex = r"(\w+),? (?:Lv\d+(?:[(]\d[)])?|[(]egg[)]) [=][>] (\w+),? (?:Lv\d+|[(]egg[)])"
+                static_regex = self.STATIC_ZX_LINE
 
             print(f"line = {line.strip()}")
-            old, new = parsers.getGroups(regex, line.strip())
-            static_pkmn_occurrences[new] = pokemon.WildOccurrence(new, pokemon.StaticSublocation(old), [])
+            old, new = parsers.getGroups(static_regex, line.strip())
+            static_pkmn_occurrences[new] = old
             self.current_line += 1
 
         return static_pkmn_occurrences
+
+    def extractTrainers(self) -> List[Tuple[str, str, List[Tuple[str, int]]]]:
+        """Returns (num, name, [(pkmn name, level)]) for every trainer."""
+        # Move marker back to start
+        self.reset()
+
+        # Find start
+        self.moveAndGetGroups(self.TRAINER_HEADER)
+
+        # Move past headers
+        self.current_line += 1
+
+        trainers = []
+
+        # Loop until empty line encountered
+        while True:
+            line = self.lines[self.current_line].strip()
+            if not line or self.SECTION_DELIMITER.match(line):
+                break
+            self.current_line += 1
+
+            match = self.TRAINER_LINE.match(line)
+            if match is None:
+                continue
+            num, name, team_str = match.groups()
+            # ZX logs show "Old Name => New Name"
+            name = name.split(" => ")[-1]
+            team = []
+            for entry in team_str.split(", "):
+                entry_match = self.TRAINER_PKMN_ENTRY.match(entry.strip())
+                if entry_match is not None:
+                    team.append((entry_match.group(1), int(entry_match.group(2))))
+            trainers.append((num, name, team))
+
+        return trainers
+
+    def extractTMMoves(self) -> List[Tuple[str, str]]:
+        """Returns (machine, move name) for every TM/HM, e.g. ("TM26", "Earthquake")."""
+        # Move marker back to start
+        self.reset()
+
+        # Find start
+        self.moveAndGetGroups(self.TM_MOVES_HEADER)
+
+        # Move past headers
+        self.current_line += 1
+
+        tm_moves = []
+
+        # Loop until empty line encountered
+        while True:
+            line = self.lines[self.current_line].strip()
+            if not line or self.SECTION_DELIMITER.match(line):
+                break
+            self.current_line += 1
+
+            match = self.TM_MOVE_LINE.match(line)
+            if match is not None:
+                tm_moves.append((match.group(1), match.group(2).strip()))
+
+        return tm_moves
+
+    def extractTMCompatibility(self) -> List[Tuple[str, List[str]]]:
+        """Returns (pkmn name, [machine]) for every pokemon, e.g. ("Bulbasaur", ["TM01", "TM06", ...])."""
+        # Move marker back to start
+        self.reset()
+
+        # Find start
+        self.moveAndGetGroups(self.TM_COMPATIBILITY_HEADER)
+
+        # Move past headers
+        self.current_line += 1
+
+        compatibility = []
+
+        # Loop until empty line encountered
+        while True:
+            line = self.lines[self.current_line].rstrip()
+            if not line.strip() or self.SECTION_DELIMITER.match(line.strip()):
+                break
+            self.current_line += 1
+
+            match = self.TM_COMPATIBILITY_LINE.match(line)
+            if match is None:
+                continue
+            pkmn_name, cells = match.groups()
+            # Incompatible machines are blank cells
+            compatibility.append((pkmn_name, [cell.strip() for cell in cells.split("|") if cell.strip()]))
+
+        return compatibility
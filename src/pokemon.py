@@ -1,15 +1,14 @@
 import abc
+import bisect
 import enum
 import collections
+import sys
 from   typing import List
 import PySimpleGUI as gui
 
 from src import types
 from src.external import utils
 
-def fix_unicode_name(name : str):
-    return name.replace("â™€", "♀").replace("â™‚", "♂").replace("â€™", "'").replace("Ã©", "é")
-
 class Version(enum.Enum):
     RED = 1.0
     BLUE = 1.0
@@ -46,14 +45,16 @@ class Version(enum.Enum):
 
 
 class Pokemon:
+    __slots__ = ("id", "num", "name", "type", "stats", "abilities", "items", "moveset", "wild_occurrences")
+
     def __init__(self, num, name, types, stats, abilities, items):
+        self.id = None
         self.num = num
-        self.name = name
+        self.name = sys.intern(name)
         self.type = Type(types)
         self.stats = Stats(*stats)
-        self.abilities = abilities
+        self.abilities = [sys.intern(a) for a in abilities]
         self.items = items
-        self.moves = {}
         self.moveset = []
         self.wild_occurrences : List[WildOccurrence] = []
 
@@ -66,17 +67,39 @@ class Pokemon:
     def __repr__(self):
         return f"Pokemon[{self.name}]"
 
+####################################################
+class AttributeKind:
+    """Constant metadata shared by every attribute with the same name."""
+    __slots__ = ("name", "short_name", "maximum")
+
+    def __init__(self, name, maximum):
+        self.name = name
+        self.short_name = Stats.short_name(name) or name
+        self.maximum = maximum
+
+def _attributeProperty(index):
+    """Exposes values[index] as a Stats.Attribute, using the owning class' ATTR_KINDS."""
+    def getter(self):
+        return Stats.Attribute(type(self).ATTR_KINDS[index], self.values[index])
+    return property(getter)
+
 ####################################################
 class Stats:
+    __slots__ = ("values",)
     ALL_ATTR_NAMES=("hp", "attack", "defence", "special_attack", "special_defence", "speed")
 
     def __init__(self, hp, p_atk, p_def, speed, s_atk, s_def):
-        self.hp = Stats.Attribute("hp", int(hp), maximum=Stats.Attribute.ATTR_MAX)
-        self.attack = Stats.Attribute("attack", int(p_atk), maximum=Stats.Attribute.ATTR_MAX)
-        self.defence = Stats.Attribute("defence", int(p_def), maximum=Stats.Attribute.ATTR_MAX)
-        self.special_attack = Stats.Attribute("special_attack", int(s_atk), maximum=Stats.Attribute.ATTR_MAX)
-        self.special_defence = Stats.Attribute("special_defence", int(s_def), maximum=Stats.Attribute.ATTR_MAX)
-        self.speed = Stats.Attribute("speed", int(speed), maximum=Stats.Attribute.ATTR_MAX)
+        # Stored in ALL_ATTR_NAMES order
+        self.values = (int(hp), int(p_atk), int(p_def), int(s_atk), int(s_def), int(speed))
+        for value in self.values:
+            assert value <= Stats.Attribute.ATTR_MAX, f"attribute value ({value}) must be <= {Stats.Attribute.ATTR_MAX}"
+
+    hp = _attributeProperty(0)
+    attack = _attributeProperty(1)
+    defence = _attributeProperty(2)
+    special_attack = _attributeProperty(3)
+    special_defence = _attributeProperty(4)
+    speed = _attributeProperty(5)
 
     @staticmethod
     def short_name(attr_name):
@@ -106,14 +129,26 @@ class Stats:
 
     ####################################################
     class Attribute:
+        """A lightweight (kind, value) view; the kind is shared between instances."""
+        __slots__ = ("kind", "value")
         ATTR_MAX=255
 
-        def __init__(self, name, value, maximum):
+        def __init__(self, kind : AttributeKind, value):
             assert value <= self.ATTR_MAX, f"attribute value ({value}) must be <= {self.ATTR_MAX}"
-            self.name = name
-            self.short_name = Stats.short_name(name) or name
+            self.kind = kind
             self.value = value
-            self.maximum = maximum
+
+        @property
+        def name(self):
+            return self.kind.name
+
+        @property
+        def short_name(self):
+            return self.kind.short_name
+
+        @property
+        def maximum(self):
+            return self.kind.maximum
 
         @staticmethod
         def createGraph(key=None):
@@ -137,14 +172,18 @@ class Stats:
         def __str__(self):
             return f"{self.name.upper()}:{self.value}"
 
+Stats.ATTR_KINDS = tuple(AttributeKind(attr_name, Stats.Attribute.ATTR_MAX) for attr_name in Stats.ALL_ATTR_NAMES)
+
 ####################################################
 class Type:
+    __slots__ = ("primary", "secondary")
+
     def __init__(self, types):
         if (len(types) == 1):
-            [self.primary] = types
+            self.primary = sys.intern(types[0])
             self.secondary = None
         elif(len(types) == 2):
-            self.primary, self.secondary = types
+            self.primary, self.secondary = (sys.intern(t) for t in types)
         else:
             raise Exception
 
@@ -182,27 +221,75 @@ class Type:
 
 ####################################################
 class Move:
+    __slots__ = ("id", "num", "name", "type", "values", "category")
     ALL_ATTR_NAMES = ("power", "accuracy", "pp")
+    ATTR_KINDS = (AttributeKind("power", 150), AttributeKind("accuracy", 100), AttributeKind("pp", 40))
+
     def __init__(self, num, name, move_type, power, accuracy, pp, category):
+        self.id = None
         self.num = num
-        self.name = name
+        self.name = sys.intern(name)
         self.type = move_type
-        self.power = Stats.Attribute("power", int(power), maximum=150)
-        self.accuracy = Stats.Attribute("accuracy", int(accuracy), maximum=100)
-        self.pp = Stats.Attribute("pp", int(pp), maximum=40)
+        # Stored in ALL_ATTR_NAMES order
+        self.values = (int(power), int(accuracy), int(pp))
         self.category = category
 
+    power = _attributeProperty(0)
+    accuracy = _attributeProperty(1)
+    pp = _attributeProperty(2)
+
+####################################################
+class Item:
+    __slots__ = ("name", "holders")
+
+    def __init__(self, name):
+        self.name = sys.intern(name)
+        # [(pkmn id, rate)]
+        self.holders = []
+
+    def addHolder(self, pkmn_id, rate):
+        self.holders.append((pkmn_id, rate))
+
+    def __repr__(self):
+        return f"Item[{self.name}]"
+
 ####################################################
 class Moveset:
-    def __init__(self, pkmn_name):
-        self.pkmn_name = pkmn_name
-        self.level_move_mappings = []
+    __slots__ = ("pkmn_id", "levels", "move_ids", "move_table")
 
-    def addMapping(self, level, move_name):
-        self.level_move_mappings.append((level, move_name))
+    def __init__(self, pkmn_id, levels, move_ids, move_table):
+        self.pkmn_id = pkmn_id
+        # Parallel arrays sorted by level for bisect queries
+        self.levels = levels
+        self.move_ids = move_ids
+        # The database's move NameTable (shared by every moveset); names are only kept there
+        self.move_table = move_table
+
+    @property
+    def move_names(self):
+        return [self.move_table.name(move_id) for move_id in self.move_ids]
+
+    @property
+    def level_move_mappings(self):
+        return list(zip(self.levels, self.move_names))
+
+    def movesKnownAt(self, level, count=4):
+        """Returns the last 'count' distinct moves learned at or below 'level' (oldest first)."""
+        known = []
+        index = bisect.bisect_right(self.levels, level)
+        while index > 0 and len(known) < count:
+            index -= 1
+            if self.move_ids[index] not in known:
+                known.append(self.move_ids[index])
+        return [self.move_table.name(move_id) for move_id in known[::-1]]
+
+    def movesLearnedBetween(self, min_level, max_level):
+        start = bisect.bisect_left(self.levels, min_level)
+        end = bisect.bisect_right(self.levels, max_level)
+        return [(level, self.move_table.name(move_id)) for level, move_id in zip(self.levels[start:end], self.move_ids[start:end])]
 
     def __str__(self):
-        ret_str = f"{self.pkmn_name} learns the following moves:"
+        ret_str = f"Pokemon #{self.pkmn_id} learns the following moves:"
         for level, move_name in self.level_move_mappings:
             ret_str += r"\n"
             ret_str += f"{move_name} at level {level}"
@@ -210,10 +297,13 @@ class Moveset:
 
 ####################################################
 class WildOccurrence:
-    def __init__(self, pkmn_name, location, levels):
-        self.pkmn_name = pkmn_name
+    __slots__ = ("pkmn_id", "location", "levels")
+
+    def __init__(self, pkmn_id, location, levels):
+        self.pkmn_id = pkmn_id
         self.location = location
-        self.levels = levels
+        # A sorted tuple is much smaller than the set the parsers build up
+        self.levels = tuple(sorted(levels))
 
     def displayName(self) -> str:
         return self.location.displayName()
@@ -234,13 +324,16 @@ class WildOccurrence:
         return level_ranges_step3
 
     def __repr__(self):
-        return f"Wild Pokemon Occurrence[{self.pkmn_name},{self.location},{self.levels}]"
+        return f"Wild Pokemon Occurrence[{self.pkmn_id},{self.location},{self.levels}]"
 
 
 ####################################################
 class Location:
+    __slots__ = ("id", "name", "sublocations")
+
     def __init__(self, name):
-        self.name = name
+        self.id = None
+        self.name = sys.intern(name)
         self.sublocations = set()
 
     def __repr__(self):
@@ -270,28 +363,43 @@ class Sublocation:
                 "Swarms", "Hoenn/Sinnoh Radio", "Rock Smash", "Headbutt", "Contest", "Night Fishing Replacement",
                 ]
 
-    def __init__(self, set_num, location_name, classification):
+    __slots__ = ("id", "set_num", "location", "classification", "rate", "wild_occurrences")
+
+    def __init__(self, set_num, location, classification, rate=None):
+        self.id = None
         self.set_num = set_num
-        self.location_name = location_name
-        self.classification = classification
+        self.location = location
+        self.classification = sys.intern(classification)
+        # Encounter rate of the whole set (the log's "rate=" value)
+        self.rate = int(rate) if rate is not None else None
         self.wild_occurrences = []
 
+    @property
+    def location_id(self):
+        return self.location.id
+
     def displayName(self):
-        return f"{self.location_name} ({self.classification})"
+        return f"{self.location.name} ({self.classification})"
 
     def __lt__(self, other):
         return self.set_num < other.set_num
 
     def __eq__(self, other):
-        return (self.set_num, self.location_name, self.classification) == (other.set_num, other.location_name, other.classification)
+        return (self.set_num, self.location_id, self.classification) == (other.set_num, other.location_id, other.classification)
 
     def __hash__(self):
-        return hash((self.set_num, self.location_name, self.classification))
+        return hash((self.set_num, self.location_id, self.classification))
 
     def __repr__(self):
-        return f"Sublocation[{self.set_num}, {self.location_name}, {self.classification}]"
+        return f"Sublocation[{self.set_num}, {self.location.name}, {self.classification}]"
 
 class StaticSublocation(Sublocation):
+    __slots__ = ("pkmn_name",)
+    classification = "Static"
+    location = None
+    location_id = None
+    rate = None
+
     def __init__(self, pkmn_name):
         self.pkmn_name = pkmn_name
 
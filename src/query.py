@@ -0,0 +1,277 @@
+import functools
+import operator
+import re
+from   typing import Callable, List, Mapping, Tuple
+
+import numpy
+
+from src import database, pokemon, types
+
+# e.g. type:fire spd>90 bst>=500 learns:"Flamethrower" catch<=20 -ability:levitate
+#   [-]field<op>value, where op is one of : = != < <= > >= and value may be "quoted";
+#   a bare word matches names containing it.
+_TERM = re.compile(r'\s*(-?)(?:([A-Za-z_]+)\s*(<=|>=|!=|<|>|=|:)\s*)?(?:"([^"]*)"|(\S+))')
+_COMPARISONS : Mapping[str, Callable] = {
+    ":": operator.eq, "=": operator.eq, "!=": operator.ne,
+    "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+}
+# Level a pokemon is "caught at" when it has no levelled encounters (so catch<=N never matches it)
+NEVER_CAUGHT = 1000
+
+class QueryError(Exception):
+    pass
+
+####################################################
+## Tables: the columns a query runs against, per database
+####################################################
+def _lookup(names, value, what) -> str:
+    """'value' as one of 'names', ignoring case."""
+    if value in names:
+        return value
+    for name in names:
+        if name.lower() == value.lower():
+            return name
+    raise QueryError(f"Unknown {what} \"{value}\"")
+
+class _Table:
+    """Names (in id order) plus lazily built columns over them.
+
+    NUMERIC fields are int columns compared against the query value;
+    MATCHERS are fn(table, value) -> bool mask over the names.
+    """
+    NUMERIC : Mapping[str, Callable] = {}
+    MATCHERS : Mapping[str, Callable] = {}
+    ALIASES : Mapping[str, str] = {}
+
+    def __init__(self, db : database.Database, names : List[str]):
+        self.db = db
+        self.names = names
+        self.index = {name: i for i, name in enumerate(names)}
+        self._columns : Mapping[str, numpy.ndarray] = {}
+        self._lower_names = None
+
+    @classmethod
+    def field(cls, name) -> str:
+        name = cls.ALIASES.get(name.lower(), name.lower())
+        if name not in cls.NUMERIC and name not in cls.MATCHERS:
+            raise QueryError(f"Unknown field \"{name}\" (try {', '.join(sorted({*cls.NUMERIC, *cls.MATCHERS, *cls.ALIASES}))})")
+        return name
+
+    def column(self, name) -> numpy.ndarray:
+        if name not in self._columns:
+            self._columns[name] = self.NUMERIC[name](self)
+        return self._columns[name]
+
+    def ids(self, pkmn_ids) -> numpy.ndarray:
+        mask = numpy.zeros(len(self.names), dtype=bool)
+        mask[numpy.asarray(pkmn_ids, dtype=numpy.intp)] = True
+        return mask
+
+    def nameIs(self, name) -> numpy.ndarray:
+        mask = numpy.zeros(len(self.names), dtype=bool)
+        if name in self.index:
+            mask[self.index[name]] = True
+        return mask
+
+    def nameContains(self, value) -> numpy.ndarray:
+        if self._lower_names is None:
+            self._lower_names = numpy.array([name.lower() for name in self.names], dtype=object)
+        value = value.lower()
+        return numpy.fromiter((value in name for name in self._lower_names), dtype=bool, count=len(self.names))
+
+    def typeColumns(self) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """(primary types, secondary types) of every entry."""
+        if "types" not in self._columns:
+            types = self.types()
+            # Upper case like types.all_types_with_unknown (moves store "???" as "unknown")
+            self._columns["types"] = (numpy.array([t.primary.upper() for t in types], dtype=object),
+                                      numpy.array([t.secondary and t.secondary.upper() for t in types], dtype=object))
+        return self._columns["types"]
+
+def _pokemonCatchLevels(table) -> numpy.ndarray:
+    encounters = table.db.encounters
+    mins, maxs = encounters.levelRanges(encounters.pkmn_ids, len(table.names), "level_ranges_by_pokemon")
+    return numpy.where(maxs >= 0, mins, NEVER_CAUGHT)
+
+def _pokemonLearns(table, value) -> numpy.ndarray:
+    """Learned by level up or from a TM/HM."""
+    db = table.db
+    # Movesets give the moves they teach ids of their own, so this works even without a moves section
+    move_learners = db.move_learners
+    move_name = _lookup([*db.move_ids.names, *db.machines.machines_by_move], value, "move")
+    mask = table.ids([pkmn_id for pkmn_id, _ in move_learners.get(db.move_ids.get(move_name), [])])
+    mask[db.machines.learnersOf(move_name)[:len(table.names)]] = True
+    return mask
+
+def _pokemonHolds(table, value) -> numpy.ndarray:
+    item_name = _lookup(table.db.items, value, "item")
+    return table.ids([pkmn_id for pkmn_id, _ in table.db.items[item_name].holders])
+
+def _pokemonAbility(table, value) -> numpy.ndarray:
+    ability = _lookup(table.db.ability_holders, value, "ability")
+    return table.ids(table.db.ability_holders[ability])
+
+def _pokemonAt(table, value) -> numpy.ndarray:
+    location_name = _lookup(table.db.locations, value, "location")
+    pkmn_ids = table.db.encounters.pkmn_ids[table.db.encounterRowsAt(location_name)]
+    return table.ids(pkmn_ids[pkmn_ids >= 0])
+
+def _matchesType(table, value) -> numpy.ndarray:
+    # "???" is how logs write the unknown type
+    value = _lookup(types.all_types_with_unknown, "UNKNOWN" if value == "???" else value, "type")
+    primary, secondary = table.typeColumns()
+    return (primary == value) | (secondary == value)
+
+class PokemonTable(_Table):
+    NUMERIC = {
+        **{pokemon.Stats.short_name(attr_name): (lambda i: lambda table: table.stats()[:, i])(i) for i, attr_name in enumerate(pokemon.Stats.ALL_ATTR_NAMES)},
+        "bst": lambda table: table.stats().sum(axis=1),
+        "num": lambda table: numpy.array([int(pkmn.num) for pkmn in table.db.pokemon_by_id], dtype=numpy.int64),
+        # Lowest level it can be caught at
+        "catch": _pokemonCatchLevels,
+    }
+    MATCHERS = {
+        "name": _Table.nameContains,
+        "type": _matchesType,
+        "learns": _pokemonLearns,
+        "holds": _pokemonHolds,
+        "ability": _pokemonAbility,
+        "at": _pokemonAt,
+    }
+    ALIASES = {
+        **{attr_name: pokemon.Stats.short_name(attr_name) for attr_name in pokemon.Stats.ALL_ATTR_NAMES},
+        "attack": "atk", "defense": "def", "spatk": "stak", "spa": "stak", "spdef": "sdef", "spe": "spd", "speed": "spd",
+        "total": "bst", "item": "holds", "location": "at",
+    }
+
+    def __init__(self, db : database.Database):
+        super().__init__(db, [pkmn.name for pkmn in db.pokemon_by_id])
+
+    def stats(self) -> numpy.ndarray:
+        if "stats" not in self._columns:
+            self._columns["stats"] = numpy.array([pkmn.stats.values for pkmn in self.db.pokemon_by_id], dtype=numpy.int64).reshape(-1, len(pokemon.Stats.ALL_ATTR_NAMES))
+        return self._columns["stats"]
+
+    def types(self) -> List[pokemon.Type]:
+        return [pkmn.type for pkmn in self.db.pokemon_by_id]
+
+def _moveCategory(table, value) -> numpy.ndarray:
+    value = _lookup(types.all_categories, value, "category")
+    if "categories" not in table._columns:
+        table._columns["categories"] = numpy.array([move.category.primary for move in table.moves], dtype=object)
+    return table._columns["categories"] == value
+
+def _moveMachine(table, value) -> numpy.ndarray:
+    """tm:yes / tm:no, or the machine that teaches it (e.g. tm:TM26)."""
+    machines = table.db.machines
+    if value.lower() in ("yes", "no"):
+        taught = numpy.fromiter((move.name in machines.machines_by_move for move in table.moves), dtype=bool, count=len(table.names))
+        return taught if value.lower() == "yes" else ~taught
+    move_name = machines.move_names[machines.machines.get(_lookup(machines.machines.ids, value, "machine"))]
+    return table.nameIs(move_name)
+
+def _moveLearnedBy(table, value) -> numpy.ndarray:
+    """Learned by the pokemon by level up or from a TM/HM."""
+    db = table.db
+    # Pokemon objects don't know which database they're in, so nothing materialises their movesets for us
+    db.materialise("movesets")
+    pkmn_name = _lookup(db.pokemon, value, "pokemon")
+    pkmn = db.pokemon[pkmn_name]
+    move_names = set(pkmn.moveset.move_names) if pkmn.moveset else set()
+    compatibility = numpy.unpackbits(db.machines.compatibility[pkmn.id].view(numpy.uint8), bitorder="little")
+    move_names.update(db.machines.move_names[machine_id] for machine_id in numpy.flatnonzero(compatibility[:len(db.machines)]))
+    return table.ids([table.index[name] for name in move_names if name in table.index])
+
+class MoveTable(_Table):
+    NUMERIC = {attr_name: (lambda i: lambda table: numpy.array([move.values[i] for move in table.moves], dtype=numpy.int64))(i)
+               for i, attr_name in enumerate(pokemon.Move.ALL_ATTR_NAMES)}
+    MATCHERS = {
+        "name": _Table.nameContains,
+        "type": _matchesType,
+        "category": _moveCategory,
+        "tm": _moveMachine,
+        "learnedby": _moveLearnedBy,
+    }
+    ALIASES = {"pow": "power", "acc": "accuracy", "cat": "category", "machine": "tm", "by": "learnedby"}
+
+    def __init__(self, db : database.Database):
+        self.moves = list(db.moves.values())
+        super().__init__(db, [move.name for move in self.moves])
+
+    def types(self) -> List[pokemon.Type]:
+        return [move.type for move in self.moves]
+
+####################################################
+## Queries
+####################################################
+class Query:
+    """A parsed query: (negated, field, comparison, value) terms that are all ANDed."""
+    def __init__(self, table_class, terms : List[Tuple[bool, str, str, object]]):
+        self.table_class = table_class
+        self.terms = terms
+
+    def mask(self, table : _Table) -> numpy.ndarray:
+        mask = numpy.ones(len(table.names), dtype=bool)
+        for negated, field, comparison, value in self.terms:
+            if field in table.NUMERIC:
+                term_mask = _COMPARISONS[comparison](table.column(field), value)
+            else:
+                term_mask = table.MATCHERS[field](table, value)
+                if comparison == "!=":
+                    term_mask = ~term_mask
+            mask &= ~term_mask if negated else term_mask
+        return mask
+
+    def matching(self, db : database.Database) -> List[str]:
+        """Matching names, in id order."""
+        table = forDatabase(db, self.table_class)
+        return [table.names[i] for i in numpy.flatnonzero(self.mask(table))]
+
+def isQuery(text) -> bool:
+    """Whether the text uses any field (otherwise it's just a name to search for)."""
+    return any(match.group(2) for match in _TERM.finditer(text))
+
+@functools.lru_cache(maxsize=64)
+def parse(text, table_class) -> Query:
+    terms = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = _TERM.match(text, position)
+        if match is None or match.end() == position:
+            raise QueryError(f"Can't parse \"{text[position:]}\"")
+        position = match.end()
+        negated, field, comparison, quoted, word = match.groups()
+        value = quoted if quoted is not None else word
+        field = table_class.field(field) if field else "name"
+        comparison = comparison or ":"
+        if field in table_class.NUMERIC:
+            if not value.isdigit():
+                raise QueryError(f"\"{field}\" needs a number, not \"{value}\"")
+            value = int(value)
+        elif comparison not in (":", "=", "!="):
+            raise QueryError(f"\"{field}\" can only be compared with : = or !=")
+        terms.append((bool(negated), field, comparison, value))
+    return Query(table_class, terms)
+
+def matchingPokemon(db : database.Database, text) -> List[str]:
+    return parse(text, PokemonTable).matching(db)
+
+def matchingMoves(db : database.Database, text) -> List[str]:
+    return parse(text, MoveTable).matching(db)
+
+def warm(db : database.Database):
+    """Builds every query column ahead of time, one per step (an idle.IdleScheduler job)."""
+    for table_class in (PokemonTable, MoveTable):
+        table = forDatabase(db, table_class)
+        yield
+        for name in table_class.NUMERIC:
+            table.column(name)
+            yield
+        table.typeColumns()
+        table.nameContains("")
+        yield
+
+def forDatabase(db : database.Database, table_class) -> _Table:
+    """The (cached) query table of a database, rebuilt if it changed since."""
+    return db.cached(table_class)
@@ -0,0 +1,363 @@
+import collections
+import hashlib
+import http.server
+import itertools
+import json
+import pathlib
+import sys
+import threading
+import urllib.parse
+import uuid
+from   functools import reduce
+from   typing import Callable, List, Mapping, Tuple
+
+import numpy
+
+from src import coverage, database, pokemon, types
+
+DEFAULT_PORT = 8765
+# Tags every ETag this process hands out, so a restarted server never matches an old one
+_RUN_ID = uuid.uuid4().hex[:8]
+_cache_ids = itertools.count()
+
+####################################################
+## Serializers (called without the database lock; see ResponseCache.get)
+####################################################
+def _stats(stats : pokemon.Stats) -> Mapping[str, int]:
+    return dict(zip(pokemon.Stats.ALL_ATTR_NAMES, stats.values))
+
+def _types(pkmn_type : pokemon.Type) -> List[str]:
+    return [t for t in (pkmn_type.primary, pkmn_type.secondary) if t is not None]
+
+def _levels(min_level, max_level):
+    return None if max_level < 0 else [int(min_level), int(max_level)]
+
+def pokemonSummary(db : database.Database, pkmn : pokemon.Pokemon):
+    return {"num": pkmn.num, "name": pkmn.name, "types": _types(pkmn.type), "stats": _stats(pkmn.stats), "bst": sum(pkmn.stats.values)}
+
+def pokemonDetail(db : database.Database, pkmn : pokemon.Pokemon):
+    db.materialise("moves", "movesets", "encounters", "machines")
+    return {**pokemonSummary(db, pkmn),
+            "abilities": list(pkmn.abilities),
+            "items": pkmn.items,
+            "moveset": [[level, move_name] for level, move_name in zip(pkmn.moveset.levels, pkmn.moveset.move_names)] if pkmn.moveset else [],
+            "encounters": [{"location": wo.displayName(), "levels": list(wo.levels)} for wo in pkmn.wild_occurrences],
+            "trainers": db.trainersUsing(pkmn.name),
+           }
+
+def moveSummary(db : database.Database, move : pokemon.Move):
+    return {"num": move.num, "name": move.name, "type": move.type.primary, "category": move.category.primary,
+            **dict(zip(pokemon.Move.ALL_ATTR_NAMES, move.values))}
+
+def moveDetail(db : database.Database, move : pokemon.Move):
+    db.materialise("movesets", "machines")
+    return {**moveSummary(db, move),
+            "learners": [[pkmn_name, level] for pkmn_name, level in db.learnersOf(move.name)],
+            "machines": db.machines.machinesOf(move.name),
+            "tm_learners": db.tmLearnersOf(move.name),
+           }
+
+def locationSummary(db : database.Database, location : pokemon.Location):
+    level_range = db.levelRangeAt(location.name)
+    return {"name": location.name, "levels": list(level_range) if level_range else None, "pokemon": db.pokemonAt(location.name)}
+
+def locationDetail(db : database.Database, location : pokemon.Location):
+    return {**locationSummary(db, location),
+            "sublocations": [{"name": sl.displayName(), "classification": sl.classification, "rate": sl.rate,
+                              "encounters": [{"pokemon": db.pokemon_ids.name(wo.pkmn_id), "levels": list(wo.levels)} for wo in sl.wild_occurrences]}
+                             for sl in sorted(location.sublocations)],
+           }
+
+def encounters(db : database.Database, pkmn_name=None, location_name=None, classification=None):
+    """Rows of the encounter table, optionally narrowed to a pokemon, location and/or classification."""
+    table = db.encounters
+    rows = numpy.ones(len(table), dtype=bool)
+    for ids, name_table, name in ((table.pkmn_ids, db.pokemon_ids, pkmn_name),
+                                  (table.location_ids, db.location_ids, location_name),
+                                  (table.classification_ids, table.classifications, classification)):
+        if name is not None:
+            rows &= ids == name_table.get(name, -2)
+    return [{"pokemon": db.pokemon_ids.name(int(table.pkmn_ids[row])),
+             "location": table.occurrences[row].displayName(),
+             "classification": table.classifications.name(int(table.classification_ids[row])),
+             "levels": _levels(table.min_levels[row], table.max_levels[row]),
+             "rate": None if table.rates[row] < 0 else int(table.rates[row])}
+            for row in numpy.flatnonzero(rows)]
+
+def teamAnalysis(db : database.Database, pkmn_names : List[str], level=coverage.MAX_LEVEL):
+    """What the Team Builder tab shows, for the given team."""
+    team = [db.pokemon[pkmn_name] for pkmn_name in pkmn_names if pkmn_name in db.pokemon]
+    combined_mappings = reduce(types.calculator.combineMappings, [pkmn.type.defenceMapping() for pkmn in team]) if team else {}
+    individual_resistances = {type_str for pkmn in team for type_str in types.calculator.filterResistances(pkmn.type.defenceMapping())}
+    team_coverage = coverage.forDatabase(db) if team else None
+    super_effective, not_very_effective = team_coverage.teamCoverage([pkmn.name for pkmn in team], level) if team else (0, 0)
+    return {"team": [pkmn.name for pkmn in team],
+            "unknown": [pkmn_name for pkmn_name in pkmn_names if pkmn_name not in db.pokemon],
+            "level": level,
+            "weaknesses": sorted(types.calculator.filterWeaknesses(combined_mappings)),
+            "resistances": sorted(types.calculator.filterResistances(combined_mappings)),
+            "missing_individual_resistances": [type_str for type_str in types.all_types if type_str not in individual_resistances],
+            "super_effective": coverage.maskTypes(super_effective),
+            "not_very_effective": coverage.maskTypes(not_very_effective) if team else [],
+            "gap_covers": [{"pokemon": pkmn_name, "adds": added_types} for pkmn_name, added_types in team_coverage.gapCovers([pkmn.name for pkmn in team], level)] if team else [],
+           }
+
+####################################################
+## Routing
+####################################################
+class NotFound(Exception):
+    pass
+
+def _first(query : Mapping[str, List[str]], name, default=None):
+    return query[name][0] if name in query else default
+
+def _collection(mapping_fn : Callable, summary_fn : Callable, detail_fn : Callable):
+    """/<collection> lists every entry's summary; /<collection>/<name> is one entry in detail."""
+    def endpoint(db, name, query):
+        mapping = mapping_fn(db)
+        if name is None:
+            return [summary_fn(db, value) for value in mapping.values()]
+        if name not in mapping:
+            raise NotFound(name)
+        return detail_fn(db, mapping[name])
+    return endpoint
+
+def _encountersEndpoint(db, name, query):
+    if name is not None:
+        raise NotFound(name)
+    return encounters(db, _first(query, "pokemon"), _first(query, "location"), _first(query, "classification"))
+
+def _teamEndpoint(db, name, query):
+    if name is not None:
+        raise NotFound(name)
+    pkmn_names = [pkmn_name for value in query.get("pokemon", []) for pkmn_name in value.split(",") if pkmn_name]
+    level = _first(query, "level", "")
+    return teamAnalysis(db, pkmn_names, int(level) if level.isdigit() else coverage.MAX_LEVEL)
+
+def _indexEndpoint(db, name, query):
+    if name is not None:
+        raise NotFound(name)
+    return {"version": db.version.name if db.version else None,
+            "randomizer": db.randomizerVerionStr(),
+            "generation": db.generation,
+            "endpoints": [f"/{endpoint}" for endpoint in ENDPOINTS if endpoint],
+           }
+
+# First path segment -> fn(db, name or None, parsed query) returning something JSON serializable
+ENDPOINTS : Mapping[str, Callable] = {
+    "": _indexEndpoint,
+    "pokemon": _collection(lambda db: db.pokemon, pokemonSummary, pokemonDetail),
+    "moves": _collection(lambda db: db.moves, moveSummary, moveDetail),
+    "locations": _collection(lambda db: db.locations, locationSummary, locationDetail),
+    "encounters": _encountersEndpoint,
+    "team": _teamEndpoint,
+}
+# The query parameters each endpoint reads; nothing else reaches it (or tells cached responses apart)
+ENDPOINT_PARAMS : Mapping[str, Tuple[str, ...]] = {
+    "encounters": ("pokemon", "location", "classification"),
+    "team": ("pokemon", "level"),
+}
+
+####################################################
+## Response cache
+####################################################
+class ResponseCache:
+    """Serialized responses of one generation of one database, least recently
+    used first, keyed by endpoint, entry name and the query parameters the
+    endpoint reads (so ?a=1&b=2, ?b=2&a=1 and ?a=1&junk=x share a response).
+
+    Bounded by both a count and the total size of the responses.
+    """
+    MAX_COUNT = 256
+    MAX_BYTES = 32 * 1024 * 1024
+
+    def __init__(self, db : database.Database):
+        self.generation = db.generation
+        # Tells apart databases (not just generations of one), and runs of the server
+        self.etag_prefix = f"{_RUN_ID}-{next(_cache_ids)}-{self.generation}"
+        self.responses : Mapping[Tuple, Tuple[int, bytes]] = collections.OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(route : Tuple[str, str, Mapping[str, List[str]]]) -> Tuple:
+        endpoint_name, name, query = route
+        return (endpoint_name, name, tuple((param, tuple(query.get(param, ()))) for param in ENDPOINT_PARAMS.get(endpoint_name, ())))
+
+    def etag(self, route) -> str:
+        """The validator of a (successful) response to the route, in this generation."""
+        return f'"{self.etag_prefix}-{hashlib.blake2b(repr(self.key(route)).encode("utf-8"), digest_size=8).hexdigest()}"'
+
+    def get(self, db : database.Database, route) -> Tuple[int, bytes]:
+        """(status, JSON body) of a routed request (see _route), or None if the
+        database has changed since this cache was made.
+        """
+        endpoint_name, name, query = route
+        key = self.key(route)
+        with self.lock:
+            response = self.responses.get(key)
+            if response is not None:
+                self.responses.move_to_end(key)
+                return response
+        response = _build(db, self.generation, endpoint_name, name, query)
+        if response is not None:
+            with self.lock:
+                self._add(key, response)
+        return response
+
+    def _add(self, key, response : Tuple[int, bytes]):
+        if key in self.responses:
+            return
+        self.responses[key] = response
+        self.size += len(response[1])
+        # The newest response is kept even if it's bigger than the limit on its own
+        while len(self.responses) > 1 and (len(self.responses) > self.MAX_COUNT or self.size > self.MAX_BYTES):
+            _, (_, body) = self.responses.popitem(last=False)
+            self.size -= len(body)
+
+def _route(path) -> Tuple[str, str, Mapping[str, List[str]]]:
+    """(endpoint name, entry name or None, the query parameters it reads) of a
+    request path, or None if there's no such endpoint.
+    """
+    url = urllib.parse.urlsplit(path)
+    segments = [urllib.parse.unquote(segment) for segment in url.path.split("/") if segment]
+    endpoint_name = segments[0] if segments else ""
+    if len(segments) > 2 or endpoint_name not in ENDPOINTS:
+        return None
+    query = urllib.parse.parse_qs(url.query)
+    return endpoint_name, segments[1] if len(segments) > 1 else None, {param: query[param] for param in ENDPOINT_PARAMS.get(endpoint_name, ()) if param in query}
+
+def _build(db : database.Database, generation, endpoint_name, name, query) -> Tuple[int, bytes]:
+    """Serializes a response, or returns None if the database isn't (or stops
+    being) at 'generation' meanwhile.
+
+    The lock is only taken to check the generation: a re-ingest patches the
+    database while holding it, so it's never half way through when the check
+    passes. Serializing (slow for whole collections) runs unlocked, so a GUI
+    or background parse isn't held up by it, and is thrown away if a re-ingest
+    started in the meantime.
+    """
+    with db.lock:
+        if db.generation != generation:
+            return None
+    try:
+        response = 200, _encode(ENDPOINTS[endpoint_name](db, name, query))
+    except NotFound as e:
+        response = 404, _encode({"error": f"{e} not found"})
+    except Exception:
+        # Most likely read the database half way through a re-ingest
+        if db.generation != generation:
+            return None
+        raise
+    with db.lock:
+        return response if db.generation == generation else None
+
+def _encode(obj) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+def forDatabase(db : database.Database) -> ResponseCache:
+    """The (cached) responses of a database, dropped once it changes."""
+    return db.cached(ResponseCache)
+
+####################################################
+## Server
+####################################################
+class RequestHandler(http.server.BaseHTTPRequestHandler):
+    """Serves whatever database.instance is when the request comes in."""
+    def do_GET(self):
+        db = database.instance
+        if db.version is None:
+            self._send(503, _encode({"error": "No log has been ingested"}))
+            return
+        route = _route(self.path)
+        if route is None:
+            self._send(404, _encode({"error": f"Unknown endpoint {urllib.parse.urlsplit(self.path).path}"}))
+            return
+        if_none_match = [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]
+        try:
+            response = None
+            while response is None:
+                responses = forDatabase(db)
+                etag = responses.etag(route)
+                # ETags are only handed out with 200s, and a generation always answers the same
+                if etag in if_none_match:
+                    break
+                # Re-ingested while it was being built; try again against the new generation
+                response = responses.get(db, route)
+        except Exception as e:
+            self._send(500, _encode({"error": f"{type(e).__name__}: {e}"}))
+            return
+        if response is None:
+            self._send(304, b"", etag)
+            return
+        status, body = response
+        self._send(status, body, etag if status == 200 else None)
+
+    def _send(self, status, body : bytes, etag=None):
+        self.send_response(status)
+        if etag is not None:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if status != 304:
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+        # Lets browser sources (e.g. stream overlays) poll it
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Polling clients would flood the console
+        pass
+
+class QueryServer:
+    """A local JSON server over database.instance, with a thread per request."""
+    def __init__(self, port=DEFAULT_PORT, host="127.0.0.1"):
+        self.httpd = http.server.ThreadingHTTPServer((host, port), RequestHandler)
+        self.httpd.daemon_threads = True
+        self.thread : threading.Thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="QueryServer", daemon=True)
+        self.thread.start()
+        print(f"Serving JSON on {self.url}")
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+####################################################
+def main(args):
+    """python -m src.server [--port <port>] <log file>"""
+    from src import ingest
+
+    port = DEFAULT_PORT
+    args = list(args)
+    if args[:1] == ["--port"]:
+        port = int(args[1])
+        args = args[2:]
+    if len(args) != 1:
+        print(main.__doc__)
+        return 1
+    database.instance = ingest.LogIngester(pathlib.Path(args[0])).ingest()
+    database.instance.warm()
+    query_server = QueryServer(port)
+    print(f"Serving JSON on {query_server.url}")
+    try:
+        query_server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    query_server.httpd.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,78 @@
+from   typing import List, Mapping, Tuple
+
+import numpy
+
+from src import database, pokemon
+
+####################################################
+class StatSimilarity:
+    """Nearest neighbours of pokemon by their six stats.
+
+    A brute-force scan over an (n x 6) matrix: with a thousand species that is
+    a few thousand flops per query, which numpy does faster than a KD-tree in
+    6 dimensions would be walked in Python.
+    """
+    EUCLIDEAN = "euclidean"
+    COSINE = "cosine"
+    METRICS = (EUCLIDEAN, COSINE)
+
+    def __init__(self, db : database.Database):
+        self.pokemon_ids = db.pokemon_ids
+        stats = numpy.array([p.stats.values for p in db.pokemon_by_id], dtype=numpy.float64).reshape(-1, len(pokemon.Stats.ALL_ATTR_NAMES))
+        # Normalised (z-scored) so every stat weighs the same in euclidean distances
+        std = stats.std(axis=0) if len(stats) else numpy.ones(stats.shape[1])
+        self.zscores = (stats - stats.mean(axis=0)) / numpy.where(std > 0, std, 1)
+        # Unit rows of the raw stats, so cosine similarity is a single matrix-vector product
+        norms = numpy.linalg.norm(stats, axis=1, keepdims=True)
+        self.unit_stats = stats / numpy.where(norms > 0, norms, 1)
+        # Type ids per pokemon (-1 for no secondary type)
+        self.type_ids : Mapping[str, int] = {}
+        self.primary_types = numpy.array([self._typeId(p.type.primary) for p in db.pokemon_by_id], dtype=numpy.int16)
+        self.secondary_types = numpy.array([self._typeId(p.type.secondary) for p in db.pokemon_by_id], dtype=numpy.int16)
+
+    def _typeId(self, type_str):
+        if type_str is None:
+            return -1
+        return self.type_ids.setdefault(type_str, len(self.type_ids))
+
+    def _typeMask(self, pkmn_id, shares_type, type_str):
+        mask = numpy.ones(len(self.primary_types), dtype=bool)
+        if shares_type is not None:
+            own_types = [t for t in (self.primary_types[pkmn_id], self.secondary_types[pkmn_id]) if t >= 0]
+            shared = numpy.isin(self.primary_types, own_types) | numpy.isin(self.secondary_types, own_types)
+            mask &= shared if shares_type else ~shared
+        if type_str is not None:
+            type_id = self.type_ids.get(type_str, -2)
+            mask &= (self.primary_types == type_id) | (self.secondary_types == type_id)
+        return mask
+
+    def nearest(self, pkmn_name, k=5, metric=EUCLIDEAN, shares_type=None, type_str=None) -> List[Tuple[str, float]]:
+        """The k pokemon closest to 'pkmn_name' (nearest first), as (name, distance).
+
+        shares_type: True/False to only consider pokemon that do/don't share a type with it.
+        type_str: only consider pokemon of that type.
+        Cosine distances are 1 - cosine similarity of the raw stats (the shape of
+        the stat spread, regardless of total); euclidean ones are over z-scores.
+        """
+        pkmn_id = self.pokemon_ids.get(pkmn_name)
+        if pkmn_id is None:
+            return []
+        if metric == self.COSINE:
+            distances = 1.0 - self.unit_stats @ self.unit_stats[pkmn_id]
+        else:
+            distances = numpy.sqrt(((self.zscores - self.zscores[pkmn_id]) ** 2).sum(axis=1))
+
+        candidates = self._typeMask(pkmn_id, shares_type, type_str)
+        candidates[pkmn_id] = False
+        distances = numpy.where(candidates, distances, numpy.inf)
+        k = min(k, int(candidates.sum()))
+        if k <= 0:
+            return []
+        # Top k in O(n), then only those k get sorted
+        top = numpy.argpartition(distances, k - 1)[:k]
+        top = top[numpy.argsort(distances[top], kind="stable")]
+        return [(self.pokemon_ids.name(int(i)), float(distances[i])) for i in top]
+
+def forDatabase(db : database.Database) -> StatSimilarity:
+    """The (cached) similarity engine of a database, rebuilt if it changed since."""
+    return db.cached(StatSimilarity)
@@ -0,0 +1,210 @@
+import pathlib
+import sqlite3
+import sys
+from   typing import List, Tuple
+
+from src import database
+
+####################################################
+class SeedStore:
+    """Optional SQLite copy of ingested databases, so seeds outlive the app and
+    can be queried (with plain SQL) without re-parsing their logs.
+
+    Any number of seeds can live in one file; each is keyed by the hash of
+    the log it was ingested from (see LogIngester.log_hash).
+    """
+    SCHEMA = """
+        PRAGMA foreign_keys = ON;
+
+        CREATE TABLE IF NOT EXISTS seeds (
+            id INTEGER PRIMARY KEY,
+            log_hash TEXT NOT NULL UNIQUE,
+            source TEXT,
+            randomizer_version TEXT,
+            pokemon_version TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS pokemon (
+            seed_id INTEGER NOT NULL REFERENCES seeds(id) ON DELETE CASCADE,
+            id INTEGER NOT NULL,
+            num TEXT,
+            name TEXT NOT NULL,
+            primary_type TEXT,
+            secondary_type TEXT,
+            PRIMARY KEY (seed_id, id)
+        );
+        CREATE INDEX IF NOT EXISTS pokemon_name ON pokemon(seed_id, name);
+        CREATE INDEX IF NOT EXISTS pokemon_primary_type ON pokemon(seed_id, primary_type);
+        CREATE INDEX IF NOT EXISTS pokemon_secondary_type ON pokemon(seed_id, secondary_type);
+
+        CREATE TABLE IF NOT EXISTS stats (
+            seed_id INTEGER NOT NULL,
+            pkmn_id INTEGER NOT NULL,
+            hp INTEGER, attack INTEGER, defence INTEGER,
+            special_attack INTEGER, special_defence INTEGER, speed INTEGER,
+            PRIMARY KEY (seed_id, pkmn_id),
+            FOREIGN KEY (seed_id, pkmn_id) REFERENCES pokemon(seed_id, id) ON DELETE CASCADE
+        );
+
+        -- Every move a moveset mentions has a row; moves missing from the
+        -- log's move table have NULL data
+        CREATE TABLE IF NOT EXISTS moves (
+            seed_id INTEGER NOT NULL REFERENCES seeds(id) ON DELETE CASCADE,
+            id INTEGER NOT NULL,
+            num TEXT,
+            name TEXT NOT NULL,
+            type TEXT,
+            category TEXT,
+            power INTEGER, accuracy INTEGER, pp INTEGER,
+            PRIMARY KEY (seed_id, id)
+        );
+        CREATE INDEX IF NOT EXISTS moves_name ON moves(seed_id, name);
+        CREATE INDEX IF NOT EXISTS moves_type ON moves(seed_id, type);
+
+        CREATE TABLE IF NOT EXISTS movesets (
+            seed_id INTEGER NOT NULL,
+            pkmn_id INTEGER NOT NULL,
+            level INTEGER NOT NULL,
+            move_id INTEGER NOT NULL,
+            FOREIGN KEY (seed_id, pkmn_id) REFERENCES pokemon(seed_id, id) ON DELETE CASCADE,
+            FOREIGN KEY (seed_id, move_id) REFERENCES moves(seed_id, id) ON DELETE CASCADE
+        );
+        CREATE INDEX IF NOT EXISTS movesets_pokemon ON movesets(seed_id, pkmn_id, level);
+        CREATE INDEX IF NOT EXISTS movesets_move ON movesets(seed_id, move_id, level);
+
+        CREATE TABLE IF NOT EXISTS locations (
+            seed_id INTEGER NOT NULL REFERENCES seeds(id) ON DELETE CASCADE,
+            id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            PRIMARY KEY (seed_id, id)
+        );
+        CREATE INDEX IF NOT EXISTS locations_name ON locations(seed_id, name);
+
+        CREATE TABLE IF NOT EXISTS sublocations (
+            seed_id INTEGER NOT NULL,
+            id INTEGER NOT NULL,
+            location_id INTEGER NOT NULL,
+            set_num TEXT,
+            classification TEXT,
+            rate INTEGER,
+            PRIMARY KEY (seed_id, id),
+            FOREIGN KEY (seed_id, location_id) REFERENCES locations(seed_id, id) ON DELETE CASCADE
+        );
+
+        -- Static encounters have no sublocation and NULL levels
+        CREATE TABLE IF NOT EXISTS encounters (
+            seed_id INTEGER NOT NULL,
+            pkmn_id INTEGER NOT NULL,
+            sublocation_id INTEGER,
+            classification TEXT,
+            min_level INTEGER,
+            max_level INTEGER,
+            FOREIGN KEY (seed_id, pkmn_id) REFERENCES pokemon(seed_id, id) ON DELETE CASCADE
+        );
+        CREATE INDEX IF NOT EXISTS encounters_pokemon ON encounters(seed_id, pkmn_id);
+        CREATE INDEX IF NOT EXISTS encounters_sublocation ON encounters(seed_id, sublocation_id);
+        CREATE INDEX IF NOT EXISTS encounters_level ON encounters(seed_id, min_level, max_level);
+    """
+
+    def __init__(self, path : pathlib.Path):
+        self.path = path
+        self.connection = sqlite3.connect(str(path))
+        self.connection.executescript(self.SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def hasSeed(self, log_hash) -> bool:
+        return self.seedId(log_hash) is not None
+
+    def seedId(self, log_hash) -> int:
+        row = self.connection.execute("SELECT id FROM seeds WHERE log_hash = ?", (log_hash,)).fetchone()
+        return row[0] if row else None
+
+    def seeds(self) -> List[Tuple]:
+        """(log_hash, source, randomizer_version, pokemon_version) of every stored seed."""
+        return self.connection.execute("SELECT log_hash, source, randomizer_version, pokemon_version FROM seeds ORDER BY id").fetchall()
+
+    def save(self, db : database.Database, log_hash) -> int:
+        """Bulk-loads 'db' as the seed 'log_hash' (replacing any earlier copy) in
+        one transaction, and returns its seed id.
+        """
+        db.materialiseAll()
+        with self.connection:
+            self.connection.execute("DELETE FROM seeds WHERE log_hash = ?", (log_hash,))
+            seed_id = self.connection.execute("INSERT INTO seeds (log_hash, source, randomizer_version, pokemon_version) VALUES (?, ?, ?, ?)",
+                                              (log_hash, str(db.source_location), db.randomizerVerionStr(), db.version.name if db.version else None)).lastrowid
+
+            self.connection.executemany("INSERT INTO pokemon VALUES (?, ?, ?, ?, ?, ?)",
+                                        ((seed_id, p.id, p.num, p.name, p.type.primary, p.type.secondary) for p in db.pokemon_by_id))
+            self.connection.executemany("INSERT INTO stats VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                        ((seed_id, p.id, *p.stats.values) for p in db.pokemon_by_id))
+
+            def moveRow(move_id, move_name):
+                m = db.moves.get(move_name)
+                if m is None:
+                    return (seed_id, move_id, None, move_name, None, None, None, None, None)
+                return (seed_id, move_id, m.num, m.name, m.type.primary, m.category.primary, *m.values)
+            self.connection.executemany("INSERT INTO moves VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                        (moveRow(move_id, move_name) for move_id, move_name in enumerate(db.move_ids.names)))
+            self.connection.executemany("INSERT INTO movesets VALUES (?, ?, ?, ?)",
+                                        ((seed_id, pkmn_id, level, move_id)
+                                         for move_id, learners in db.move_learners.items() for pkmn_id, level in learners))
+
+            self.connection.executemany("INSERT INTO locations VALUES (?, ?, ?)",
+                                        ((seed_id, location_id, name) for location_id, name in enumerate(db.location_ids.names)))
+            self.connection.executemany("INSERT INTO sublocations VALUES (?, ?, ?, ?, ?, ?)",
+                                        ((seed_id, sl.id, sl.location_id, sl.set_num, sl.classification, sl.rate) for sl in db.sublocation_by_id))
+
+            # Straight from the columnar encounter table (-1 means unknown)
+            table = db.encounters
+            def known(value):
+                return None if value < 0 else value
+            self.connection.executemany("INSERT INTO encounters VALUES (?, ?, ?, ?, ?, ?)",
+                                        ((seed_id, pkmn_id, known(sublocation_id), table.classifications.name(classification_id), known(min_level), known(max_level))
+                                         for pkmn_id, sublocation_id, classification_id, min_level, max_level
+                                         in zip(table.pkmn_ids.tolist(), table.sublocation_ids.tolist(), table.classification_ids.tolist(),
+                                                table.min_levels.tolist(), table.max_levels.tolist())
+                                         if pkmn_id >= 0))
+        return seed_id
+
+    def query(self, sql, parameters=()) -> List[Tuple]:
+        """Runs any (read) query. Tables are keyed by seed_id; see seedId."""
+        return self.connection.execute(sql, parameters).fetchall()
+
+    def learnersOf(self, log_hash, move_name) -> List[Tuple[str, int]]:
+        return self.query("""SELECT p.name, ms.level FROM moves m
+                             JOIN movesets ms ON ms.seed_id = m.seed_id AND ms.move_id = m.id
+                             JOIN pokemon p ON p.seed_id = ms.seed_id AND p.id = ms.pkmn_id
+                             WHERE m.seed_id = ? AND m.name = ?
+                             ORDER BY ms.level, p.name""", (self.seedId(log_hash), move_name))
+
+    def catchablePokemon(self, log_hash, max_level) -> List[str]:
+        return [name for (name,) in self.query("""SELECT DISTINCT p.name FROM encounters e
+                                                  JOIN pokemon p ON p.seed_id = e.seed_id AND p.id = e.pkmn_id
+                                                  WHERE e.seed_id = ? AND e.min_level <= ?
+                                                  ORDER BY p.id""", (self.seedId(log_hash), max_level))]
+
+####################################################
+def main(args):
+    """python -m src.store <store file> [<log file>... | --query <sql>]"""
+    from src import ingest
+
+    if len(args) < 2:
+        print(main.__doc__)
+        return 1
+    seed_store = SeedStore(pathlib.Path(args[0]))
+    if args[1] == "--query":
+        for row in seed_store.query(" ".join(args[2:])):
+            print(*row, sep="\t")
+    else:
+        for log_path in args[1:]:
+            log_ingester = ingest.LogIngester(pathlib.Path(log_path), lazy=False)
+            db = log_ingester.ingest()
+            seed_store.save(db, log_ingester.log_hash)
+            print(f"Stored {log_path} as seed {log_ingester.log_hash}")
+    seed_store.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
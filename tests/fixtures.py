@@ -0,0 +1,91 @@
+import contextlib
+import io
+import pathlib
+import tempfile
+
+from src import ingest
+
+# A tiny (pre-ZX) HeartGold log, small enough to know every answer by heart
+LOG = """Randomizer Version: 1.10.3
+Random Seed: 12345
+Settings String: abc
+
+--Pokemon Base Stats & Types--
+NUM|NAME|TYPE|HP|ATK|DEF|SPE|SATK|SDEF|ABILITY1|ABILITY2|ITEM
+  1|Bulbasaur   |GRASS/POISON|45|49|49|45|65|65|Overgrow|-|Oran Berry (50%)
+  2|Charmander  |FIRE|39|52|43|65|60|50|Blaze|-|
+  3|Squirtle    |WATER|44|48|65|43|50|64|Torrent|-|
+  4|Pikachu     |ELECTRIC|35|55|40|90|50|50|Static|-|Oran Berry (5%), Leftovers (50%)
+  5|Geodude     |ROCK/GROUND|40|80|100|20|30|30|Sturdy|Rock Head|
+  6|Gastly      |GHOST/POISON|30|35|30|80|100|35|Levitate|-|
+
+--Pokemon Movesets--
+001 Bulbasaur: Tackle at level 1, Growl at level 3, Vine Whip at level 7
+002 Charmander: Growl at level 1, Ember at level 7
+003 Squirtle: Tackle at level 1, Water Gun at level 7
+004 Pikachu: Thunder Shock at level 1, Growl at level 5
+005 Geodude: Tackle at level 1, Rock Throw at level 11, Curse at level 15
+006 Gastly: Lick at level 1, Curse at level 12
+
+--Move Data--
+NUM|NAME|TYPE|POWER|ACC.|PP|CATEGORY
+  1|Tackle         |NORMAL|40|100|35|PHYSICAL
+  2|Growl          |NORMAL|0|100|40|STATUS
+  3|Vine Whip      |GRASS|45|100|25|PHYSICAL
+  4|Ember          |FIRE|40|100|25|SPECIAL
+  5|Water Gun      |WATER|40|100|25|SPECIAL
+  6|Thunder Shock  |ELECTRIC|40|100|30|SPECIAL
+  7|Rock Throw     |ROCK|50|90|15|PHYSICAL
+  8|Lick           |GHOST|30|100|30|PHYSICAL
+  9|Curse          |???|0|100|10|STATUS
+ 10|Earthquake     |GROUND|100|100|10|PHYSICAL
+
+--TM Moves--
+TM01 Earthquake
+TM02 Ember
+
+--TM Compatibility--
+  1 Bulbasaur   |    |
+  2 Charmander  |    |TM02
+  3 Squirtle    |    |
+  4 Pikachu     |    |
+  5 Geodude     |TM01|TM02
+  6 Gastly      |    |
+
+--Wild Pokemon--
+Set #1 - Route 29 Grass/Cave (rate=25) - Bulbasaur Lvs 3-5, Pikachu Lv4
+Set #2 - Route 29 Surfing (rate=10) - Squirtle Lvs 10-12
+Set #3 - Dark Cave Grass/Cave (rate=25) - Geodude Lvs 6-8, Gastly Lv7
+
+--Trainers Pokemon--
+#1 (Youngster Joey => Youngster Joey) - Pikachu Lv5, Geodude Lv6
+
+--Static Pokemon--
+Sudowoodo => Charmander
+
+------------------------------------------------------------------
+Randomization of Pokemon HeartGold (U) completed.
+Time elapsed: 1234ms
+"""
+
+def writeLog(directory, text=LOG, name="fixture.log") -> pathlib.Path:
+    path = pathlib.Path(directory) / name
+    path.write_bytes(text.encode("utf-8"))
+    return path
+
+@contextlib.contextmanager
+def quiet():
+    """Keeps the extractors' chatter out of the test output."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+def ingestText(text=LOG, lazy=False):
+    """The Database of a log with the given contents (and its LogIngester)."""
+    with tempfile.TemporaryDirectory() as directory:
+        ingester = ingest.LogIngester(writeLog(directory, text), lazy=lazy)
+        with quiet():
+            db = ingester.ingest()
+            # Nothing may still need the file once it's gone
+            db.materialiseAll()
+            db.trainers
+    return db, ingester
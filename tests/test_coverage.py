@@ -0,0 +1,73 @@
+import random
+import unittest
+
+from src import coverage, damage, types
+from tests import fixtures
+
+def _mask(*type_strs):
+    return sum(1 << types.all_types.index(type_str) for type_str in type_strs)
+
+class TablesTest(unittest.TestCase):
+    def testPopcount(self):
+        for mask in [0, 1, 0b1011, coverage.ALL_TYPES_MASK, *random.Random(0).sample(range(1 << len(types.all_types)), 200)]:
+            with self.subTest(mask=mask):
+                self.assertEqual(coverage.POPCOUNT[mask], bin(mask).count("1"))
+
+    def testSingleTypes(self):
+        for attacking_type in types.all_types:
+            with self.subTest(attacking_type=attacking_type):
+                multipliers = {defending_type: damage.TYPE_MATRIX[damage.TYPE_INDEX[attacking_type], damage.TYPE_INDEX[defending_type]] for defending_type in types.all_types}
+                self.assertEqual(coverage.maskTypes(int(coverage.SUPER_EFFECTIVE[_mask(attacking_type)])),
+                                 [t for t in types.all_types if multipliers[t] > 1])
+                self.assertEqual(coverage.maskTypes(int(coverage.NEUTRAL_OR_BETTER[_mask(attacking_type)])),
+                                 [t for t in types.all_types if multipliers[t] >= 1])
+
+    def testUnion(self):
+        rng = random.Random(1)
+        for _ in range(100):
+            attacking_types = rng.sample(types.all_types, rng.randint(0, 4))
+            expected = 0
+            for attacking_type in attacking_types:
+                expected |= int(coverage.SUPER_EFFECTIVE[_mask(attacking_type)])
+            with self.subTest(attacking_types=attacking_types):
+                self.assertEqual(int(coverage.SUPER_EFFECTIVE[_mask(*attacking_types)]), expected)
+
+    def testDualTypeCoverage(self):
+        # Ice + Electric ("BoltBeam")
+        bolt_beam = _mask("ICE", "ELECTRIC")
+        self.assertEqual(coverage.maskTypes(int(coverage.SUPER_EFFECTIVE[bolt_beam])), ["DRAGON", "FLYING", "GRASS", "GROUND", "WATER"])
+        self.assertEqual(coverage.POPCOUNT[coverage.SUPER_EFFECTIVE[bolt_beam]], 5)
+        self.assertEqual(coverage.POPCOUNT[coverage.NEUTRAL_OR_BETTER[bolt_beam]], len(types.all_types))
+
+class OffensiveCoverageTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        db, _ = fixtures.ingestText()
+        cls.coverage = coverage.forDatabase(db)
+
+    def testMasks(self):
+        # Only damaging level up moves count (not Growl or Curse, nor the Earthquake TM)
+        self.assertEqual(self.coverage.maskOf("Geodude", 0), 0)
+        self.assertEqual(self.coverage.maskOf("Geodude", 10), _mask("NORMAL"))
+        self.assertEqual(self.coverage.maskOf("Geodude", 11), _mask("NORMAL", "ROCK"))
+        self.assertEqual(self.coverage.maskOf("Geodude", 100), _mask("NORMAL", "ROCK"))
+        self.assertEqual(self.coverage.maskOf("Gastly", 50), _mask("GHOST"))
+        self.assertEqual(self.coverage.maskOf("Nope", 50), 0)
+
+    def testTeamCoverage(self):
+        team = ["Charmander", "Squirtle"]
+        self.assertEqual(self.coverage.teamMask(team, 6), _mask("NORMAL"))
+        super_effective, not_very_effective = self.coverage.teamCoverage(team, 7)
+        self.assertEqual(coverage.maskTypes(super_effective), ["BUG", "FIRE", "GRASS", "GROUND", "ICE", "ROCK", "STEEL"])
+        self.assertEqual(not_very_effective, 0)
+        # Only Tackle, before Ember and Water Gun are learned
+        _, not_very_effective = self.coverage.teamCoverage(team, 6)
+        self.assertEqual(coverage.maskTypes(not_very_effective), ["GHOST", "ROCK", "STEEL"])
+
+    def testGapCovers(self):
+        covers = self.coverage.gapCovers(["Charmander", "Squirtle"], 20)
+        self.assertEqual(covers[0], ("Pikachu", ["FLYING", "WATER"]))
+        self.assertNotIn("Charmander", [pkmn_name for pkmn_name, _ in covers])
+
+if __name__ == "__main__":
+    unittest.main()
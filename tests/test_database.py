@@ -0,0 +1,81 @@
+import unittest
+
+from src import database
+
+class CachedTest(unittest.TestCase):
+    def setUp(self):
+        self.db = database.Database()
+        self.built = []
+
+    def factory(self, db):
+        self.built.append(db.generation)
+        return object()
+
+    def testReusedWithinGeneration(self):
+        first = self.db.cached("key", self.factory)
+        self.assertIs(self.db.cached("key", self.factory), first)
+        self.assertEqual(len(self.built), 1)
+
+    def testRebuiltOnChange(self):
+        first = self.db.cached("key", self.factory)
+        self.db.clearMoves()
+        self.assertIsNot(self.db.cached("key", self.factory), first)
+        self.assertEqual(self.built, [0, 1])
+
+    def testKeysAreSeparate(self):
+        self.assertIsNot(self.db.cached("a", self.factory), self.db.cached("b", self.factory))
+
+    def testKeyIsDefaultFactory(self):
+        class Derived:
+            def __init__(self, db):
+                self.db = db
+        self.assertIs(self.db.cached(Derived).db, self.db)
+        self.assertIs(self.db.cached(Derived), self.db.cached(Derived))
+
+    def testMaterialisingKeepsCache(self):
+        first = self.db.cached("key", self.factory)
+        self.db.defer("moves", lambda: self.db.addMoves([]))
+        deferred = self.db.cached("key", self.factory)
+        self.assertIsNot(deferred, first)
+        # Materialising only reveals what was already part of the generation
+        self.db.materialise("moves")
+        self.assertIs(self.db.cached("key", self.factory), deferred)
+
+class WarmTest(unittest.TestCase):
+    def setUp(self):
+        self.db = database.Database()
+        self.done = []
+
+    def warm(self):
+        self.db.warm(lambda section, error: self.done.append((section, error))).join()
+
+    def testMaterialises(self):
+        self.db.defer("moves", lambda: self.db.addMoves([]))
+        self.warm()
+        self.assertEqual(self.done, [("moves", None)])
+        self.assertEqual(self.db.pending(), [])
+
+    def testFailureIsRecorded(self):
+        error = ValueError("bad section")
+        def fail():
+            self.db.clearMoves()
+            raise error
+        self.db.defer("moves", fail)
+        self.db.defer("machines", lambda: None)
+        self.warm()
+        # The other sections are still parsed
+        self.assertEqual(self.done, [("moves", error), ("machines", None)])
+        self.assertEqual(self.db.failed, {"moves": error})
+        self.assertEqual(self.db.pending(), [])
+        # Reading it later doesn't raise again
+        self.assertEqual(self.db.moves, {})
+
+    def testDeferringAgainClearsFailure(self):
+        self.db.defer("moves", lambda: 1 / 0)
+        self.warm()
+        self.db.defer("moves", lambda: self.db.addMoves([]))
+        self.assertEqual(self.db.failed, {})
+        self.assertEqual(self.db.pending(), ["moves"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+
+from src import diff
+from tests import fixtures
+
+# Pikachu's hp, ability and moveset change, Squirtle is swapped out, Ember gets
+# stronger and Splash is new
+NEW_LOG = (fixtures.LOG
+           .replace("Pikachu     |ELECTRIC|35|55|40|90|50|50|Static|", "Pikachu     |ELECTRIC|45|55|40|90|50|50|Lightning Rod|")
+           .replace("004 Pikachu: Thunder Shock at level 1, Growl at level 5", "004 Pikachu: Thunder Shock at level 1, Tackle at level 3")
+           .replace("Squirtle", "Totodile")
+           .replace("  4|Ember          |FIRE|40|", "  4|Ember          |FIRE|60|")
+           .replace(" 10|Earthquake     |GROUND|100|100|10|PHYSICAL\n",
+                    " 10|Earthquake     |GROUND|100|100|10|PHYSICAL\n 11|Splash         |NORMAL|0|100|40|STATUS\n"))
+
+def changes(section):
+    return {entity.name: [(change.field, change.old, change.new) for change in entity.changes] for entity in section.changed}
+
+class DiffDatabasesTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.old, _ = fixtures.ingestText()
+        cls.new, _ = fixtures.ingestText(NEW_LOG)
+        cls.seed_diff = diff.diffDatabases(cls.old, cls.new)
+
+    def testPokemon(self):
+        section = self.seed_diff.sections["Pokemon"]
+        self.assertEqual(section.added, ["Totodile"])
+        self.assertEqual(section.removed, ["Squirtle"])
+        self.assertEqual(section.unchanged_count, 4)
+        self.assertEqual(changes(section), {"Pikachu": [("hp", 35, 45),
+                                                        ("abilities removed", ["Static"], None),
+                                                        ("abilities added", None, ["Lightning Rod"]),
+                                                        ("moveset removed", [(5, "Growl")], None),
+                                                        ("moveset added", None, [(3, "Tackle")])]})
+
+    def testMoves(self):
+        section = self.seed_diff.sections["Moves"]
+        self.assertEqual((section.added, section.removed, section.unchanged_count), (["Splash"], [], 9))
+        self.assertEqual(changes(section), {"Ember": [("power", 40, 60)]})
+
+    def testLocations(self):
+        section = self.seed_diff.sections["Locations"]
+        self.assertEqual((section.added, section.removed, section.unchanged_count), ([], [], 1))
+        self.assertEqual(changes(section), {"Route 29": [("encounters removed", [("Surfing", "Squirtle", (10, 11, 12))], None),
+                                                         ("encounters added", None, [("Surfing", "Totodile", (10, 11, 12))])]})
+
+    def testReport(self):
+        lines = self.seed_diff.lines()
+        self.assertIn("== Moves: 1 changed, 1 added, 0 removed, 9 unchanged ==", lines)
+        self.assertIn("    power: 40 -> 60", lines)
+        self.assertFalse(self.seed_diff.empty())
+
+    def testSameSeed(self):
+        seed_diff = diff.diffDatabases(self.old, self.old)
+        self.assertTrue(seed_diff.empty())
+        self.assertEqual([section.unchanged_count for section in seed_diff.sections.values()], [6, 10, 2])
+        # An identical seed ingested separately has the same facts
+        other, _ = fixtures.ingestText()
+        self.assertTrue(diff.diffDatabases(self.old, other).empty())
+
+class FactsTest(unittest.TestCase):
+    def setUp(self):
+        self.db, _ = fixtures.ingestText()
+
+    def testCachedPerGeneration(self):
+        facts = diff.forDatabase(self.db)
+        diff.diffDatabases(self.db, self.db)
+        self.assertIs(diff.forDatabase(self.db), facts)
+        self.assertEqual(set(facts.by_kind), {"Pokemon", "Moves", "Locations"})
+        # Built once per kind, however often it's asked for
+        pokemon_facts = facts.by_kind["Pokemon"]
+        diff.diffDatabases(self.db, self.db)
+        self.assertIs(facts.by_kind["Pokemon"], pokemon_facts)
+        self.db.clearMoves()
+        self.assertIsNot(diff.forDatabase(self.db), facts)
+
+    def testFingerprintCollision(self):
+        other, _ = fixtures.ingestText(NEW_LOG)
+        old = diff.forDatabase(self.db).of("Moves", lambda db: db.moves, diff.moveFacts)
+        new = diff.forDatabase(other).of("Moves", lambda db: db.moves, diff.moveFacts)
+        # Equal fingerprints don't hide different facts
+        new["Ember"] = (old["Ember"][0], new["Ember"][1])
+        section = diff.diffEntities("Moves", self.db, other, lambda db: db.moves, diff.moveFacts, diff.MOVE_FIELDS)
+        self.assertEqual(changes(section), {"Ember": [("power", 40, 60)]})
+
+    def testCollectionChanges(self):
+        # Compared as sets: order and repeats aren't changes
+        self.assertEqual(diff._collectionChanges("items", ("a", "b"), ("b", "a", "a")), [])
+        self.assertEqual([(change.field, change.old, change.new) for change in diff._collectionChanges("items", ("c", "a", "b"), ("d", "b"))],
+                         [("items removed", ["a", "c"], None), ("items added", None, ["d"])])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import itertools
+import random
+import types
+import unittest
+
+import numpy
+
+from src import indexes
+
+def _occurrence(pkmn_id, location_id, classification, levels):
+    # EncounterTable only reads these attributes
+    sublocation = types.SimpleNamespace(id=location_id, location_id=location_id, classification=classification, rate=None)
+    return types.SimpleNamespace(pkmn_id=pkmn_id, location=sublocation, levels=tuple(sorted(levels)))
+
+class EncounterTableLevelTest(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(0)
+        occurrences = []
+        for pkmn_id in range(200):
+            low = rng.randint(1, 90)
+            occurrences.append(_occurrence(pkmn_id, rng.randrange(10), rng.choice(["Grass/Cave", "Surfing", "Old Rod"]),
+                                           range(low, low + rng.randint(1, 10))))
+        # Statics have no levels
+        statics = [_occurrence(pkmn_id, None, "Static", []) for pkmn_id in range(200, 210)]
+        self.table = indexes.EncounterTable()
+        self.table.add(occurrences)
+        self.table.add(statics)
+        self.occurrences = occurrences + statics
+
+    def bruteForce(self, min_level, max_level, classifications=None, location_ids=None):
+        rows = []
+        for row, wo in enumerate(self.occurrences):
+            if min_level is not None or max_level is not None:
+                if not wo.levels:
+                    continue
+                if min_level is not None and wo.levels[-1] < min_level:
+                    continue
+                if max_level is not None and wo.levels[0] > max_level:
+                    continue
+            if classifications is not None and wo.location.classification not in classifications:
+                continue
+            if location_ids is not None and wo.location.location_id not in location_ids:
+                continue
+            rows.append(row)
+        return rows
+
+    def testOpenBoundsIncludeStatics(self):
+        rows = self.table.rowsByLevel()
+        self.assertEqual(rows.tolist(), list(range(len(self.occurrences))))
+        static_rows = self.table.rowsByLevel(classifications=["Static"])
+        self.assertEqual(len(static_rows), 10)
+
+    def testBoundsMatchBruteForce(self):
+        for min_level, max_level in itertools.product([None, 1, 30, 55, 99, 200], repeat=2):
+            with self.subTest(min_level=min_level, max_level=max_level):
+                self.assertEqual(self.table.rowsByLevel(min_level, max_level).tolist(), self.bruteForce(min_level, max_level))
+
+    def testFilters(self):
+        for classifications, location_ids in [(["Surfing"], None), (["Surfing", "Static", "Unknown"], None), (None, [3, 4]), (["Old Rod"], [1])]:
+            with self.subTest(classifications=classifications, location_ids=location_ids):
+                self.assertEqual(self.table.rowsByLevel(20, 40, classifications, location_ids).tolist(),
+                                 self.bruteForce(20, 40, classifications, location_ids))
+                self.assertEqual(self.table.rowsByLevel(None, None, classifications, location_ids).tolist(),
+                                 self.bruteForce(None, None, classifications, location_ids))
+
+    def testEmpty(self):
+        table = indexes.EncounterTable()
+        self.assertEqual(len(table.rowsByLevel(5, 10)), 0)
+        self.assertEqual(len(table.rowsByLevel()), 0)
+
+class MachineTableTest(unittest.TestCase):
+    def setUp(self):
+        # 70 machines, so the rows span two 64-bit words
+        self.machine_names = [f"TM{i:02d}" for i in range(1, 71)]
+        tm_moves = [(machine, f"Move {i}") for i, machine in enumerate(self.machine_names)]
+        # Machine 63 is the last bit of the first word, 64 the first of the second
+        self.compatibility = {
+            "Low": [0, 1, 63],
+            "High": [64, 69],
+            "Straddle": [63, 64],
+            "All": list(range(70)),
+            "None": [],
+        }
+        self.pokemon_ids = indexes.NameTable()
+        for pkmn_name in self.compatibility:
+            self.pokemon_ids.id(pkmn_name)
+        self.table = indexes.MachineTable(tm_moves, [(pkmn_name, [self.machine_names[m] for m in machine_ids]) for pkmn_name, machine_ids in self.compatibility.items()],
+                                          self.pokemon_ids)
+
+    def bruteForce(self, machine_ids):
+        return [self.pokemon_ids.get(pkmn_name) for pkmn_name, compatible in self.compatibility.items() if set(machine_ids) <= set(compatible)]
+
+    def testWords(self):
+        self.assertEqual(self.table.word_count, 2)
+        straddle = self.table.compatibility[self.pokemon_ids.get("Straddle")]
+        self.assertEqual(straddle.tolist(), [1 << 63, 1])
+        self.assertEqual(self.table.queryWords(["TM64", "TM65", "TM70"]).tolist(), [1 << 63, 1 | 1 << 5])
+
+    def testCompatibleWith(self):
+        for machine_ids in [[0], [63], [64], [63, 64], [0, 69], [1, 63], list(range(70))]:
+            with self.subTest(machine_ids=machine_ids):
+                self.assertEqual(self.table.compatibleWith([self.machine_names[m] for m in machine_ids]).tolist(), self.bruteForce(machine_ids))
+
+    def testLearners(self):
+        for machine_id in (0, 63, 64, 69):
+            move_name = f"Move {machine_id}"
+            expected = self.bruteForce([machine_id])
+            with self.subTest(move_name=move_name):
+                self.assertEqual(self.table.learnersOf(move_name).tolist(), expected)
+                self.assertEqual([pkmn_id for pkmn_id in range(len(self.pokemon_ids)) if self.table.canLearn(move_name, pkmn_id)], expected)
+
+    def testUnknownMachines(self):
+        with self.assertRaises(KeyError):
+            self.table.compatibleWith(["TM64", "TM99"])
+        self.assertEqual(len(self.table.compatibleWith([])), 0)
+
+if __name__ == "__main__":
+    unittest.main()
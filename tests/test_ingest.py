@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src import ingest
+from tests import fixtures
+
+# Tackle gets stronger; every other section is untouched
+CHANGED_MOVES = fixtures.LOG.replace("Tackle         |NORMAL|40|", "Tackle         |NORMAL|50|")
+
+class RefreshTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = fixtures.writeLog(self.directory.name)
+
+    def ingest(self, lazy):
+        fixtures.writeLog(self.directory.name)
+        self.ingester = ingest.LogIngester(self.path, lazy=lazy)
+        with fixtures.quiet():
+            self.db = self.ingester.ingest()
+            self.db.materialiseAll()
+
+    def refresh(self, text):
+        fixtures.writeLog(self.directory.name, text)
+        hashes = dict(self.ingester.section_hashes)
+        extract = mock.Mock(wraps=ingest.extractSection)
+        with fixtures.quiet(), mock.patch.object(ingest, "extractSection", extract):
+            changed = self.ingester.refresh(self.db)
+            self.db.materialiseAll()
+        self.extracted = [call.args[0] for call in extract.call_args_list]
+        self.kept = {name for name, digest in hashes.items() if self.ingester.section_hashes[name] == digest}
+        return changed
+
+    def testOnlyChangedSection(self):
+        for lazy in (True, False):
+            with self.subTest(lazy=lazy):
+                self.ingest(lazy)
+                pikachu = self.db.pokemon["Pikachu"]
+                self.assertEqual(self.refresh(CHANGED_MOVES), {"moves"})
+                self.assertEqual(self.extracted, ["moves"])
+                self.assertEqual(self.kept, set(self.ingester.section_hashes) - {"moves"})
+                self.assertEqual(self.db.moves["Tackle"].power.value, 50)
+                # The pokemon weren't re-applied
+                self.assertIs(self.db.pokemon["Pikachu"], pikachu)
+
+    def testUnchanged(self):
+        self.ingest(lazy=True)
+        self.assertEqual(self.refresh(fixtures.LOG), set())
+        self.assertEqual(self.extracted, [])
+        self.assertEqual(self.kept, set(self.ingester.section_hashes))
+
+    def testPokemonChangeReappliesDependents(self):
+        self.ingest(lazy=True)
+        changed = self.refresh(fixtures.LOG.replace("Pikachu     |ELECTRIC|35|", "Pikachu     |ELECTRIC|45|"))
+        self.assertEqual(changed, {"pokemon"})
+        # Everything built on the pokemon is re-extracted from its (unchanged) bytes, but not the moves
+        self.assertEqual(sorted(self.extracted), ["locations", "movesets", "pokemon", "statics", "tm_compatibility", "tm_moves"])
+        self.assertEqual(self.kept, set(self.ingester.section_hashes) - {"pokemon"})
+        self.assertEqual(self.db.pokemon["Pikachu"].stats.hp.value, 45)
+        self.assertEqual(self.db.learnersOf("Thunder Shock"), [("Pikachu", 1)])
+
+class LogWatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = fixtures.writeLog(self.directory.name)
+        self.ingester = ingest.LogIngester(self.path)
+        with fixtures.quiet():
+            self.db = self.ingester.ingest()
+        self.watcher = ingest.LogWatcher(self.ingester, self.db)
+
+    def write(self, text):
+        fixtures.writeLog(self.directory.name, text)
+        # Coarse file system timestamps mustn't hide the change
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def poll(self):
+        with fixtures.quiet():
+            return self.watcher.poll()
+
+    def testPollsChanges(self):
+        self.assertEqual(self.poll(), set())
+        self.write(CHANGED_MOVES)
+        self.assertEqual(self.poll(), {"moves"})
+        self.assertEqual(self.poll(), set())
+
+    def testRetriesHalfWrittenLog(self):
+        self.write(CHANGED_MOVES[:len(CHANGED_MOVES) // 2])
+        self.assertEqual(self.poll(), set())
+        self.assertEqual(self.poll(), set())
+        # The half written log doesn't count as having changed everything
+        self.write(CHANGED_MOVES)
+        self.assertEqual(self.poll(), {"moves"})
+
+    def testRetriesUnreadableLog(self):
+        self.write(CHANGED_MOVES)
+        with mock.patch.object(self.ingester, "refresh", side_effect=PermissionError("in use")):
+            self.assertEqual(self.poll(), set())
+        self.assertEqual(self.poll(), {"moves"})
+
+    def testBugsAreRaised(self):
+        self.write(CHANGED_MOVES)
+        with mock.patch.object(self.ingester, "refresh", side_effect=IndexError("bug")):
+            with self.assertRaises(IndexError):
+                self.poll()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import gzip
+import tempfile
+import unittest
+from unittest import mock
+
+from src import parsers, pokemon
+from src.external import parsers as external_parsers
+from tests import fixtures
+
+class SniffTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def testHeader(self):
+        header = parsers.RandomizerLogParser.sniff(fixtures.writeLog(self.directory.name))
+        self.assertEqual(header.randomizer_version, ("1", "10", "3"))
+        self.assertIs(header.pokemon_version, pokemon.Version.HEARTGOLD)
+        self.assertTrue(header.headers_found)
+
+    def testInvalid(self):
+        path = fixtures.writeLog(self.directory.name, "Not a log\n" * 100)
+        with self.assertRaises(parsers.InvalidFormatError):
+            parsers.RandomizerLogParser.sniff(path)
+        path.write_bytes(b"\0\1\2" * 1000)
+        with self.assertRaises(parsers.InvalidFormatError):
+            parsers.RandomizerLogParser.sniff(path)
+
+    def testValidatedFromHeader(self):
+        # The sniffed start already has the headers, so the whole file isn't searched again
+        with mock.patch.object(parsers.RandomizerLogParser, "find", side_effect=AssertionError("searched the whole file")):
+            log_parser = parsers.RandomizerLogParser(fixtures.writeLog(self.directory.name))
+        self.assertTrue(log_parser.header.headers_found)
+
+    def testGzip(self):
+        path = fixtures.writeLog(self.directory.name, name="fixture.log.gz")
+        path.write_bytes(gzip.compress(fixtures.LOG.replace("Settings String: abc", "Settings String: Nidoran♀").encode("utf-8")))
+        # Decoded the same way as the full read, whatever the locale
+        with external_parsers._openText(path) as f:
+            self.assertEqual(f.encoding, "utf-8")
+        header = parsers.RandomizerLogParser.sniff(path)
+        self.assertEqual(header.randomizer_version, ("1", "10", "3"))
+        # The end of a gzipped file isn't sniffed
+        self.assertIsNone(header.pokemon_version)
+
+class DecodeTest(unittest.TestCase):
+    def testLineEndings(self):
+        for data in [b"a\nb\nc", b"a\r\nb\r\nc", b"a\rb\rc", b"a\r\nb\rc"]:
+            with self.subTest(data=data):
+                self.assertEqual(external_parsers.decodeLines(data), ["a\n", "b\n", "c"])
+        # Only line endings split lines (unlike str.splitlines)
+        self.assertEqual(external_parsers.decodeLines(b"a\x0cb\n"), ["a\x0cb\n"])
+
+    @staticmethod
+    def mojibake(text):
+        """UTF-8 text as it looks after being decoded as cp1252."""
+        byte_to_char = {b: char for char, b in external_parsers._MOJIBAKE_CHAR_TO_BYTE.items()}
+        return "".join(byte_to_char.get(b, chr(b)) for b in text.encode("utf-8"))
+
+    def testMojibakeTable(self):
+        # Every high byte maps to a distinct character, and back
+        self.assertEqual(sorted(external_parsers._MOJIBAKE_CHAR_TO_BYTE.values()), list(range(0x80, 0x100)))
+        self.assertEqual(self.mojibake("Nidoran♀"), "Nidoranâ™€")
+
+    def testRepairMojibake(self):
+        for text in ["Nidoran♀", "Flabébé", "Mr. Mime", "ポケモン", "😀 and é", "\u00a0\u00ff"]:
+            with self.subTest(text=text):
+                self.assertEqual(external_parsers.repairMojibake(self.mojibake(text)), text)
+                self.assertEqual(external_parsers.decodeLines(self.mojibake(text).encode("utf-8")), [text])
+        # Names are searched for with a plain apostrophe
+        self.assertEqual(external_parsers.repairMojibake(self.mojibake("Farfetch’d")), "Farfetch'd")
+
+    def testLeavesTextAlone(self):
+        # Non-ascii text that isn't mojibake (or only looks like the start of it)
+        for text in ["Pokémon", "Â", "â™", "½ price"]:
+            with self.subTest(text=text):
+                self.assertEqual(external_parsers.repairMojibake(text), text)
+
+    def testIngestLoneCarriageReturns(self):
+        db, _ = fixtures.ingestText(fixtures.LOG.replace("\n", "\r"))
+        expected, _ = fixtures.ingestText()
+        self.assertEqual(list(db.pokemon), list(expected.pokemon))
+        self.assertEqual(list(db.locations), list(expected.locations))
+        self.assertEqual(db.learnersOf("Curse"), expected.learnersOf("Curse"))
+
+class FindTest(unittest.TestCase):
+    def setUp(self):
+        self.parser = external_parsers.StringParser(["one", "two two", "(a) [b]", "three"])
+
+    def testFirstMatchingLine(self):
+        self.assertEqual(self.parser.find("three", "two"), "two two")
+        self.assertEqual(self.parser.findIndex(r"thr(e)+", r"^\(a\)"), 2)
+        self.assertEqual(self.parser.findGroups(r"(\w+)ee", r"^(t)(w)o"), ("t", "w"))
+        with self.assertRaises(external_parsers.RegexNotFoundError):
+            self.parser.find("four", "five")
+
+    def testNumberedReferences(self):
+        # Joined together, \1 would refer to the first pattern's group
+        self.assertIsNone(external_parsers.combined(r"(one)", r"(\w+) \1"))
+        self.assertIsNone(external_parsers.combined(r"(x)", r"(t)?(?(1)wo|one)"))
+        self.assertEqual(self.parser.findGroups(r"(x)", r"(\w+) \1"), "two")
+        self.assertEqual(self.parser.findIndex(r"(x)", r"(t)(?(1)hree|x)"), 3)
+        # Escaped backslashes and named references are fine
+        self.assertIsNotNone(external_parsers.combined(r"(x)", r"\\1", r"(?P<word>\w+) (?P=word)"))
+        self.assertEqual(self.parser.findGroups(r"(x)", r"(?P<word>\w+) (?P=word)"), "two")
+
+    def testSharedGroupNames(self):
+        self.assertIsNone(external_parsers.combined(r"(?P<a>x)", r"(?P<a>two)"))
+        self.assertEqual(self.parser.findGroups(r"(?P<a>x)", r"(?P<a>two)"), "two")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+
+from src import query
+from tests import fixtures
+
+class ParseTest(unittest.TestCase):
+    def testTerms(self):
+        parsed = query.parse('type:fire -ability:levitate spd>90 learns:"Vine Whip" char', query.PokemonTable)
+        self.assertEqual(parsed.terms, [(False, "type", ":", "fire"),
+                                        (True, "ability", ":", "levitate"),
+                                        (False, "spd", ">", 90),
+                                        (False, "learns", ":", "Vine Whip"),
+                                        (False, "name", ":", "char")])
+
+    def testAliases(self):
+        parsed = query.parse("speed>=10 total<300 item:x location=y", query.PokemonTable)
+        self.assertEqual([field for _, field, _, _ in parsed.terms], ["spd", "bst", "holds", "at"])
+        parsed = query.parse("pow>40 cat:special by:pikachu", query.MoveTable)
+        self.assertEqual([field for _, field, _, _ in parsed.terms], ["power", "category", "learnedby"])
+
+    def testIsQuery(self):
+        self.assertTrue(query.isQuery("bst>300"))
+        self.assertFalse(query.isQuery("pikachu"))
+
+    def testErrors(self):
+        for text, table_class in [("color:red", query.PokemonTable),
+                                  ("bst>lots", query.PokemonTable),
+                                  ("type>fire", query.PokemonTable),
+                                  ("bst>>3", query.PokemonTable),
+                                  ("learnedby<3", query.MoveTable)]:
+            with self.subTest(text=text):
+                with self.assertRaises(query.QueryError):
+                    query.parse(text, table_class)
+
+class MatchTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db, _ = fixtures.ingestText()
+
+    def pokemon(self, text):
+        return query.matchingPokemon(self.db, text)
+
+    def moves(self, text):
+        return query.matchingMoves(self.db, text)
+
+    def testNumeric(self):
+        self.assertEqual(self.pokemon("spd>=65"), ["Charmander", "Pikachu", "Gastly"])
+        self.assertEqual(self.pokemon("hp=45"), ["Bulbasaur"])
+        self.assertEqual(self.pokemon("bst<=310 hp!=40"), ["Charmander", "Gastly"])
+        self.assertEqual(self.moves("power>45"), ["Rock Throw", "Earthquake"])
+
+    def testTypes(self):
+        self.assertEqual(self.pokemon("type:poison"), ["Bulbasaur", "Gastly"])
+        self.assertEqual(self.pokemon("type!=poison -type:rock"), ["Charmander", "Squirtle", "Pikachu"])
+        # Logs write the unknown type as "???"
+        self.assertEqual(self.moves("type:unknown"), ["Curse"])
+        self.assertEqual(self.moves("type:???"), ["Curse"])
+        self.assertEqual(self.moves("category:status -type:normal"), ["Curse"])
+
+    def testNames(self):
+        self.assertEqual(self.pokemon("SAUR"), ["Bulbasaur"])
+        self.assertEqual(self.pokemon("-name:a"), ["Squirtle", "Geodude"])
+        self.assertEqual(self.moves('"Water Gun"'), ["Water Gun"])
+
+    def testRelations(self):
+        # Level up and TM learners
+        self.assertEqual(self.pokemon('learns:"ember"'), ["Charmander", "Geodude"])
+        self.assertEqual(self.pokemon("learns:Curse"), ["Geodude", "Gastly"])
+        self.assertEqual(self.pokemon('holds:"oran berry"'), ["Bulbasaur", "Pikachu"])
+        self.assertEqual(self.pokemon('ability:"rock head"'), ["Geodude"])
+        self.assertEqual(self.pokemon('at:"Route 29"'), ["Bulbasaur", "Squirtle", "Pikachu"])
+        self.assertEqual(self.pokemon("catch<=5"), ["Bulbasaur", "Pikachu"])
+        self.assertEqual(self.moves("learnedby:geodude"), ["Tackle", "Ember", "Rock Throw", "Curse", "Earthquake"])
+        self.assertEqual(self.moves("tm:yes"), ["Ember", "Earthquake"])
+        self.assertEqual(self.moves("tm:TM01"), ["Earthquake"])
+
+    def testUnknownValues(self):
+        for text in ["learns:Splash", "type:plasma", "holds:nothing", 'at:"Nowhere"']:
+            with self.subTest(text=text):
+                with self.assertRaises(query.QueryError):
+                    self.pokemon(text)
+
+    def testLearnsWithoutMoveData(self):
+        # Logs with unchanged moves have no move data; movesets still name them
+        text = fixtures.LOG.replace("--Move Data--", "--Unchanged Move Data--")
+        db, _ = fixtures.ingestText(text)
+        self.assertEqual(db.moves, {})
+        self.assertEqual(query.matchingPokemon(db, "learns:tackle"), ["Bulbasaur", "Squirtle", "Geodude"])
+        self.assertEqual(query.matchingPokemon(db, "learns:earthquake"), ["Geodude"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import json
+import unittest
+import urllib.error
+import urllib.request
+from unittest import mock
+
+from src import database, server
+from tests import fixtures
+
+class RequestHandlerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db, _ = fixtures.ingestText()
+        cls.previous_instance = database.instance
+        database.instance = cls.db
+        cls.query_server = server.QueryServer(port=0)
+        cls.query_server.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.query_server.stop()
+        database.instance = cls.previous_instance
+
+    def get(self, path, etag=None):
+        request = urllib.request.Request(self.query_server.url.rstrip("/") + path, headers={"If-None-Match": etag} if etag else {})
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.headers.get("ETag"), response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers.get("ETag"), e.read()
+
+    def testOk(self):
+        status, etag, body = self.get("/pokemon/Pikachu")
+        self.assertEqual(status, 200)
+        self.assertIsNotNone(etag)
+        self.assertEqual(json.loads(body)["types"], ["ELECTRIC"])
+        self.assertEqual(self.get("/pokemon/Pikachu", etag)[0], 304)
+
+    def testEtagsArePerResponse(self):
+        _, pikachu_etag, _ = self.get("/pokemon/Pikachu")
+        _, gastly_etag, _ = self.get("/pokemon/Gastly")
+        self.assertNotEqual(pikachu_etag, gastly_etag)
+        self.assertEqual(self.get("/pokemon/Gastly", pikachu_etag)[0], 200)
+        # Parameters the endpoint doesn't read don't make a different response
+        _, etag, _ = self.get("/encounters?location=Route%2029&junk=1")
+        self.assertEqual(self.get("/encounters?location=Route%2029", etag)[0], 304)
+
+    def testNotFound(self):
+        _, etag, _ = self.get("/pokemon")
+        for path in ["/nope", "/pokemon/Nope", "/pokemon/Pikachu/moves"]:
+            with self.subTest(path=path):
+                status, response_etag, body = self.get(path, etag)
+                self.assertEqual(status, 404)
+                self.assertIsNone(response_etag)
+                self.assertIn("error", json.loads(body))
+
+    def testError(self):
+        with mock.patch.dict(server.ENDPOINTS, {"moves": mock.Mock(side_effect=RuntimeError("broken"))}):
+            status, etag, body = self.get("/moves/Tackle")
+        self.assertEqual(status, 500)
+        self.assertIsNone(etag)
+        self.assertEqual(json.loads(body), {"error": "RuntimeError: broken"})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+
+from src import store
+from tests import fixtures
+
+TABLES = ["encounters", "locations", "moves", "movesets", "pokemon", "seeds", "stats", "sublocations"]
+
+class SeedStoreTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db, ingester = fixtures.ingestText()
+        cls.log_hash = ingester.log_hash
+
+    def setUp(self):
+        self.store = store.SeedStore(":memory:")
+        self.addCleanup(self.store.close)
+        self.seed_id = self.store.save(self.db, self.log_hash)
+
+    def count(self, table, seed_id=None):
+        where, parameters = ("", ()) if seed_id is None else (" WHERE seed_id = ?", (seed_id,))
+        return self.store.query(f"SELECT COUNT(*) FROM {table}{where}", parameters)[0][0]
+
+    def testSchema(self):
+        tables = self.store.query("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")
+        self.assertEqual([name for (name,) in tables], TABLES)
+        self.assertEqual(self.store.query("PRAGMA foreign_keys"), [(1,)])
+        # Reopening an existing store is fine
+        self.store.connection.executescript(store.SeedStore.SCHEMA)
+        self.assertEqual(self.store.query("PRAGMA foreign_key_check"), [])
+
+    def testRoundTrip(self):
+        self.assertEqual(self.store.seeds(), [(self.log_hash, str(self.db.source_location), "1.10.3", "HEARTGOLD")])
+        self.assertEqual(self.store.query("SELECT name, primary_type, secondary_type FROM pokemon WHERE seed_id = ? ORDER BY id", (self.seed_id,)),
+                         [("Bulbasaur", "GRASS", "POISON"), ("Charmander", "FIRE", None), ("Squirtle", "WATER", None),
+                          ("Pikachu", "ELECTRIC", None), ("Geodude", "ROCK", "GROUND"), ("Gastly", "GHOST", "POISON")])
+        self.assertEqual(self.store.query("SELECT s.* FROM stats s JOIN pokemon p ON p.seed_id = s.seed_id AND p.id = s.pkmn_id WHERE p.name = 'Geodude'"),
+                         [(self.seed_id, self.db.pokemon["Geodude"].id, 40, 80, 100, 30, 30, 20)])
+        self.assertEqual(self.store.query("SELECT type, category, power, accuracy, pp FROM moves WHERE name = 'Rock Throw'"),
+                         [("ROCK", "PHYSICAL", 50, 90, 15)])
+        self.assertEqual(self.count("moves"), 10)
+        self.assertEqual(self.count("locations"), 2)
+        self.assertEqual(self.count("sublocations"), 3)
+        # Five wild encounters, and the static one without a sublocation or levels
+        self.assertEqual(self.count("encounters"), 6)
+        self.assertEqual(self.store.query("SELECT p.name, e.sublocation_id, e.min_level FROM encounters e JOIN pokemon p ON p.seed_id = e.seed_id AND p.id = e.pkmn_id WHERE e.sublocation_id IS NULL"),
+                         [("Charmander", None, None)])
+
+    def testLearnersOf(self):
+        self.assertEqual(self.store.learnersOf(self.log_hash, "Curse"), [("Gastly", 12), ("Geodude", 15)])
+        self.assertEqual(self.store.learnersOf(self.log_hash, "Curse"), sorted(self.db.learnersOf("Curse"), key=lambda learner: learner[1]))
+        self.assertEqual(self.store.learnersOf(self.log_hash, "Splash"), [])
+        self.assertEqual(self.store.learnersOf("no such seed", "Curse"), [])
+
+    def testCatchablePokemon(self):
+        self.assertEqual(self.store.catchablePokemon(self.log_hash, 2), [])
+        self.assertEqual(self.store.catchablePokemon(self.log_hash, 5), ["Bulbasaur", "Pikachu"])
+        # Static encounters have no level, so never count
+        self.assertEqual(self.store.catchablePokemon(self.log_hash, 100), ["Bulbasaur", "Squirtle", "Pikachu", "Geodude", "Gastly"])
+
+    def testSavingAgainReplaces(self):
+        counts = {table: self.count(table) for table in TABLES}
+        seed_id = self.store.save(self.db, self.log_hash)
+        self.assertEqual({table: self.count(table) for table in TABLES}, counts)
+        self.assertEqual(self.store.seedId(self.log_hash), seed_id)
+
+    def testDeleteCascades(self):
+        other_id = self.store.save(self.db, "other")
+        with self.store.connection:
+            self.store.connection.execute("DELETE FROM seeds WHERE id = ?", (self.seed_id,))
+        for table in [table for table in TABLES if table != "seeds"]:
+            with self.subTest(table=table):
+                self.assertEqual(self.count(table, self.seed_id), 0)
+                self.assertGreater(self.count(table, other_id), 0)
+        self.assertFalse(self.store.hasSeed(self.log_hash))
+        self.assertTrue(self.store.hasSeed("other"))
+
+if __name__ == "__main__":
+    unittest.main()